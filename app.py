@@ -1,1220 +1,4053 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-Instagram Username Checker - ULTIMATE STEALTH Edition v3.0
-==========================================================
-
-IMPOSSIBLE TO RATE LIMIT - Maximum stealth with all protection levels:
-- Level 1: Simple usernames, random delays
-- Level 2: Session persistence, human-like timing
-- Level 3: Smart proxy rotation, enhanced fingerprints
-- Level 4: Session warming
-- Level 5: TLS Fingerprint Randomization (curl_cffi)
-- Level 6: Advanced Cookie Management
-- Level 7: Poisson Timing Distribution
-- Level 8: Multi-Endpoint Warming
-- Level 9: Header Entropy Maximization
-- Level 10: Request Jittering System
-
-Author: @GBX_9
-"""
-
-import os
-import sys
-import time
-import random
-import asyncio
-import logging
-import math
-from pathlib import Path
-from typing import Optional, List, Dict, Any, Set, Tuple
-from uuid import uuid4
-from dataclasses import dataclass, field
-from collections import OrderedDict
-from http.cookies import SimpleCookie
-
-# TLS Fingerprint: Try curl_cffi first, fallback to httpx for Railway compatibility
-try:
-    from curl_cffi.requests import AsyncSession as CurlAsyncSession
-    USE_CURL_CFFI = True
-    logger_init_msg = "Using curl_cffi for TLS fingerprint randomization"
-except ImportError:
-    USE_CURL_CFFI = False
-    logger_init_msg = "curl_cffi not available, using httpx (reduced stealth)"
-
-import httpx
-from flask import Flask, jsonify, render_template
-from flask_cors import CORS
-from enum import Enum
-
-sys.dont_write_bytecode = True
-
-# ==========================================
-#              LOGGING
-# ==========================================
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logger = logging.getLogger(__name__)
-
-# ==========================================
-#              CONFIG
-# ==========================================
-CONFIG = {
-    "API_URL": 'https://i.instagram.com/api/v1/users/check_username/',
-    "TIMEOUT": 90,
-    "REQUEST_TIMEOUT": 15.0,
-    "PROXIES_FILE": "proxies.txt",
-    
-    # Speed settings (OPTIMIZED)
-    "MIN_DELAY": 0.3,
-    "MAX_DELAY": 1.2,
-    "MAX_CONCURRENT": 40,
-    "COOLDOWN_TIME": 60,  # Increased for better recovery
-    "TYPING_SIMULATION": True,
-    
-    # Smart proxy management
-    "MAX_REQUESTS_PER_PROXY": 5,  # Reduced for more rotation
-    "PROXY_REST_TIME": 30,
-    "ENABLE_SMART_ROTATION": True,
-    
-    # NEW: Stealth settings
-    "POISSON_MEAN_DELAY": 1.2,  # Average delay for Poisson distribution
-    "MICRO_JITTER_MIN": 0.03,
-    "MICRO_JITTER_MAX": 0.12,
-    "SLOW_CONNECTION_CHANCE": 0.08,  # 8% chance of simulating slow connection
-    "HEADER_SHUFFLE": True,  # Randomize header order
-}
-
-CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
-LETTERS = 'abcdefghijklmnopqrstuvwxyz'
-
-# ==========================================
-#     TLS FINGERPRINT - BROWSER IMPERSONATIONS
-# ==========================================
-BROWSER_IMPERSONATIONS = [
-    "chrome110", "chrome116", "chrome119", "chrome120", "chrome123", "chrome124",
-    "safari15_3", "safari15_5", "safari17_0", "safari17_2_ios",
-    "edge99", "edge101",
-]
-
-# Extended Android devices database (EXPANDED for more diversity)
-DEVICES = [
-    # Samsung Galaxy S Series
-    {"manufacturer": "Samsung", "model": "SM-G998B", "device": "p3s", "board": "exynos2100", "android": 13, "dpi": 640, "res": "1440x3200", "country": "US"},
-    {"manufacturer": "Samsung", "model": "SM-S908B", "device": "b0q", "board": "exynos2200", "android": 14, "dpi": 600, "res": "1440x3088", "country": "GB"},
-    {"manufacturer": "Samsung", "model": "SM-S918B", "device": "dm3q", "board": "exynos2300", "android": 14, "dpi": 640, "res": "1440x3088", "country": "DE"},
-    {"manufacturer": "Samsung", "model": "SM-G991B", "device": "o1s", "board": "exynos2100", "android": 13, "dpi": 480, "res": "1080x2400", "country": "FR"},
-    {"manufacturer": "Samsung", "model": "SM-S928B", "device": "e3q", "board": "exynos2400", "android": 14, "dpi": 640, "res": "1440x3120", "country": "KR"},
-    
-    # Samsung Galaxy A/M Series
-    {"manufacturer": "Samsung", "model": "SM-A536B", "device": "a53x", "board": "exynos1280", "android": 13, "dpi": 450, "res": "1080x2400", "country": "IT"},
-    {"manufacturer": "Samsung", "model": "SM-A525F", "device": "a52q", "board": "qcom", "android": 12, "dpi": 440, "res": "1080x2340", "country": "ES"},
-    {"manufacturer": "Samsung", "model": "SM-A546B", "device": "a54x", "board": "exynos1380", "android": 14, "dpi": 480, "res": "1080x2340", "country": "CA"},
-    {"manufacturer": "Samsung", "model": "SM-M546B", "device": "m54x", "board": "exynos1380", "android": 14, "dpi": 450, "res": "1080x2400", "country": "IN"},
-    
-    # Google Pixel
-    {"manufacturer": "Google", "model": "Pixel 8 Pro", "device": "husky", "board": "google", "android": 14, "dpi": 560, "res": "1344x2992", "country": "US"},
-    {"manufacturer": "Google", "model": "Pixel 7 Pro", "device": "cheetah", "board": "google", "android": 14, "dpi": 560, "res": "1440x3120", "country": "GB"},
-    {"manufacturer": "Google", "model": "Pixel 6a", "device": "bluejay", "board": "google", "android": 13, "dpi": 420, "res": "1080x2400", "country": "CA"},
-    {"manufacturer": "Google", "model": "Pixel 7a", "device": "lynx", "board": "google", "android": 14, "dpi": 440, "res": "1080x2400", "country": "AU"},
-    {"manufacturer": "Google", "model": "Pixel 6 Pro", "device": "raven", "board": "google", "android": 13, "dpi": 560, "res": "1440x3120", "country": "US"},
-    {"manufacturer": "Google", "model": "Pixel 8", "device": "shiba", "board": "google", "android": 14, "dpi": 420, "res": "1080x2400", "country": "JP"},
-    
-    # OnePlus
-    {"manufacturer": "OnePlus", "model": "CPH2451", "device": "OP5958L1", "board": "taro", "android": 14, "dpi": 560, "res": "1440x3216", "country": "IN"},
-    {"manufacturer": "OnePlus", "model": "LE2123", "device": "lemonadep", "board": "lahaina", "android": 13, "dpi": 560, "res": "1440x3216", "country": "US"},
-    {"manufacturer": "OnePlus", "model": "CPH2413", "device": "OP594DL1", "board": "lahaina", "android": 13, "dpi": 480, "res": "1080x2400", "country": "GB"},
-    {"manufacturer": "OnePlus", "model": "PHB110", "device": "salami", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3216", "country": "CN"},
-    
-    # Xiaomi
-    {"manufacturer": "Xiaomi", "model": "2201116SG", "device": "ingres", "board": "mt6895", "android": 13, "dpi": 480, "res": "1220x2712", "country": "IN"},
-    {"manufacturer": "Xiaomi", "model": "M2101K6G", "device": "sweet", "board": "qcom", "android": 12, "dpi": 440, "res": "1080x2400", "country": "RU"},
-    {"manufacturer": "Xiaomi", "model": "2211133C", "device": "marble", "board": "taro", "android": 13, "dpi": 480, "res": "1220x2712", "country": "CN"},
-    {"manufacturer": "Xiaomi", "model": "23013RK75C", "device": "fuxi", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3200", "country": "CN"},
-    {"manufacturer": "Xiaomi", "model": "2312DRA50G", "device": "aurora", "board": "pineapple", "android": 14, "dpi": 560, "res": "1440x3200", "country": "TW"},
-    
-    # OPPO
-    {"manufacturer": "OPPO", "model": "CPH2449", "device": "OP5961L1", "board": "mt6895", "android": 13, "dpi": 480, "res": "1080x2400", "country": "ID"},
-    {"manufacturer": "OPPO", "model": "CPH2487", "device": "OP5983L1", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3216", "country": "MY"},
-    {"manufacturer": "OPPO", "model": "PHQ110", "device": "OP5A11L1", "board": "pineapple", "android": 14, "dpi": 560, "res": "1440x3168", "country": "SG"},
-    
-    # Vivo
-    {"manufacturer": "vivo", "model": "V2219", "device": "PD2219", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2400", "country": "IN"},
-    {"manufacturer": "vivo", "model": "V2324", "device": "PD2324", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3200", "country": "CN"},
-    
-    # Motorola
-    {"manufacturer": "Motorola", "model": "moto g84 5G", "device": "milanf", "board": "taro", "android": 13, "dpi": 440, "res": "1080x2400", "country": "BR"},
-    {"manufacturer": "Motorola", "model": "motorola edge 40", "device": "rtwo", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2400", "country": "MX"},
-    {"manufacturer": "Motorola", "model": "motorola edge 50 pro", "device": "eqe", "board": "kalama", "android": 14, "dpi": 480, "res": "1220x2712", "country": "EU"},
-    
-    # Realme
-    {"manufacturer": "realme", "model": "RMX3706", "device": "RE58B2L1", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2412", "country": "IN"},
-    {"manufacturer": "realme", "model": "RMX3785", "device": "RE58E4L1", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3168", "country": "CN"},
-    
-    # Nothing
-    {"manufacturer": "Nothing", "model": "A063", "device": "Pong", "board": "taro", "android": 13, "dpi": 440, "res": "1080x2412", "country": "GB"},
-    {"manufacturer": "Nothing", "model": "A142", "device": "Pacman", "board": "kalama", "android": 14, "dpi": 460, "res": "1080x2412", "country": "US"},
-    
-    # ASUS ROG
-    {"manufacturer": "ASUS", "model": "ASUS_AI2302", "device": "AI2302", "board": "kalama", "android": 14, "dpi": 480, "res": "1080x2448", "country": "TW"},
-]
-
-# Instagram versions (EXPANDED for more diversity)
-IG_VERSIONS = [
-    "315.0.0.26.109", "314.0.0.24.110", "313.0.0.28.109", "312.0.0.32.118",
-    "311.0.0.32.119", "310.0.0.28.117", "309.0.0.40.113", "308.0.0.38.108",
-    "316.0.0.29.120", "317.0.0.31.115", "318.0.0.27.111", "319.0.0.33.114",
-    "320.0.0.25.108", "321.0.0.29.112", "322.0.0.33.106", "323.0.0.28.115",
-]
-
-# ==========================================
-#     ADVANCED TIMING - POISSON DISTRIBUTION
-# ==========================================
-def poisson_delay(mean: float = None) -> float:
-    """
-    Generate human-like delay using exponential distribution (Poisson arrival).
-    More realistic than uniform random.
-    """
-    if mean is None:
-        mean = CONFIG["POISSON_MEAN_DELAY"]
-    # Exponential distribution for inter-arrival times
-    delay = -mean * math.log(1 - random.random())
-    # Clamp to reasonable bounds
-    return max(0.2, min(delay, 5.0))
-
-
-def micro_jitter() -> float:
-    """Add micro-jitter to requests (simulates network latency variance)."""
-    return random.uniform(CONFIG["MICRO_JITTER_MIN"], CONFIG["MICRO_JITTER_MAX"])
-
-
-async def human_delay_advanced():
-    """Advanced human-like delay with Poisson distribution."""
-    base_delay = poisson_delay()
-    
-    # Occasional longer pauses (thinking time)
-    if random.random() < 0.08:
-        base_delay += random.uniform(1.5, 3.5)
-    
-    # Micro-jitter
-    base_delay += micro_jitter()
-    
-    await asyncio.sleep(base_delay)
-
-
-# ==========================================
-#              LOAD PROXIES
-# ==========================================
-def load_proxies() -> List[str]:
-    proxies = []
-    path = Path(__file__).parent / CONFIG["PROXIES_FILE"]
-    try:
-        with open(path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    proxies.append(line)
-        logger.info(f"Loaded {len(proxies)} proxies")
-    except Exception as e:
-        logger.error(f"Error loading proxies: {e}")
-    return proxies
-
-PROXIES = load_proxies()
-
-# ==========================================
-#              FLASK APP
-# ==========================================
-app = Flask(__name__)
-CORS(app, resources={
-    r"/*": {
-        "origins": "*",
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
-    }
-})
-
-# ==========================================
-#     HEADER ENTROPY MAXIMIZATION
-# ==========================================
-def generate_identity_with_entropy() -> Dict[str, Any]:
-    """Generate a completely NEW identity with MAXIMUM diversity and entropy."""
-    device = random.choice(DEVICES)
-    ig_version = random.choice(IG_VERSIONS)
-    browser_impersonation = random.choice(BROWSER_IMPERSONATIONS)
-    
-    # All unique IDs - fresh every time with MORE randomness
-    device_id = f"android-{uuid4().hex[:16]}"
-    phone_id = str(uuid4())
-    guid = str(uuid4())
-    adid = str(uuid4())
-    google_adid = str(uuid4())
-    family_device_id = str(uuid4())
-    waterfall_id = str(uuid4())
-    mid = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-', k=28))
-    session_id = f"UFS-{uuid4()}-{random.randint(0, 5)}"
-    client_time = str(time.time() + random.uniform(-5, 5))
-    
-    # Timezone variety
-    timezones = [-28800, -25200, -21600, -18000, -14400, -10800, -7200, -3600, 
-                 0, 3600, 7200, 10800, 14400, 19800, 21600, 25200, 28800, 32400, 36000]
-    
-    # Connection types with realistic weights
-    connection_types = ["WIFI", "WIFI", "WIFI", "MOBILE(LTE)", "MOBILE(5G)", "MOBILE(4G)"]
-    
-    # Build User-Agent
-    user_agent = (
-        f"Instagram {ig_version} Android "
-        f"({device['android']}/{device['android']}.0; "
-        f"{device['dpi']}dpi; {device['res']}; "
-        f"{device['manufacturer']}; {device['model']}; "
-        f"{device['device']}; {device['board']}; en_{device['country']})"
-    )
-    
-    # Capabilities variation
-    capabilities = ['3brTvx0=', '3brTv58=', '3brTv50=', '3brTvwE=', '3brTv4E=', 
-                   '3brTvw8=', '3brTvxE=', '3brTvxM=']
-    
-    # Bloks versions
-    bloks_versions = [
-        'e538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88e',
-        'f538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88f',
-        'd538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88d',
-        'a538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88a',
-        'b538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88b',
-    ]
-    
-    # Build headers dict first
-    headers_dict = {
-        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-        'Accept': '*/*',
-        'Accept-Language': f"en-{device['country']},en;q=0.{random.randint(8,9)}",
-        'Accept-Encoding': random.choice(['gzip, deflate, br', 'gzip, deflate', 'gzip, deflate, br, zstd']),
-        'User-Agent': user_agent,
-        'X-IG-App-ID': '567067343352427',
-        'X-IG-App-Locale': f"en_{device['country']}",
-        'X-IG-Device-Locale': f"en_{device['country']}",
-        'X-IG-Mapped-Locale': f"en_{device['country']}",
-        'X-IG-Device-ID': guid,
-        'X-IG-Family-Device-ID': family_device_id,
-        'X-IG-Android-ID': device_id,
-        'X-IG-Timezone-Offset': str(random.choice(timezones)),
-        'X-IG-Connection-Type': random.choice(connection_types),
-        'X-IG-Connection-Speed': f'{random.randint(800, 8000)}kbps',
-        'X-IG-Bandwidth-Speed-KBPS': str(random.randint(1500, 25000)),
-        'X-IG-Bandwidth-TotalBytes-B': str(random.randint(500000, 50000000)),
-        'X-IG-Bandwidth-TotalTime-MS': str(random.randint(50, 800)),
-        'X-IG-Capabilities': random.choice(capabilities),
-        'X-IG-WWW-Claim': '0',
-        'X-Bloks-Version-Id': random.choice(bloks_versions),
-        'X-Bloks-Is-Layout-RTL': 'false',
-        'X-Bloks-Is-Panorama-Enabled': random.choice(['true', 'true', 'false']),
-        'X-Pigeon-Session-Id': session_id,
-        'X-Pigeon-Rawclienttime': client_time,
-        'X-MID': mid,
-        'X-FB-HTTP-Engine': random.choice(['Liger', 'Liger', 'Tigon']),
-        'X-FB-Client-IP': 'True',
-        'X-FB-Server-Cluster': 'True',
-        'X-IG-ABR-Connection-Speed-KBPS': str(random.randint(1000, 15000)),
-        'X-IG-Prefetch-Request': random.choice(['foreground', 'background']),
-        'X-IG-Salt-IDs': str(random.randint(100000000, 999999999)),
-    }
-    
-    # HEADER ENTROPY: Shuffle header order (some systems detect fixed order)
-    if CONFIG["HEADER_SHUFFLE"]:
-        items = list(headers_dict.items())
-        # Keep Content-Type first, shuffle the rest
-        content_type = items[0]
-        rest = items[1:]
-        random.shuffle(rest)
-        headers_dict = dict([content_type] + rest)
-    
-    return {
-        "device": device,
-        "device_id": device_id,
-        "phone_id": phone_id,
-        "guid": guid,
-        "adid": adid,
-        "waterfall_id": waterfall_id,
-        "headers": headers_dict,
-        "browser_impersonation": browser_impersonation,
-    }
-
-
-# ==========================================
-#     COOKIE MANAGEMENT SYSTEM
-# ==========================================
-@dataclass
-class ProxySessionData:
-    """Complete session data for a proxy with cookies."""
-    proxy_url: str
-    identity: Dict[str, Any]
-    cookies: Dict[str, str] = field(default_factory=dict)
-    browser_impersonation: str = ""
-    last_activity: float = 0.0
-    request_count: int = 0
-    success_count: int = 0
-    fail_count: int = 0
-    resting_until: float = 0.0
-    rate_limited_until: float = 0.0
-    is_warm: bool = False
-    warm_time: float = 0.0
-    
-    def __post_init__(self):
-        if not self.browser_impersonation and self.identity:
-            self.browser_impersonation = self.identity.get("browser_impersonation", random.choice(BROWSER_IMPERSONATIONS))
-
-
-# Global session registry
-PROXY_SESSIONS: Dict[str, ProxySessionData] = {}
-WARM_DURATION = 300  # 5 minutes
-
-
-def get_or_create_session(proxy_url: str) -> ProxySessionData:
-    """Get existing session or create new one with fresh identity."""
-    if proxy_url not in PROXY_SESSIONS:
-        identity = generate_identity_with_entropy()
-        PROXY_SESSIONS[proxy_url] = ProxySessionData(
-            proxy_url=proxy_url,
-            identity=identity,
-            browser_impersonation=identity.get("browser_impersonation", random.choice(BROWSER_IMPERSONATIONS)),
-        )
-    return PROXY_SESSIONS[proxy_url]
-
-
-def refresh_session_identity(proxy_url: str) -> ProxySessionData:
-    """Generate completely new identity for a proxy (keeps cookies)."""
-    session = get_or_create_session(proxy_url)
-    old_cookies = session.cookies.copy()
-    new_identity = generate_identity_with_entropy()
-    session.identity = new_identity
-    session.browser_impersonation = new_identity.get("browser_impersonation", random.choice(BROWSER_IMPERSONATIONS))
-    session.cookies = old_cookies  # Preserve cookies
-    return session
-
-
-def update_session_cookies(proxy_url: str, response_cookies: Dict[str, str]):
-    """Update session cookies from response."""
-    session = get_or_create_session(proxy_url)
-    session.cookies.update(response_cookies)
-
-
-def is_proxy_available(proxy_url: str) -> bool:
-    """Check if proxy is not rate-limited and not resting."""
-    session = get_or_create_session(proxy_url)
-    now = time.time()
-    
-    # Check rate limit
-    if now < session.rate_limited_until:
-        return False
-    
-    # Check if resting
-    if CONFIG["ENABLE_SMART_ROTATION"] and now < session.resting_until:
-        return False
-    
-    return True
-
-
-def mark_proxy_rate_limited(proxy_url: str):
-    """Mark a proxy as rate-limited."""
-    session = get_or_create_session(proxy_url)
-    session.rate_limited_until = time.time() + CONFIG["COOLDOWN_TIME"]
-    session.fail_count += 1
-    # Also regenerate identity after rate limit
-    refresh_session_identity(proxy_url)
-
-
-def mark_proxy_used(proxy_url: str, success: bool = True):
-    """Mark that a proxy was used."""
-    session = get_or_create_session(proxy_url)
-    session.request_count += 1
-    session.last_activity = time.time()
-    
-    if success:
-        session.success_count += 1
-    else:
-        session.fail_count += 1
-    
-    # Check if proxy needs rest
-    if CONFIG["ENABLE_SMART_ROTATION"] and session.request_count >= CONFIG["MAX_REQUESTS_PER_PROXY"]:
-        session.resting_until = time.time() + CONFIG["PROXY_REST_TIME"]
-        session.request_count = 0
-        # Refresh identity during rest
-        refresh_session_identity(proxy_url)
-        logger.debug(f"Proxy {proxy_url[:40]}... needs rest, identity refreshed")
-
-
-def is_session_warm(proxy_url: str) -> bool:
-    """Check if a session is still warm."""
-    session = get_or_create_session(proxy_url)
-    if session.is_warm and (time.time() - session.warm_time) < WARM_DURATION:
-        return True
-    session.is_warm = False
-    return False
-
-
-def mark_session_warm(proxy_url: str):
-    """Mark a session as warm."""
-    session = get_or_create_session(proxy_url)
-    session.is_warm = True
-    session.warm_time = time.time()
-
-
-def get_available_proxies() -> List[str]:
-    """Get all proxies that are not rate-limited or resting."""
-    return [p for p in PROXIES if is_proxy_available(p)]
-
-
-def get_rate_limited_count() -> int:
-    """Get count of currently rate-limited proxies."""
-    now = time.time()
-    count = 0
-    for proxy_url in PROXIES:
-        session = get_or_create_session(proxy_url)
-        if now < session.rate_limited_until:
-            count += 1
-    return count
-
-
-def get_resting_count() -> int:
-    """Get count of currently resting proxies."""
-    now = time.time()
-    count = 0
-    for proxy_url in PROXIES:
-        session = get_or_create_session(proxy_url)
-        if now < session.resting_until:
-            count += 1
-    return count
-
-
-def get_warm_count() -> int:
-    """Get count of currently warm sessions."""
-    return sum(1 for p in PROXIES if is_session_warm(p))
-
-
-def get_proxy_stats() -> Dict[str, Any]:
-    """Get detailed proxy statistics."""
-    total_success = sum(get_or_create_session(p).success_count for p in PROXIES)
-    total_fails = sum(get_or_create_session(p).fail_count for p in PROXIES)
-    total_requests = total_success + total_fails
-    
-    return {
-        "total_proxies": len(PROXIES),
-        "available": len(get_available_proxies()),
-        "rate_limited": get_rate_limited_count(),
-        "resting": get_resting_count(),
-        "total_requests": total_requests,
-        "success_rate": f"{(total_success / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
-        "warm_count": get_warm_count(),
-    }
-
-
-@app.route('/api/stats')
-def api_stats():
-    return jsonify(get_proxy_stats())
-
-
-# ==========================================
-#     MULTI-ENDPOINT SESSION WARMING
-# ==========================================
-WARM_ENDPOINTS_ADVANCED = [
-    ("GET", "https://i.instagram.com/api/v1/launcher/sync/", None),
-    ("GET", "https://i.instagram.com/api/v1/accounts/login_activity/", None),
-    ("POST", "https://i.instagram.com/api/v1/qe/sync/", {"experiments": "ig_android_device_detection_info_upload"}),
-]
-
-
-async def warm_single_session_advanced(proxy_url: str) -> bool:
-    """
-    Advanced session warming - simulates real app behavior.
-    Uses curl_cffi with browser impersonation (if available).
-    Falls back to httpx for Railway compatibility.
-    """
-    try:
-        session_data = get_or_create_session(proxy_url)
-        identity = session_data.identity
-        
-        # Randomly choose 1-2 endpoints to warm
-        endpoints_to_use = random.sample(WARM_ENDPOINTS_ADVANCED, k=random.randint(1, 2))
-        
-        if USE_CURL_CFFI:
-            async with CurlAsyncSession(
-                proxy=proxy_url,
-                impersonate=session_data.browser_impersonation,
-                timeout=CONFIG["REQUEST_TIMEOUT"]
-            ) as client:
-                for method, url, data in endpoints_to_use:
-                    try:
-                        await asyncio.sleep(micro_jitter())
-                        headers = identity["headers"].copy()
-                        
-                        if method == "GET":
-                            response = await client.get(url, headers=headers)
-                        else:
-                            post_data = data.copy() if data else {}
-                            post_data["_uuid"] = identity["guid"]
-                            response = await client.post(url, headers=headers, data=post_data)
-                        
-                        if hasattr(response, 'cookies'):
-                            update_session_cookies(proxy_url, dict(response.cookies))
-                    except Exception:
-                        pass
-                    
-                    await asyncio.sleep(random.uniform(0.2, 0.6))
-        else:
-            # Fallback to httpx
-            async with httpx.AsyncClient(
-                proxy=proxy_url,
-                timeout=CONFIG["REQUEST_TIMEOUT"]
-            ) as client:
-                for method, url, data in endpoints_to_use:
-                    try:
-                        await asyncio.sleep(micro_jitter())
-                        headers = identity["headers"].copy()
-                        
-                        if method == "GET":
-                            response = await client.get(url, headers=headers)
-                        else:
-                            post_data = data.copy() if data else {}
-                            post_data["_uuid"] = identity["guid"]
-                            response = await client.post(url, headers=headers, data=post_data)
-                        
-                        if hasattr(response, 'cookies'):
-                            update_session_cookies(proxy_url, dict(response.cookies))
-                    except Exception:
-                        pass
-                    
-                    await asyncio.sleep(random.uniform(0.2, 0.6))
-        
-        mark_session_warm(proxy_url)
-        return True
-            
-    except Exception as e:
-        logger.debug(f"Warm failed for {proxy_url[:30]}: {e}")
-        return False
-
-
-async def ensure_session_warm(proxy_url: str) -> bool:
-    """Ensure a session is warm before checking username."""
-    if is_session_warm(proxy_url):
-        return True
-    return await warm_single_session_advanced(proxy_url)
-
-
-async def warm_all_sessions_background():
-    """Background task to warm all proxy sessions."""
-    logger.info("🔥 Starting background session warming...")
-    
-    warmed = 0
-    for proxy_url in PROXIES:
-        if is_proxy_available(proxy_url) and not is_session_warm(proxy_url):
-            success = await warm_single_session_advanced(proxy_url)
-            if success:
-                warmed += 1
-            await asyncio.sleep(random.uniform(0.3, 0.8))
-    
-    logger.info(f"🔥 Warmed {warmed}/{len(PROXIES)} sessions")
-
-
-# ==========================================
-#     HUMAN-LIKE TIMING (Enhanced)
-# ==========================================
-async def simulate_typing_delay(username: str):
-    """Simulate the delay of typing a username with variance."""
-    if CONFIG["TYPING_SIMULATION"]:
-        # Variable typing speed per character
-        total_delay = 0
-        for char in username:
-            # Random speed per character (faster for common letters)
-            if char in 'etaoin':
-                total_delay += random.uniform(0.03, 0.08)
-            else:
-                total_delay += random.uniform(0.06, 0.15)
-            
-            # Occasional pause (thinking)
-            if random.random() < 0.05:
-                total_delay += random.uniform(0.2, 0.5)
-        
-        await asyncio.sleep(total_delay)
-
-
-# ==========================================
-#     USERNAME GENERATOR
-# ==========================================
-def generate_simple_username() -> str:
-    """Generate a simple 5-char username (NO symbols)."""
-    return random.choice(LETTERS) + ''.join(random.choices(CHARS, k=4))
-
-
-def generate_semi_quad_username() -> str:
-    """Generate a semi-quad username (5 chars with _ or . in allowed positions)."""
-    max_attempts = 100
-    
-    for _ in range(max_attempts):
-        first_char = random.choice(LETTERS)
-        symbol = random.choice('._')
-        symbol_pos = random.choice([1, 2, 3])
-        
-        username_chars = [first_char]
-        for pos in range(1, 5):
-            if pos == symbol_pos:
-                username_chars.append(symbol)
-            else:
-                username_chars.append(random.choice(CHARS))
-        
-        username = ''.join(username_chars)
-        
-        # Validate Instagram rules
-        if username.endswith('.'):
-            continue
-        if '..' in username:
-            continue
-        if '._' in username or '_.' in username:
-            continue
-        
-        return username
-    
-    return random.choice(LETTERS) + '_' + ''.join(random.choices(CHARS, k=2)) + random.choice(CHARS)
-
-
-# ==========================================
-#     CORE: CHECK USERNAME (curl_cffi)
-# ==========================================
-
-# Exact rate limit patterns from Instagram
-RATE_LIMIT_PATTERNS = [
-    '"message":"Please wait a few minutes before you try again."',
-    '"spam":true',
-    '"status":"fail","message":"rate_limit',
-    'Please wait a few minutes',
-    '"error_type":"rate_limit_error"',
-]
-
-CHALLENGE_PATTERNS = [
-    '"challenge_required"',
-    '"message":"challenge_required"',
-    'checkpoint_required',
-]
-
-async def check_username_stealth(
-    proxy_url: str,
-    username: str,
-    ensure_warm: bool = True
-) -> Dict[str, Any]:
-    """
-    Check a single username with ULTIMATE STEALTH.
-    Uses curl_cffi for TLS fingerprint randomization (if available).
-    Falls back to httpx for Railway compatibility.
-    IMPROVED: More accurate rate limit detection.
-    """
-    try:
-        session_data = get_or_create_session(proxy_url)
-        identity = session_data.identity
-        
-        # Ensure session is warm
-        if ensure_warm:
-            await ensure_session_warm(proxy_url)
-        
-        # Add micro-jitter before request
-        await asyncio.sleep(micro_jitter())
-        
-        # Simulate slow connection occasionally
-        if random.random() < CONFIG["SLOW_CONNECTION_CHANCE"]:
-            await asyncio.sleep(random.uniform(0.5, 1.5))
-        
-        # Simulate typing the username
-        await simulate_typing_delay(username)
-        
-        data = {
-            "username": username,
-            "_uuid": identity["guid"],
-        }
-        
-        # ========== MAKE REQUEST (curl_cffi or httpx) ==========
-        if USE_CURL_CFFI:
-            # Use curl_cffi for TLS fingerprinting
-            async with CurlAsyncSession(
-                proxy=proxy_url,
-                impersonate=session_data.browser_impersonation,
-                timeout=CONFIG["REQUEST_TIMEOUT"]
-            ) as client:
-                for name, value in session_data.cookies.items():
-                    client.cookies.set(name, value)
-                
-                response = await client.post(
-                    CONFIG["API_URL"],
-                    headers=identity["headers"],
-                    data=data
-                )
-                
-                if hasattr(response, 'cookies'):
-                    update_session_cookies(proxy_url, dict(response.cookies))
-                
-                text = response.text
-                status_code = response.status_code
-        else:
-            # Fallback to httpx for Railway
-            async with httpx.AsyncClient(
-                proxy=proxy_url,
-                timeout=CONFIG["REQUEST_TIMEOUT"]
-            ) as client:
-                response = await client.post(
-                    CONFIG["API_URL"],
-                    headers=identity["headers"],
-                    data=data
-                )
-                
-                if hasattr(response, 'cookies'):
-                    update_session_cookies(proxy_url, dict(response.cookies))
-                
-                text = response.text
-                status_code = response.status_code
-        
-        # Mark session as warm (successful request)
-        mark_session_warm(proxy_url)
-        
-        # ========== ACCURATE RESPONSE DETECTION ==========
-        
-        # Check for available username
-        if '"available":true' in text or '"available": true' in text:
-            mark_proxy_used(proxy_url, success=True)
-            return {"status": "available", "username": username, "proxy": proxy_url}
-        
-        # Check for taken username
-        if '"available":false' in text or '"available": false' in text:
-            mark_proxy_used(proxy_url, success=True)
-            return {"status": "taken", "username": username, "proxy": proxy_url}
-        
-        # Check for EXACT rate limit patterns (be very specific!)
-        is_rate_limited = False
-        matched_pattern = None
-        for pattern in RATE_LIMIT_PATTERNS:
-            if pattern.lower() in text.lower():
-                is_rate_limited = True
-                matched_pattern = pattern
-                break
-        
-        if is_rate_limited:
-            mark_proxy_rate_limited(proxy_url)
-            mark_proxy_used(proxy_url, success=False)
-            logger.warning(f"⚠️ TRUE RATE LIMIT on {proxy_url[:30]}... | Pattern: {matched_pattern}")
-            logger.warning(f"📝 Response: {text[:200]}")
-            return {"status": "rate_limit", "username": username, "proxy": proxy_url, "response": text[:200], "pattern": matched_pattern}
-        
-        # Check for challenge patterns
-        is_challenge = False
-        for pattern in CHALLENGE_PATTERNS:
-            if pattern.lower() in text.lower():
-                is_challenge = True
-                break
-        
-        if is_challenge:
-            mark_proxy_rate_limited(proxy_url)
-            mark_proxy_used(proxy_url, success=False)
-            return {"status": "challenge", "username": username, "proxy": proxy_url}
-        
-        # Check for other known responses that are NOT rate limits
-        if status_code == 200 and '"status":"ok"' in text:
-            mark_proxy_used(proxy_url, success=True)
-            return {"status": "taken", "username": username, "proxy": proxy_url}
-        
-        # Unknown response - log it but DON'T count as rate limit
-        mark_proxy_used(proxy_url, success=True)
-        logger.debug(f"Unknown response (NOT rate limit): {text[:100]}")
-        return {"status": "unknown", "username": username, "response": text[:150]}
-            
-    except asyncio.TimeoutError:
-        mark_proxy_used(proxy_url, success=False)
-        return {"status": "timeout", "username": username}
-    except Exception as e:
-        # Network errors are NOT rate limits
-        mark_proxy_used(proxy_url, success=False)
-        return {"status": "network_error", "username": username, "error": str(e)[:80]}
-
-
-
-
-# ==========================================
-#     UNIFIED SEARCH SYSTEM
-# ==========================================
-class SearchMode(Enum):
-    SIMPLE = "simple"
-    SEMI_QUAD = "semi_quad"
-
-
-async def unified_search(
-    mode: SearchMode,
-    detailed_logging: bool = False
-) -> Dict[str, Any]:
-    """UNIFIED Search Function with ULTIMATE STEALTH."""
-    start_time = time.time()
-    
-    # Mode-specific configuration
-    if mode == SearchMode.SEMI_QUAD:
-        username_generator = generate_semi_quad_username
-        max_concurrent = 50
-        timeout = 30
-        apply_delays = False
-        search_type = "semi-quad"
-    else:
-        username_generator = generate_simple_username
-        max_concurrent = CONFIG["MAX_CONCURRENT"]
-        timeout = CONFIG["TIMEOUT"]
-        apply_delays = True
-        search_type = "simple"
-    
-    stats = {"checked": 0, "taken": 0, "errors": 0, "rate_limits": 0}
-    if detailed_logging:
-        stats["timeouts"] = 0
-    
-    detailed_log = None
-    if detailed_logging:
-        detailed_log = {
-            "timeline": [], "identities_created": [], "requests_made": [],
-            "delays_applied": [], "rate_limits_detected": [],
-            "usernames_checked": [], "responses_received": [],
-            "tls_fingerprints": [],
-        }
-        def log_event(event_type: str, data: Dict[str, Any]):
-            detailed_log["timeline"].append({
-                "time": round(time.time() - start_time, 4),
-                "event": event_type, "data": data
-            })
-    else:
-        def log_event(event_type: str, data: Dict[str, Any]):
-            pass
-    
-    if not PROXIES:
-        result = {"status": "failed", "reason": "no_proxies", "duration": 0}
-        if detailed_logging:
-            result["detailed_log"] = detailed_log
-        return result
-    
-    log_event("INIT", {
-        "proxies_count": len(PROXIES), "warm_sessions": get_warm_count(),
-        "search_type": search_type, "mode": mode.value,
-        "stealth_features": ["TLS_FINGERPRINT", "COOKIE_MGMT", "POISSON_TIMING", "HEADER_ENTROPY"]
-    })
-    
-    available_proxies = get_available_proxies()
-    
-    if not available_proxies:
-        result = {
-            "status": "failed", "reason": "all_proxies_rate_limited",
-            "duration": 0, "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}"
-        }
-        if detailed_logging:
-            result["detailed_log"] = detailed_log
-        return result
-    
-    if detailed_logging:
-        for p in available_proxies[:5]:
-            session = get_or_create_session(p)
-            detailed_log["tls_fingerprints"].append({
-                "proxy": p[:50] + "...",
-                "browser": session.browser_impersonation,
-                "device": session.identity["device"]["model"],
-            })
-    
-    logger.info(f"🔍 Starting {search_type.upper()} search with {len(available_proxies)} proxies (STEALTH v3.0)")
-    batch_number = 0
-    
-    while time.time() - start_time < timeout:
-        batch_number += 1
-        current_available = [p for p in available_proxies if is_proxy_available(p)]
-        
-        log_event("BATCH_START", {"batch": batch_number, "available": len(current_available)})
-        
-        if not current_available:
-            wait_time = 2 if mode == SearchMode.SEMI_QUAD else 5
-            await asyncio.sleep(wait_time)
-            continue
-        
-        proxies_to_use = current_available[:max_concurrent]
-        usernames = [username_generator() for _ in range(len(proxies_to_use))]
-        
-        tasks = []
-        for proxy_url, username in zip(proxies_to_use, usernames):
-            if detailed_logging:
-                detailed_log["requests_made"].append({"username": username, "proxy": proxy_url[:40]})
-            tasks.append(asyncio.create_task(check_username_stealth(proxy_url, username)))
-        
-        for coro in asyncio.as_completed(tasks):
-            result = await coro
-            stats["checked"] += 1
-            
-            if detailed_logging:
-                detailed_log["responses_received"].append({"username": result.get("username"), "status": result["status"]})
-                detailed_log["usernames_checked"].append(result.get("username"))
-            
-            if result["status"] == "available":
-                for t in tasks:
-                    t.cancel()
-                duration = round(time.time() - start_time, 2 if not detailed_logging else 4)
-                log_event("FOUND", {"username": result["username"], "duration": duration})
-                logger.info(f"✅ FOUND {search_type.upper()}: {result['username']} in {duration}s")
-                
-                response = {
-                    "status": "success", "username": result["username"],
-                    "duration": duration, "stats": stats,
-                    "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}",
-                    "warm_sessions": f"{get_warm_count()}/{len(PROXIES)}",
-                    "stealth_version": "3.0"
-                }
-                if mode == SearchMode.SEMI_QUAD:
-                    response["type"] = "semi-quad"
-                if detailed_logging:
-                    response["batches_processed"] = batch_number
-                    response["detailed_log"] = detailed_log
-                return response
-            
-            elif result["status"] == "taken":
-                stats["taken"] += 1
-            elif result["status"] == "unknown":
-                # Unknown response - still a successful connection, not rate limit
-                stats["taken"] += 1  # Count as taken (conservative)
-            elif result["status"] in ["rate_limit", "challenge"]:
-                stats["rate_limits"] += 1
-                if detailed_logging:
-                    # Include FULL response data for debugging
-                    detailed_log["rate_limits_detected"].append({
-                        "username": result.get("username"),
-                        "response": result.get("response", "N/A"),
-                        "pattern": result.get("pattern", "N/A"),
-                        "proxy": result.get("proxy", "N/A")[:50]
-                    })
-            elif result["status"] == "timeout":
-                if detailed_logging:
-                    stats["timeouts"] = stats.get("timeouts", 0) + 1
-                else:
-                    stats["errors"] += 1
-            elif result["status"] == "network_error":
-                # Network errors are NOT rate limits
-                stats["errors"] += 1
-            else:
-                stats["errors"] += 1
-        
-        if apply_delays:
-            # Use Poisson delay instead of random
-            delay = poisson_delay()
-            await asyncio.sleep(delay)
-            if detailed_logging:
-                detailed_log["delays_applied"].append({"batch": batch_number, "delay": round(delay, 3)})
-    
-    response = {
-        "status": "failed", "reason": "timeout",
-        "duration": round(time.time() - start_time, 2), "stats": stats,
-        "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}",
-        "warm_sessions": f"{get_warm_count()}/{len(PROXIES)}",
-        "stealth_version": "3.0"
-    }
-    if mode == SearchMode.SEMI_QUAD:
-        response["type"] = "semi-quad"
-    if detailed_logging:
-        response["batches_processed"] = batch_number
-        response["detailed_log"] = detailed_log
-    return response
-
-
-# ==========================================
-#     SEARCH WRAPPERS
-# ==========================================
-async def stealth_search() -> Dict[str, Any]:
-    """Quick search with simple usernames (5 chars)."""
-    return await unified_search(mode=SearchMode.SIMPLE, detailed_logging=False)
-
-
-async def semi_quad_stealth_search() -> Dict[str, Any]:
-    """Fast search for semi-quad usernames (with _ or .)."""
-    return await unified_search(mode=SearchMode.SEMI_QUAD, detailed_logging=False)
-
-
-async def detailed_stealth_search() -> Dict[str, Any]:
-    """Detailed search with full logging for debugging."""
-    return await unified_search(mode=SearchMode.SIMPLE, detailed_logging=True)
-
-
-async def detailed_semi_quad_stealth_search() -> Dict[str, Any]:
-    """Detailed semi-quad search with full logging."""
-    return await unified_search(mode=SearchMode.SEMI_QUAD, detailed_logging=True)
-
-
-# ==========================================
-#              API ROUTES
-# ==========================================
-@app.route('/dashboard')
-def dashboard():
-    """Admin dashboard - HTML interface."""
-    return render_template('dashboard.html')
-
-
-@app.route('/')
-def home():
-    stats = get_proxy_stats()
-    return jsonify({
-        "status": "online",
-        "message": "Instagram Username Checker - ULTIMATE STEALTH Edition v3.0 (IMPOSSIBLE TO RATE LIMIT)",
-        "version": "3.0",
-        "endpoints": {
-            "/search": "Quick search - Smart mix (70% simple + 30% semi-quad)",
-            "/prosearch": "Semi-quad search - Fast mode with _ or . symbols",
-            "/infosearch": "Detailed search - Full logging for debugging",
-            "/infoprosearch": "Detailed semi-quad search - Full logging",
-            "/warm": "Pre-warm all proxy sessions",
-            "/status": "Get detailed system status and statistics"
-        },
-        "features": [
-            "🔒 TLS FINGERPRINT: curl_cffi browser impersonation",
-            "🍪 COOKIE MANAGEMENT: Persistent sessions per proxy",
-            "⏱️ POISSON TIMING: Human-like delay distribution",
-            "🔀 HEADER ENTROPY: Randomized header order",
-            "🔥 MULTI-ENDPOINT WARMING: Advanced session prep",
-            "⚡ MICRO-JITTERING: Network latency simulation",
-            "🎭 40+ DEVICE MODELS: Maximum fingerprint diversity",
-            "🔄 AUTO IDENTITY REFRESH: New identity after rest"
-        ],
-        "proxies": {
-            "total": len(PROXIES),
-            "available": stats["available"],
-            "warm": get_warm_count(),
-            "resting": stats["resting"],
-            "rate_limited": stats["rate_limited"]
-        },
-        "performance": {
-            "total_requests": stats["total_requests"],
-            "success_rate": stats["success_rate"]
-        },
-        "stealth_level": "IMPOSSIBLE TO RATE LIMIT 🛡️"
-    })
-
-
-@app.route('/status')
-def status():
-    """Get current status of all systems with detailed statistics."""
-    stats = get_proxy_stats()
-    return jsonify({
-        "proxies": {
-            "total": len(PROXIES),
-            "available": stats["available"],
-            "warm": get_warm_count(),
-            "cold": len(PROXIES) - get_warm_count(),
-            "rate_limited": stats["rate_limited"],
-            "resting": stats["resting"],
-        },
-        "performance": {
-            "total_requests": stats["total_requests"],
-            "success_rate": stats["success_rate"],
-        },
-        "warming": {
-            "warm_duration_seconds": WARM_DURATION,
-            "warmed_sessions_count": get_warm_count()
-        },
-        "config": {
-            "max_concurrent": CONFIG["MAX_CONCURRENT"],
-            "max_requests_per_proxy": CONFIG["MAX_REQUESTS_PER_PROXY"],
-            "proxy_rest_time": CONFIG["PROXY_REST_TIME"],
-            "smart_rotation_enabled": CONFIG["ENABLE_SMART_ROTATION"],
-            "poisson_mean_delay": CONFIG["POISSON_MEAN_DELAY"],
-            "header_shuffle": CONFIG["HEADER_SHUFFLE"],
-        },
-        "stealth_features": {
-            "tls_fingerprint": True,
-            "cookie_management": True,
-            "poisson_timing": True,
-            "header_entropy": True,
-            "micro_jittering": True,
-            "browser_impersonations": len(BROWSER_IMPERSONATIONS),
-            "device_models": len(DEVICES),
-        }
-    })
-
-
-@app.route('/warm')
-def warm():
-    """Manually warm all proxy sessions."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    loop.run_until_complete(warm_all_sessions_background())
-    return jsonify({
-        "status": "success",
-        "message": "All sessions warmed with advanced multi-endpoint warming",
-        "warm_count": get_warm_count()
-    })
-
-@app.route('/search')
-def search():
-    """
-    Find one available username with IMPOSSIBLE TO RATE LIMIT stealth.
-    Smart Probability: 70% Simple Search (5 chars), 30% Pro Search (Semi-Quad).
-    """
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    if random.random() < 0.7:
-        result = loop.run_until_complete(stealth_search())
-    else:
-        result = loop.run_until_complete(semi_quad_stealth_search())
-    
-    return jsonify(result)
-
-@app.route('/infosearch')
-def info_search():
-    """Find one available username with EXTREMELY DETAILED logging."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    result = loop.run_until_complete(detailed_stealth_search())
-    return jsonify(result)
-
-
-@app.route('/prosearch')
-def pro_search():
-    """Find one available SEMI-QUAD username (with _ or . in allowed positions)."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    result = loop.run_until_complete(semi_quad_stealth_search())
-    return jsonify(result)
-
-
-@app.route('/infoprosearch')
-def info_pro_search():
-    """Find one available SEMI-QUAD username with EXTREMELY DETAILED logging."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    result = loop.run_until_complete(detailed_semi_quad_stealth_search())
-    return jsonify(result)
-
-# ==========================================
-#              MAIN
-# ==========================================
-if __name__ == "__main__":
-    port = int(os.environ.get('PORT', 5000))
-    logger.info(f"🚀 Starting ULTIMATE STEALTH v3.0 server on port {port}")
-    logger.info(f"🛡️ Stealth: TLS Fingerprint, Cookie Mgmt, Poisson Timing, Header Entropy")
-    logger.info(f"🔒 Status: IMPOSSIBLE TO RATE LIMIT")
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instagram Username Checker - ULTIMATE STEALTH Edition v3.0
+==========================================================
+
+IMPOSSIBLE TO RATE LIMIT - Maximum stealth with all protection levels:
+- Level 1: Simple usernames, random delays
+- Level 2: Session persistence, human-like timing
+- Level 3: Smart proxy rotation, enhanced fingerprints
+- Level 4: Session warming
+- Level 5: TLS Fingerprint Randomization (curl_cffi)
+- Level 6: Advanced Cookie Management
+- Level 7: Poisson Timing Distribution
+- Level 8: Multi-Endpoint Warming
+- Level 9: Header Entropy Maximization
+- Level 10: Request Jittering System
+
+Author: @GBX_9
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import math
+import heapq
+import itertools
+import json
+import hashlib
+import hmac
+import mmap
+import sqlite3
+import socket
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable, AsyncIterator
+from uuid import UUID, uuid4
+from dataclasses import dataclass, field
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+
+# TLS Fingerprint: Try curl_cffi first, fallback to httpx for Railway compatibility
+try:
+    from curl_cffi.requests import AsyncSession as CurlAsyncSession
+    USE_CURL_CFFI = True
+    logger_init_msg = "Using curl_cffi for TLS fingerprint randomization"
+except ImportError:
+    USE_CURL_CFFI = False
+    logger_init_msg = "curl_cffi not available, using httpx (reduced stealth)"
+
+# Keyspace coordination file locking (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import httpx
+from quart import Quart, Response, jsonify, render_template, request
+from quart_cors import cors
+from enum import Enum
+
+sys.dont_write_bytecode = True
+
+# ==========================================
+#              LOGGING
+# ==========================================
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# ==========================================
+#              CONFIG
+# ==========================================
+def seed_from_env() -> Optional[int]:
+    """SEED from the environment (None when unset); a non-integer stops start-up with a clear message."""
+    raw = os.environ.get("SEED", "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        logger.critical(f"❌ SEED must be an integer, got {raw!r}")
+        sys.exit(f"Invalid SEED environment variable: {raw!r} is not an integer")
+
+
+CONFIG = {
+    "API_URL": 'https://i.instagram.com/api/v1/users/check_username/',
+    "TIMEOUT": 90,
+    "REQUEST_TIMEOUT": 15.0,
+    "PROXIES_FILE": "proxies.txt",
+    "PROXIES_RELOAD_INTERVAL": 10,  # Seconds between checks of the proxy file for changes (0 = off)
+    "ADMIN_TOKEN": os.environ.get("ADMIN_TOKEN", ""),  # X-Admin-Token for /admin/* ("" = admin routes off)
+    
+    # Speed settings (OPTIMIZED)
+    "MIN_DELAY": 0.3,
+    "MAX_DELAY": 1.2,
+    "MAX_CONCURRENT": 40,
+    "SEMI_QUAD_MAX_CONCURRENT": 50,
+    "COOLDOWN_TIME": 60,  # Increased for better recovery
+    "TYPING_SIMULATION": True,
+    
+    # Smart proxy management
+    "MAX_REQUESTS_PER_PROXY": 5,  # Reduced for more rotation
+    "PROXY_REST_TIME": 30,
+    "ENABLE_SMART_ROTATION": True,
+    
+    # NEW: Stealth settings
+    "POISSON_MEAN_DELAY": 1.2,  # Average delay for Poisson distribution
+    "MICRO_JITTER_MIN": 0.03,
+    "MICRO_JITTER_MAX": 0.12,
+    "SLOW_CONNECTION_CHANCE": 0.08,  # 8% chance of simulating slow connection
+    "HEADER_SHUFFLE": True,  # Randomize header order
+    
+    # Upstream client pool (keep-alive per proxy)
+    "CLIENT_POOL_MAX": 256,  # Max pooled clients across all proxies
+    "CLIENT_IDLE_TIMEOUT": 90,  # Close clients unused for this long (seconds)
+    "CLIENT_KEEPALIVE_CONNECTIONS": 4,  # Idle connections kept per client
+    
+    # Session registry bounds
+    "MAX_TRACKED_SESSIONS": 50000,  # Soft cap on PROXY_SESSIONS entries (busy / cooling ones are kept)
+    "SESSION_IDLE_EVICT": 3600,  # Drop sessions idle (and not cooling) this long
+    
+    # Response classification
+    "CLASSIFY_PREFIX_BYTES": 4096,  # Only this much of each body is scanned
+    
+    # Username result cache (skip names checked recently)
+    "CACHE_DB": os.environ.get("CACHE_DB", "username_cache.sqlite3"),  # On-disk tier ("" = memory only)
+    "CACHE_MEMORY_SIZE": 200000,  # In-memory LRU entries
+    "CACHE_TTL_TAKEN": 3 * 24 * 3600,  # Taken names rarely free up
+    "CACHE_TTL_AVAILABLE": 3600,  # Don't hand out the same find twice
+    "CACHE_TTL_UNKNOWN": 1800,
+    "CACHE_FLUSH_EVERY": 256,  # Write-behind batch size for the disk tier
+    
+    # Non-repeating keyspace traversal
+    "KEYSPACE_DIR": os.environ.get("KEYSPACE_DIR", "keyspace"),  # Cursor + visited bitmap per mode ("" = memory only)
+    "KEYSPACE_SAVE_EVERY": 1000,  # Persist the cursor every N draws
+    
+    # Reproducible runs: one seed drives every random draw (unset = OS entropy)
+    "SEED": seed_from_env(),
+    
+    # Metrics (/metrics)
+    "LATENCY_EWMA_ALPHA": 0.2,  # Weight of the newest sample in per-proxy latency EWMAs
+    "METRICS_PROXY_SERIES": 200,  # Per-proxy series exported (slowest first)
+    
+    # Proxy health scoring + circuit breaker
+    "HEALTH_EWMA_ALPHA": 0.2,  # Weight of the newest outcome in timeout / network-error rates
+    "HEALTH_LATENCY_REF": 1.0,  # Latency (s) at which the speed factor halves
+    "HEALTH_MIN_SCORE": 0.02,  # Floor so a recovering proxy still gets picked now and then
+    "HEALTH_SAMPLE": 4,  # Ready proxies weighed per checkout (1 = plain longest-idle order)
+    "BREAKER_FAILURES": 5,  # Consecutive timeouts / network errors that trip quarantine
+    "BREAKER_FAILURE_RATE": 0.5,  # ...or a smoothed timeout + network-error rate at least this high
+    "BREAKER_BASE_SECONDS": 30,  # First quarantine; doubles each time it re-trips
+    "BREAKER_MAX_SECONDS": 900,
+    
+    # Debug tracing (/infosearch, /infoprosearch, /traces/<id>)
+    "TRACE_BUFFER_SIZE": 1000,  # Events kept in memory per search (oldest dropped)
+    "TRACE_SAMPLE_RATE": float(os.environ.get("TRACE_SAMPLE_RATE", "1.0")),  # Share of per-check events kept
+    "TRACE_FILE": os.environ.get("TRACE_FILE", ""),  # Append every kept event as JSONL ("" = off)
+    "TRACE_RETAIN": 20,  # Recent traces served by /traces/<id>
+    
+    # Async job API (/jobs)
+    "MAX_JOBS": 1000,  # Job table size (finished jobs are evicted first)
+    "JOB_TTL": 600,  # Seconds a finished job's result stays fetchable
+    "JOB_WAIT_MAX": 60,  # Longest long-poll (?wait=) a client may ask for
+    
+    # Streaming search (/stream)
+    "STREAM_HEARTBEAT": 15,  # Seconds between keep-alive frames when nothing happens
+    
+    # Shared search pipelines (/search, /prosearch)
+    "SHARED_SEARCH": True,  # Concurrent callers of one mode share a single pipeline
+    "SHARED_SURPLUS_TTL": 30,  # Seconds an undelivered find may still go to the next caller
+    "SHARED_SURPLUS_MAX": 16,
+    
+    # Weighted-fair proxy capacity across concurrent searches
+    "MODE_WEIGHTS": {"simple": 1.0, "semi_quad": 1.0},  # Searches without an X-API-Key
+    "API_KEY_WEIGHTS": {  # API_KEY_WEIGHTS="key1:4,key2:1"; unlisted keys get DEFAULT_API_KEY_WEIGHT
+        key: float(weight) for key, _, weight in (
+            item.rpartition(":") for item in os.environ.get("API_KEY_WEIGHTS", "").split(",") if ":" in item
+        )
+    },
+    "DEFAULT_API_KEY_WEIGHT": 1.0,
+    
+    # Adaptive (AIMD) in-flight limit per mode; MAX_CONCURRENT / SEMI_QUAD_MAX_CONCURRENT are the ceilings
+    "ADAPTIVE_CONCURRENCY": True,
+    "CONCURRENCY_MIN": 2,
+    "CONCURRENCY_ERROR_RATE": 0.1,  # Error share of a window that triggers a cut
+    "CONCURRENCY_DECREASE": 0.5,  # Multiplicative cut
+    "CONCURRENCY_INCREASE": 1.0,  # Additive raise per clean, saturated window
+    "CONCURRENCY_INCREASE_INTERVAL": 2.0,  # Seconds a window lasts at least (probing past capacity costs cooldowns)
+    
+    # Proxy state shared by every worker process on this host
+    "PROXY_STATE_DB": os.environ.get("PROXY_STATE_DB", ""),  # SQLite file ("" = per-process state)
+    "PROXY_LEASE_SECONDS": 60,  # A checkout held longer than this (crashed worker) is reclaimed
+    "SHARED_BUSY_RETRY": 0.25,  # Seconds before retrying a proxy another worker holds
+    "PROXY_STATE_BUSY_TIMEOUT": 0.005,  # Longest a write waits for another worker's lock before it is queued
+    
+    # Keyspace partitioning across instances (see KEYSPACE PARTITIONING)
+    "SHARD_ID": int(os.environ.get("SHARD_ID", "0")),  # Static mode: this instance's shard
+    "SHARD_COUNT": int(os.environ.get("SHARD_COUNT", "1")),  # Static mode: number of shards (1 = off)
+    "KEYSPACE_COORD_FILE": os.environ.get("KEYSPACE_COORD_FILE", ""),  # Coordinated mode: shared block-claim file
+    "KEYSPACE_BLOCK_SIZE": 65536,  # Positions per partition block
+    "KEYSPACE_LEASE_SECONDS": 900,  # Unrenewed block claims are handed to other instances after this
+    "INSTANCE_ID": os.environ.get("INSTANCE_ID", f"{socket.gethostname()}:{os.getpid()}"),
+}
+
+# ==========================================
+#     RANDOMNESS (ONE SEEDABLE SOURCE)
+# ==========================================
+# Every draw in this module goes through current_rng(), never the global
+# `random` module. Unseeded, that is one process-wide generator. With SEED
+# set, units of work (a search worker slot, a single check) run under
+# rng_scope() with their own generator derived from SEED + a label, so the
+# draws a check makes don't depend on how concurrent checks interleave.
+RNG = random.Random(CONFIG["SEED"])
+_ACTIVE_RNG: ContextVar[random.Random] = ContextVar("active_rng", default=RNG)
+
+if CONFIG["SEED"] is not None:
+    # A seeded run must not depend on what earlier runs left on disk
+    CONFIG["CACHE_DB"] = ""
+    CONFIG["KEYSPACE_DIR"] = ""
+    CONFIG["PROXY_STATE_DB"] = ""
+    CONFIG["KEYSPACE_COORD_FILE"] = ""
+
+
+def current_rng() -> random.Random:
+    """The generator for the running unit of work."""
+    return _ACTIVE_RNG.get()
+
+
+def derive_rng(*labels: Any) -> random.Random:
+    """A generator seeded from SEED + labels (the shared RNG when unseeded)."""
+    if CONFIG["SEED"] is None:
+        return RNG
+    return random.Random(":".join(map(str, (CONFIG["SEED"], *labels))))
+
+
+@contextmanager
+def rng_scope(*labels: Any):
+    """Route current_rng() to derive_rng(*labels) for this block (no-op when unseeded)."""
+    if CONFIG["SEED"] is None:
+        yield
+        return
+    token = _ACTIVE_RNG.set(derive_rng(*labels))
+    try:
+        yield
+    finally:
+        _ACTIVE_RNG.reset(token)
+
+
+def new_uuid() -> UUID:
+    """uuid4(), drawn from current_rng() in seeded mode."""
+    if CONFIG["SEED"] is None:
+        return uuid4()
+    return UUID(int=current_rng().getrandbits(128), version=4)
+
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+# ==========================================
+#     TLS FINGERPRINT - BROWSER IMPERSONATIONS
+# ==========================================
+BROWSER_IMPERSONATIONS = [
+    "chrome110", "chrome116", "chrome119", "chrome120", "chrome123", "chrome124",
+    "safari15_3", "safari15_5", "safari17_0", "safari17_2_ios",
+    "edge99", "edge101",
+]
+
+# Extended Android devices database (EXPANDED for more diversity)
+DEVICES = [
+    # Samsung Galaxy S Series
+    {"manufacturer": "Samsung", "model": "SM-G998B", "device": "p3s", "board": "exynos2100", "android": 13, "dpi": 640, "res": "1440x3200", "country": "US"},
+    {"manufacturer": "Samsung", "model": "SM-S908B", "device": "b0q", "board": "exynos2200", "android": 14, "dpi": 600, "res": "1440x3088", "country": "GB"},
+    {"manufacturer": "Samsung", "model": "SM-S918B", "device": "dm3q", "board": "exynos2300", "android": 14, "dpi": 640, "res": "1440x3088", "country": "DE"},
+    {"manufacturer": "Samsung", "model": "SM-G991B", "device": "o1s", "board": "exynos2100", "android": 13, "dpi": 480, "res": "1080x2400", "country": "FR"},
+    {"manufacturer": "Samsung", "model": "SM-S928B", "device": "e3q", "board": "exynos2400", "android": 14, "dpi": 640, "res": "1440x3120", "country": "KR"},
+    
+    # Samsung Galaxy A/M Series
+    {"manufacturer": "Samsung", "model": "SM-A536B", "device": "a53x", "board": "exynos1280", "android": 13, "dpi": 450, "res": "1080x2400", "country": "IT"},
+    {"manufacturer": "Samsung", "model": "SM-A525F", "device": "a52q", "board": "qcom", "android": 12, "dpi": 440, "res": "1080x2340", "country": "ES"},
+    {"manufacturer": "Samsung", "model": "SM-A546B", "device": "a54x", "board": "exynos1380", "android": 14, "dpi": 480, "res": "1080x2340", "country": "CA"},
+    {"manufacturer": "Samsung", "model": "SM-M546B", "device": "m54x", "board": "exynos1380", "android": 14, "dpi": 450, "res": "1080x2400", "country": "IN"},
+    
+    # Google Pixel
+    {"manufacturer": "Google", "model": "Pixel 8 Pro", "device": "husky", "board": "google", "android": 14, "dpi": 560, "res": "1344x2992", "country": "US"},
+    {"manufacturer": "Google", "model": "Pixel 7 Pro", "device": "cheetah", "board": "google", "android": 14, "dpi": 560, "res": "1440x3120", "country": "GB"},
+    {"manufacturer": "Google", "model": "Pixel 6a", "device": "bluejay", "board": "google", "android": 13, "dpi": 420, "res": "1080x2400", "country": "CA"},
+    {"manufacturer": "Google", "model": "Pixel 7a", "device": "lynx", "board": "google", "android": 14, "dpi": 440, "res": "1080x2400", "country": "AU"},
+    {"manufacturer": "Google", "model": "Pixel 6 Pro", "device": "raven", "board": "google", "android": 13, "dpi": 560, "res": "1440x3120", "country": "US"},
+    {"manufacturer": "Google", "model": "Pixel 8", "device": "shiba", "board": "google", "android": 14, "dpi": 420, "res": "1080x2400", "country": "JP"},
+    
+    # OnePlus
+    {"manufacturer": "OnePlus", "model": "CPH2451", "device": "OP5958L1", "board": "taro", "android": 14, "dpi": 560, "res": "1440x3216", "country": "IN"},
+    {"manufacturer": "OnePlus", "model": "LE2123", "device": "lemonadep", "board": "lahaina", "android": 13, "dpi": 560, "res": "1440x3216", "country": "US"},
+    {"manufacturer": "OnePlus", "model": "CPH2413", "device": "OP594DL1", "board": "lahaina", "android": 13, "dpi": 480, "res": "1080x2400", "country": "GB"},
+    {"manufacturer": "OnePlus", "model": "PHB110", "device": "salami", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3216", "country": "CN"},
+    
+    # Xiaomi
+    {"manufacturer": "Xiaomi", "model": "2201116SG", "device": "ingres", "board": "mt6895", "android": 13, "dpi": 480, "res": "1220x2712", "country": "IN"},
+    {"manufacturer": "Xiaomi", "model": "M2101K6G", "device": "sweet", "board": "qcom", "android": 12, "dpi": 440, "res": "1080x2400", "country": "RU"},
+    {"manufacturer": "Xiaomi", "model": "2211133C", "device": "marble", "board": "taro", "android": 13, "dpi": 480, "res": "1220x2712", "country": "CN"},
+    {"manufacturer": "Xiaomi", "model": "23013RK75C", "device": "fuxi", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3200", "country": "CN"},
+    {"manufacturer": "Xiaomi", "model": "2312DRA50G", "device": "aurora", "board": "pineapple", "android": 14, "dpi": 560, "res": "1440x3200", "country": "TW"},
+    
+    # OPPO
+    {"manufacturer": "OPPO", "model": "CPH2449", "device": "OP5961L1", "board": "mt6895", "android": 13, "dpi": 480, "res": "1080x2400", "country": "ID"},
+    {"manufacturer": "OPPO", "model": "CPH2487", "device": "OP5983L1", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3216", "country": "MY"},
+    {"manufacturer": "OPPO", "model": "PHQ110", "device": "OP5A11L1", "board": "pineapple", "android": 14, "dpi": 560, "res": "1440x3168", "country": "SG"},
+    
+    # Vivo
+    {"manufacturer": "vivo", "model": "V2219", "device": "PD2219", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2400", "country": "IN"},
+    {"manufacturer": "vivo", "model": "V2324", "device": "PD2324", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3200", "country": "CN"},
+    
+    # Motorola
+    {"manufacturer": "Motorola", "model": "moto g84 5G", "device": "milanf", "board": "taro", "android": 13, "dpi": 440, "res": "1080x2400", "country": "BR"},
+    {"manufacturer": "Motorola", "model": "motorola edge 40", "device": "rtwo", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2400", "country": "MX"},
+    {"manufacturer": "Motorola", "model": "motorola edge 50 pro", "device": "eqe", "board": "kalama", "android": 14, "dpi": 480, "res": "1220x2712", "country": "EU"},
+    
+    # Realme
+    {"manufacturer": "realme", "model": "RMX3706", "device": "RE58B2L1", "board": "taro", "android": 13, "dpi": 480, "res": "1080x2412", "country": "IN"},
+    {"manufacturer": "realme", "model": "RMX3785", "device": "RE58E4L1", "board": "kalama", "android": 14, "dpi": 560, "res": "1440x3168", "country": "CN"},
+    
+    # Nothing
+    {"manufacturer": "Nothing", "model": "A063", "device": "Pong", "board": "taro", "android": 13, "dpi": 440, "res": "1080x2412", "country": "GB"},
+    {"manufacturer": "Nothing", "model": "A142", "device": "Pacman", "board": "kalama", "android": 14, "dpi": 460, "res": "1080x2412", "country": "US"},
+    
+    # ASUS ROG
+    {"manufacturer": "ASUS", "model": "ASUS_AI2302", "device": "AI2302", "board": "kalama", "android": 14, "dpi": 480, "res": "1080x2448", "country": "TW"},
+]
+
+# Instagram versions (EXPANDED for more diversity)
+IG_VERSIONS = [
+    "315.0.0.26.109", "314.0.0.24.110", "313.0.0.28.109", "312.0.0.32.118",
+    "311.0.0.32.119", "310.0.0.28.117", "309.0.0.40.113", "308.0.0.38.108",
+    "316.0.0.29.120", "317.0.0.31.115", "318.0.0.27.111", "319.0.0.33.114",
+    "320.0.0.25.108", "321.0.0.29.112", "322.0.0.33.106", "323.0.0.28.115",
+]
+
+# ==========================================
+#     ADVANCED TIMING - POISSON DISTRIBUTION
+# ==========================================
+def poisson_delay(mean: float = None) -> float:
+    """
+    Generate human-like delay using exponential distribution (Poisson arrival).
+    More realistic than uniform random.
+    """
+    if mean is None:
+        mean = CONFIG["POISSON_MEAN_DELAY"]
+    # Exponential distribution for inter-arrival times
+    delay = -mean * math.log(1 - current_rng().random())
+    # Clamp to reasonable bounds
+    return max(0.2, min(delay, 5.0))
+
+
+def micro_jitter() -> float:
+    """Add micro-jitter to requests (simulates network latency variance)."""
+    return current_rng().uniform(CONFIG["MICRO_JITTER_MIN"], CONFIG["MICRO_JITTER_MAX"])
+
+
+async def human_delay_advanced():
+    """Advanced human-like delay with Poisson distribution."""
+    base_delay = poisson_delay()
+    
+    # Occasional longer pauses (thinking time)
+    rand = current_rng()
+    if rand.random() < 0.08:
+        base_delay += rand.uniform(1.5, 3.5)
+    
+    # Micro-jitter
+    base_delay += micro_jitter()
+    
+    await asyncio.sleep(base_delay)
+
+
+# ==========================================
+#              LOAD PROXIES
+# ==========================================
+def proxies_file() -> Path:
+    return Path(__file__).parent / CONFIG["PROXIES_FILE"]
+
+
+def load_proxies() -> List[str]:
+    proxies = []
+    path = proxies_file()
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    proxies.append(line)
+        logger.info(f"Loaded {len(proxies)} proxies")
+    except Exception as e:
+        logger.error(f"Error loading proxies: {e}")
+    return proxies
+
+PROXIES = load_proxies()
+
+# ==========================================
+#              ASGI APP
+# ==========================================
+# Quart keeps the Flask API but serves over ASGI: every worker runs ONE
+# long-lived event loop and the search routes below are plain coroutines,
+# so hundreds of in-flight searches share a single process.
+app = Quart(__name__)
+app = cors(
+    app,
+    allow_origin="*",
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "X-API-Key", "X-Admin-Token"],
+)
+
+# ==========================================
+#     HEADER ENTROPY MAXIMIZATION
+# ==========================================
+@dataclass(slots=True)
+class SessionIdentity:
+    """
+    One generated device identity. Slotted, and the low-cardinality
+    strings (User-Agent, locales, timezone...) are interned so every
+    session using the same device/version shares a single copy.
+    """
+    device: Dict[str, Any]  # Shared reference into DEVICES
+    device_id: str
+    phone_id: str
+    guid: str
+    adid: str
+    waterfall_id: str
+    headers: Dict[str, str]
+    browser_impersonation: str
+
+
+def generate_identity_with_entropy() -> SessionIdentity:
+    """Generate a completely NEW identity with MAXIMUM diversity and entropy."""
+    rand = current_rng()
+    device = rand.choice(DEVICES)
+    ig_version = rand.choice(IG_VERSIONS)
+    browser_impersonation = rand.choice(BROWSER_IMPERSONATIONS)
+    
+    # All unique IDs - fresh every time with MORE randomness
+    device_id = f"android-{new_uuid().hex[:16]}"
+    phone_id = str(new_uuid())
+    guid = str(new_uuid())
+    adid = str(new_uuid())
+    google_adid = str(new_uuid())
+    family_device_id = str(new_uuid())
+    waterfall_id = str(new_uuid())
+    mid = ''.join(rand.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-', k=28))
+    session_id = f"UFS-{new_uuid()}-{rand.randint(0, 5)}"
+    client_time = str(time.time() + rand.uniform(-5, 5))
+    
+    # Timezone variety
+    timezones = [-28800, -25200, -21600, -18000, -14400, -10800, -7200, -3600, 
+                 0, 3600, 7200, 10800, 14400, 19800, 21600, 25200, 28800, 32400, 36000]
+    
+    # Connection types with realistic weights
+    connection_types = ["WIFI", "WIFI", "WIFI", "MOBILE(LTE)", "MOBILE(5G)", "MOBILE(4G)"]
+    
+    # Build User-Agent (interned: shared by every session on this device/version)
+    user_agent = sys.intern(
+        f"Instagram {ig_version} Android "
+        f"({device['android']}/{device['android']}.0; "
+        f"{device['dpi']}dpi; {device['res']}; "
+        f"{device['manufacturer']}; {device['model']}; "
+        f"{device['device']}; {device['board']}; en_{device['country']})"
+    )
+    locale = sys.intern(f"en_{device['country']}")
+    
+    # Capabilities variation
+    capabilities = ['3brTvx0=', '3brTv58=', '3brTv50=', '3brTvwE=', '3brTv4E=', 
+                   '3brTvw8=', '3brTvxE=', '3brTvxM=']
+    
+    # Bloks versions
+    bloks_versions = [
+        'e538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88e',
+        'f538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88f',
+        'd538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88d',
+        'a538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88a',
+        'b538d4591f238824118bfcb9528c8d005f2ea3becd947a3973c030ac971bb88b',
+    ]
+    
+    # Build headers dict first
+    headers_dict = {
+        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+        'Accept': '*/*',
+        'Accept-Language': sys.intern(f"en-{device['country']},en;q=0.{rand.randint(8,9)}"),
+        'Accept-Encoding': rand.choice(['gzip, deflate, br', 'gzip, deflate', 'gzip, deflate, br, zstd']),
+        'User-Agent': user_agent,
+        'X-IG-App-ID': '567067343352427',
+        'X-IG-App-Locale': locale,
+        'X-IG-Device-Locale': locale,
+        'X-IG-Mapped-Locale': locale,
+        'X-IG-Device-ID': guid,
+        'X-IG-Family-Device-ID': family_device_id,
+        'X-IG-Android-ID': device_id,
+        'X-IG-Timezone-Offset': sys.intern(str(rand.choice(timezones))),
+        'X-IG-Connection-Type': rand.choice(connection_types),
+        'X-IG-Connection-Speed': f'{rand.randint(800, 8000)}kbps',
+        'X-IG-Bandwidth-Speed-KBPS': str(rand.randint(1500, 25000)),
+        'X-IG-Bandwidth-TotalBytes-B': str(rand.randint(500000, 50000000)),
+        'X-IG-Bandwidth-TotalTime-MS': str(rand.randint(50, 800)),
+        'X-IG-Capabilities': rand.choice(capabilities),
+        'X-IG-WWW-Claim': '0',
+        'X-Bloks-Version-Id': rand.choice(bloks_versions),
+        'X-Bloks-Is-Layout-RTL': 'false',
+        'X-Bloks-Is-Panorama-Enabled': rand.choice(['true', 'true', 'false']),
+        'X-Pigeon-Session-Id': session_id,
+        'X-Pigeon-Rawclienttime': client_time,
+        'X-MID': mid,
+        'X-FB-HTTP-Engine': rand.choice(['Liger', 'Liger', 'Tigon']),
+        'X-FB-Client-IP': 'True',
+        'X-FB-Server-Cluster': 'True',
+        'X-IG-ABR-Connection-Speed-KBPS': str(rand.randint(1000, 15000)),
+        'X-IG-Prefetch-Request': rand.choice(['foreground', 'background']),
+        'X-IG-Salt-IDs': str(rand.randint(100000000, 999999999)),
+    }
+    
+    # HEADER ENTROPY: Shuffle header order (some systems detect fixed order)
+    if CONFIG["HEADER_SHUFFLE"]:
+        items = list(headers_dict.items())
+        # Keep Content-Type first, shuffle the rest
+        content_type = items[0]
+        rest = items[1:]
+        rand.shuffle(rest)
+        headers_dict = dict([content_type] + rest)
+    
+    return SessionIdentity(
+        device=device,
+        device_id=device_id,
+        phone_id=phone_id,
+        guid=guid,
+        adid=adid,
+        waterfall_id=waterfall_id,
+        headers=headers_dict,
+        browser_impersonation=browser_impersonation,
+    )
+
+
+# ==========================================
+#     COOKIE MANAGEMENT SYSTEM
+# ==========================================
+@dataclass(slots=True)
+class ProxySessionData:
+    """Complete session data for a proxy with cookies (slotted: no per-instance __dict__)."""
+    proxy_url: str
+    identity: SessionIdentity
+    cookies: Dict[str, str] = field(default_factory=dict)
+    browser_impersonation: str = ""
+    last_activity: float = 0.0
+    request_count: int = 0
+    success_count: int = 0
+    fail_count: int = 0
+    resting_until: float = 0.0
+    rate_limited_until: float = 0.0
+    is_warm: bool = False
+    warm_time: float = 0.0
+    latency_ewma: float = 0.0  # Upstream response time (seconds), 0 = no sample yet
+    timeout_rate: float = 0.0  # EWMA of "this check timed out"
+    error_rate: float = 0.0  # EWMA of "this check hit a network error"
+    health_score: float = 1.0  # Selection weight in (0, 1], see proxy_health_score()
+    consecutive_failures: int = 0
+    quarantined_until: float = 0.0  # Circuit breaker open until
+    quarantine_level: int = 0  # Times tripped without a success since (backoff exponent)
+    
+    def __post_init__(self):
+        if not self.browser_impersonation and self.identity:
+            self.browser_impersonation = self.identity.browser_impersonation
+
+
+# Global session registry (LRU order: least recently touched first)
+PROXY_SESSIONS: "OrderedDict[str, ProxySessionData]" = OrderedDict()
+WARM_DURATION = 300  # 5 minutes
+
+
+def get_or_create_session(proxy_url: str) -> ProxySessionData:
+    """Get existing session or create new one with fresh identity."""
+    session = PROXY_SESSIONS.get(proxy_url)
+    if session is not None:
+        PROXY_SESSIONS.move_to_end(proxy_url)
+        return session
+    
+    identity = generate_identity_with_entropy()
+    session = PROXY_SESSIONS[proxy_url] = ProxySessionData(
+        proxy_url=proxy_url,
+        identity=identity,
+        browser_impersonation=identity.browser_impersonation,
+    )
+    if len(PROXY_SESSIONS) > CONFIG["MAX_TRACKED_SESSIONS"]:
+        # Soft cap: eviction stops at the oldest session that is checked out
+        # or cooling down (dropping it would forget the cooldown), so the
+        # dict can stay above the cap until those sessions free up
+        evict_sessions(max_evictions=len(PROXY_SESSIONS) - CONFIG["MAX_TRACKED_SESSIONS"])
+    return session
+
+
+def is_session_evictable(session: ProxySessionData, now: float, min_idle: float) -> bool:
+    """A session can be dropped once idle and out of every cooldown."""
+    return (
+        now - session.last_activity >= min_idle
+        and now >= session.rate_limited_until
+        and now >= session.resting_until
+        and now >= session.quarantined_until
+        and not PROXY_SCHEDULER.is_busy(session.proxy_url)
+    )
+
+
+def evict_sessions(max_evictions: Optional[int] = None, min_idle: float = 0.0) -> int:
+    """
+    Evict least-recently-touched sessions, oldest first.
+    Stops at the first session that is still in use or cooling down, so
+    the cost is proportional to the number of evictions.
+    """
+    now = time.time()
+    evicted = 0
+    while PROXY_SESSIONS and (max_evictions is None or evicted < max_evictions):
+        proxy_url, session = next(iter(PROXY_SESSIONS.items()))
+        if not is_session_evictable(session, now, min_idle):
+            break
+        del PROXY_SESSIONS[proxy_url]
+        FLEET_COUNTERS.warm.discard(proxy_url)
+        evicted += 1
+    return evicted
+
+
+async def session_janitor():
+    """Background task: drop sessions idle for longer than SESSION_IDLE_EVICT."""
+    while True:
+        await asyncio.sleep(max(1.0, CONFIG["SESSION_IDLE_EVICT"] / 4))
+        evicted = evict_sessions(min_idle=CONFIG["SESSION_IDLE_EVICT"])
+        if evicted:
+            logger.debug(f"Evicted {evicted} idle proxy sessions")
+
+
+def refresh_session_identity(proxy_url: str) -> ProxySessionData:
+    """Generate completely new identity for a proxy (keeps cookies)."""
+    session = get_or_create_session(proxy_url)
+    old_cookies = session.cookies.copy()
+    new_identity = generate_identity_with_entropy()
+    session.identity = new_identity
+    session.browser_impersonation = new_identity.browser_impersonation
+    session.cookies = old_cookies  # Preserve cookies
+    return session
+
+
+def update_session_cookies(proxy_url: str, response_cookies: Dict[str, str]):
+    """Update session cookies from response."""
+    session = get_or_create_session(proxy_url)
+    session.cookies.update(response_cookies)
+
+
+def is_proxy_available(proxy_url: str) -> bool:
+    """Check if proxy is not rate-limited and not resting."""
+    session = get_or_create_session(proxy_url)
+    now = time.time()
+    
+    # Check rate limit
+    if now < session.rate_limited_until:
+        return False
+    
+    # Check if resting
+    if CONFIG["ENABLE_SMART_ROTATION"] and now < session.resting_until:
+        return False
+    
+    # Check circuit breaker
+    if now < session.quarantined_until:
+        return False
+    
+    return True
+
+
+def mark_proxy_rate_limited(proxy_url: str):
+    """Mark a proxy as rate-limited."""
+    session = get_or_create_session(proxy_url)
+    session.rate_limited_until = time.time() + CONFIG["COOLDOWN_TIME"]
+    session.fail_count += 1
+    FLEET_COUNTERS.total_fails += 1
+    FLEET_COUNTERS.rate_limited.set(proxy_url, session.rate_limited_until)
+    if SHARED_PROXY_STATE is not None:
+        SHARED_PROXY_STATE.set_rate_limited(proxy_url, session.rate_limited_until)
+    PROXY_SCHEDULER.reschedule(proxy_url)
+    # Also regenerate identity after rate limit
+    refresh_session_identity(proxy_url)
+
+
+def mark_proxy_used(proxy_url: str, success: bool = True):
+    """Mark that a proxy was used."""
+    session = get_or_create_session(proxy_url)
+    session.request_count += 1
+    session.last_activity = time.time()
+    
+    if success:
+        session.success_count += 1
+        FLEET_COUNTERS.total_success += 1
+    else:
+        session.fail_count += 1
+        FLEET_COUNTERS.total_fails += 1
+    
+    # Check if proxy needs rest
+    if SHARED_PROXY_STATE is not None:
+        # The request count is fleet-wide: whichever worker makes the
+        # MAX_REQUESTS_PER_PROXY-th request starts the rest for everyone
+        rest_until = SHARED_PROXY_STATE.record_use(proxy_url, success, session.last_activity)
+    elif CONFIG["ENABLE_SMART_ROTATION"] and session.request_count >= CONFIG["MAX_REQUESTS_PER_PROXY"]:
+        rest_until = time.time() + CONFIG["PROXY_REST_TIME"]
+    else:
+        rest_until = None
+    if rest_until is not None:
+        session.resting_until = rest_until
+        session.request_count = 0
+        FLEET_COUNTERS.resting.set(proxy_url, session.resting_until)
+        PROXY_SCHEDULER.reschedule(proxy_url)
+        # Refresh identity during rest
+        refresh_session_identity(proxy_url)
+        logger.debug(f"Proxy {proxy_url[:40]}... needs rest, identity refreshed")
+
+
+def is_session_warm(proxy_url: str) -> bool:
+    """Check if a session is still warm."""
+    session = get_or_create_session(proxy_url)
+    if session.is_warm and (time.time() - session.warm_time) < WARM_DURATION:
+        return True
+    session.is_warm = False
+    return False
+
+
+def mark_session_warm(proxy_url: str):
+    """Mark a session as warm."""
+    session = get_or_create_session(proxy_url)
+    session.is_warm = True
+    session.warm_time = time.time()
+    FLEET_COUNTERS.warm.set(proxy_url, session.warm_time + WARM_DURATION)
+
+
+# ==========================================
+#     SHARED PROXY STATE (SQLite WAL, CROSS-PROCESS)
+# ==========================================
+class SharedProxyState:
+    """
+    Proxy checkouts, cooldowns and counters shared by every worker process.
+    
+    With `hypercorn --workers N` each process otherwise keeps its own
+    PROXY_SESSIONS, so workers double-book proxies, each one rests a
+    proxy only after MAX_REQUESTS_PER_PROXY of *its own* requests, and
+    /status depends on which worker answers. Here one row per proxy in a
+    local SQLite (WAL) file is the source of truth for those fields; every
+    change is a single conditional UPDATE, so it is atomic across processes:
+    
+    - claim: succeeds only if nobody holds the proxy (or the holder's
+      lease expired) and it is out of its cooldowns
+    - release: only by the holder
+    - record_use: counts the request and starts a rest when the shared
+      count reaches MAX_REQUESTS_PER_PROXY
+    
+    Each process still schedules from its own ready queue and heap; a
+    failed claim imports the shared cooldowns so that proxy is not tried
+    again until they end. Cookies, identities and warm state stay
+    per-process. Rows are keyed by a digest of the proxy URL so no
+    credentials are written to disk.
+    
+    These calls run on the event loop, so a write waits at most
+    PROXY_STATE_BUSY_TIMEOUT for another worker's lock. A claim that
+    times out counts as busy (the proxy is retried shortly); any other
+    write is queued and replayed, in order, before the next statement.
+    /status totals come from a proxy_totals row that a trigger keeps up
+    to date, and cooldown counts from indexes, so polling never scans
+    the fleet.
+    """
+    
+    BACKLOG_MAX = 10000  # Queued writes kept while the database is locked (leases cover lost releases)
+    BUSY = (0.0, 0.0, 0.0)  # claim() answer when the lock could not be had in time
+    
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.owner = f"{os.getpid()}:{os.urandom(4).hex()}"
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._fleet: Set[str] = set()  # Keys of this process's PROXIES (rows of old fleets linger)
+        self._backlog: deque = deque(maxlen=self.BACKLOG_MAX)  # (sql, params) that did not get the lock
+    
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            # A connection must not cross fork(): every worker opens its own.
+            # Setup may wait for the lock; afterwards writes only try briefly.
+            self._db = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(
+                "BEGIN IMMEDIATE;"
+                "CREATE TABLE IF NOT EXISTS proxy_state ("
+                "proxy_key TEXT PRIMARY KEY, holder TEXT, lease_until REAL NOT NULL DEFAULT 0, "
+                "rate_limited_until REAL NOT NULL DEFAULT 0, resting_until REAL NOT NULL DEFAULT 0, "
+                "request_count INTEGER NOT NULL DEFAULT 0, success_count INTEGER NOT NULL DEFAULT 0, "
+                "fail_count INTEGER NOT NULL DEFAULT 0);"
+                "CREATE INDEX IF NOT EXISTS proxy_state_rate_limited ON proxy_state (rate_limited_until);"
+                "CREATE INDEX IF NOT EXISTS proxy_state_resting ON proxy_state (resting_until);"
+                "CREATE TABLE IF NOT EXISTS proxy_totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), success_count INTEGER NOT NULL, fail_count INTEGER NOT NULL);"
+                "INSERT OR IGNORE INTO proxy_totals "
+                "SELECT 0, COALESCE(SUM(success_count), 0), COALESCE(SUM(fail_count), 0) FROM proxy_state;"
+                "CREATE TRIGGER IF NOT EXISTS proxy_totals_count "
+                "AFTER UPDATE OF success_count, fail_count ON proxy_state BEGIN "
+                "UPDATE proxy_totals SET success_count = success_count + NEW.success_count - OLD.success_count, "
+                "fail_count = fail_count + NEW.fail_count - OLD.fail_count; END;"
+                "COMMIT;"
+                # Per-connection list of this process's fleet, for fleet_stats
+                "CREATE TEMP TABLE IF NOT EXISTS fleet (proxy_key TEXT PRIMARY KEY);"
+            )
+            self._db.executemany("INSERT OR IGNORE INTO temp.fleet VALUES (?)", [(k,) for k in self._fleet])
+            self._db.execute(f"PRAGMA busy_timeout = {int(CONFIG['PROXY_STATE_BUSY_TIMEOUT'] * 1000)}")
+            self._pid = os.getpid()
+            self.owner = f"{self._pid}:{os.urandom(4).hex()}"
+        return self._db
+    
+    @staticmethod
+    def key(proxy_url: str) -> str:
+        return hashlib.sha1(proxy_url.encode()).hexdigest()
+    
+    @staticmethod
+    def _is_locked(error: sqlite3.OperationalError) -> bool:
+        return error.sqlite_errorcode & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    
+    def _flush(self) -> bool:
+        """Replay queued writes in order; False if the database is still locked."""
+        db = self.db
+        try:
+            while self._backlog:
+                db.execute(*self._backlog[0]).fetchall()
+                self._backlog.popleft()
+        except sqlite3.OperationalError as e:
+            if not self._is_locked(e):
+                raise
+            return False
+        return True
+    
+    def _write(self, sql: str, params: Tuple) -> Tuple[bool, Optional[Tuple]]:
+        """Run a write after the queued ones: (True, its first row), or (False, None) if queued."""
+        if self._flush():
+            try:
+                return True, self.db.execute(sql, params).fetchone()
+            except sqlite3.OperationalError as e:
+                if not self._is_locked(e):
+                    raise
+        self._backlog.append((sql, params))
+        return False, None
+    
+    def register(self, proxies: List[str]):
+        """Make sure every proxy has a row (existing rows keep their state) and count it in fleet_stats."""
+        sql = "INSERT OR IGNORE INTO proxy_state (proxy_key) VALUES (?)"
+        rows = [(self.key(p),) for p in proxies]
+        db = self.db
+        if self._flush():
+            try:
+                # Autocommit connection: batch the rows into one transaction
+                db.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if not self._is_locked(e):
+                    raise
+            else:
+                try:
+                    db.executemany(sql, rows)
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                db.execute("COMMIT")
+                sql = None
+        if sql is not None:
+            self._backlog.extend((sql, row) for row in rows)
+        self._fleet.update(key for key, in rows)
+        db.executemany("INSERT OR IGNORE INTO temp.fleet VALUES (?)", rows)
+    
+    def unregister(self, proxies: List[str]):
+        """Stop counting proxies in fleet_stats. Rows stay: other workers may still use them."""
+        keys = [self.key(p) for p in proxies]
+        self._fleet.difference_update(keys)
+        self.db.executemany("DELETE FROM temp.fleet WHERE proxy_key = ?", [(k,) for k in keys])
+    
+    def set_fleet(self, proxies: List[str]):
+        self._fleet.clear()
+        self.db.execute("DELETE FROM temp.fleet")
+        self.register(proxies)
+    
+    def claim(self, proxy_url: str, now: float) -> Optional[Tuple[float, float, float]]:
+        """
+        Take the proxy for this process. None on success, else the row's
+        (lease_until, rate_limited_until, resting_until) explaining why not
+        (BUSY when another worker kept the lock). Never queued: a late claim
+        would hold a proxy nobody uses.
+        """
+        key = self.key(proxy_url)
+        resting_cutoff = now if CONFIG["ENABLE_SMART_ROTATION"] else math.inf
+        if not self._flush():
+            return self.BUSY
+        try:
+            row = self.db.execute(
+                "UPDATE proxy_state SET holder = ?, lease_until = ? "
+                "WHERE proxy_key = ? AND lease_until <= ? AND rate_limited_until <= ? AND resting_until <= ? "
+                "RETURNING 1",
+                (self.owner, now + CONFIG["PROXY_LEASE_SECONDS"], key, now, now, resting_cutoff)
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            if not self._is_locked(e):
+                raise
+            return self.BUSY
+        if row is not None:
+            return None
+        row = self.db.execute(
+            "SELECT lease_until, rate_limited_until, resting_until FROM proxy_state WHERE proxy_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            # Not registered yet (added after start-up): register and retry once
+            self.register([proxy_url])
+            return self.claim(proxy_url, now)
+        return row
+    
+    def release(self, proxy_url: str):
+        self._write(
+            "UPDATE proxy_state SET holder = NULL, lease_until = 0 WHERE proxy_key = ? AND holder = ?",
+            (self.key(proxy_url), self.owner)
+        )
+    
+    def set_rate_limited(self, proxy_url: str, until: float):
+        self._write(
+            "UPDATE proxy_state SET rate_limited_until = MAX(rate_limited_until, ?), fail_count = fail_count + 1 "
+            "WHERE proxy_key = ?",
+            (until, self.key(proxy_url))
+        )
+    
+    def record_use(self, proxy_url: str, success: bool, now: float) -> Optional[float]:
+        """
+        Count one request; returns the new resting_until if this request
+        started a rest. A queued count returns None: if it starts a rest
+        when replayed, this process learns of it from its next claim.
+        """
+        limit = CONFIG["MAX_REQUESTS_PER_PROXY"] if CONFIG["ENABLE_SMART_ROTATION"] else 2**62
+        rest_until = now + CONFIG["PROXY_REST_TIME"]
+        _, row = self._write(
+            "UPDATE proxy_state SET "
+            "resting_until = CASE WHEN request_count + 1 >= ? THEN ? ELSE resting_until END, "
+            "request_count = CASE WHEN request_count + 1 >= ? THEN 0 ELSE request_count + 1 END, "
+            "success_count = success_count + ?, fail_count = fail_count + ? "
+            "WHERE proxy_key = ? RETURNING resting_until",
+            (limit, rest_until, limit, int(success), int(not success), self.key(proxy_url))
+        )
+        if row is not None and row[0] == rest_until:
+            return rest_until
+        return None
+    
+    def fleet_stats(self, now: float) -> Dict[str, int]:
+        """Fleet-wide counts; only proxies cooling right now are visited."""
+        rate_limited, resting, both, total_success, total_fails = self.db.execute(
+            "SELECT "
+            "(SELECT COUNT(*) FROM proxy_state INDEXED BY proxy_state_rate_limited "
+            "WHERE rate_limited_until > ?1 AND proxy_key IN temp.fleet), "
+            "(SELECT COUNT(*) FROM proxy_state INDEXED BY proxy_state_resting "
+            "WHERE resting_until > ?1 AND proxy_key IN temp.fleet), "
+            "(SELECT COUNT(*) FROM proxy_state INDEXED BY proxy_state_rate_limited "
+            "WHERE rate_limited_until > ?1 AND resting_until > ?1 AND proxy_key IN temp.fleet), "
+            "success_count, fail_count FROM proxy_totals",
+            (now,)
+        ).fetchone()
+        cooling = rate_limited + (resting - both if CONFIG["ENABLE_SMART_ROTATION"] else 0)
+        return {
+            "rate_limited": rate_limited, "resting": resting, "available": len(self._fleet) - cooling,
+            "total_success": total_success, "total_fails": total_fails,
+        }
+    
+    def rate_limited_count(self, now: float) -> int:
+        """Fleet proxies in a rate-limit cooldown set by any worker."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM proxy_state INDEXED BY proxy_state_rate_limited "
+            "WHERE rate_limited_until > ? AND proxy_key IN temp.fleet",
+            (now,)
+        ).fetchone()[0]
+    
+    def close(self):
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+SHARED_PROXY_STATE = (
+    SharedProxyState(Path(__file__).parent / CONFIG["PROXY_STATE_DB"]) if CONFIG["PROXY_STATE_DB"] else None
+)
+
+
+# ==========================================
+#     PROXY SCHEDULER (READY QUEUE + MIN-HEAP)
+# ==========================================
+def proxy_eligible_at(proxy_url: str) -> float:
+    """Time at which a proxy leaves its rate-limit / rest / quarantine cooldown."""
+    session = get_or_create_session(proxy_url)
+    eligible_at = max(session.rate_limited_until, session.quarantined_until)
+    if CONFIG["ENABLE_SMART_ROTATION"]:
+        eligible_at = max(eligible_at, session.resting_until)
+    return eligible_at
+
+
+class ProxyScheduler:
+    """
+    Hands out proxies without scanning the fleet.
+    
+    Eligible, idle proxies wait in a FIFO ready queue (checkout weighs the
+    first HEALTH_SAMPLE of them by health score); cooling proxies sit
+    in a min-heap keyed by the time their cooldown ends. Checkout, release
+    and rescheduling are O(log N); advancing time pops only the entries
+    that actually expired. Heap entries are invalidated lazily: an entry
+    only counts if it still matches the proxy's current due time.
+    A checked-out proxy is exclusive until released; with a `shared`
+    backend that holds across worker processes too.
+    """
+    
+    def __init__(self, proxies: List[str], shared: Optional[SharedProxyState] = None):
+        self.shared = shared
+        self._members: Set[str] = set()
+        self._ready: "OrderedDict[str, None]" = OrderedDict()
+        self._busy: Set[str] = set()
+        self._draining: Set[str] = set()  # Removed while checked out
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self.reset(proxies)
+    
+    def reset(self, proxies: List[str]):
+        """Rebuild the schedule for a new proxy list (keeps session state)."""
+        self._members.clear()
+        self._ready.clear()
+        self._busy.clear()
+        self._draining.clear()
+        self._heap.clear()
+        self._due.clear()
+        if self.shared is not None:
+            self.shared.set_fleet(proxies)
+        for proxy_url in proxies:
+            self.add(proxy_url)
+    
+    def add(self, proxy_url: str):
+        if proxy_url in self._members:
+            return
+        self._members.add(proxy_url)
+        self._draining.discard(proxy_url)
+        if proxy_url in PROXY_SESSIONS:
+            self.reschedule(proxy_url)
+        else:
+            self._ready[proxy_url] = None
+    
+    def remove(self, proxy_url: str) -> bool:
+        """
+        Stop scheduling a proxy. True if it is idle; a checked-out proxy
+        drains instead: it is not requeued and forget_proxy() runs on release.
+        """
+        self._members.discard(proxy_url)
+        self._ready.pop(proxy_url, None)
+        self._due.pop(proxy_url, None)
+        if proxy_url in self._busy:
+            self._draining.add(proxy_url)
+            return False
+        return True
+    
+    def draining_count(self) -> int:
+        return len(self._draining)
+    
+    def _advance(self, now: float):
+        heap, due = self._heap, self._due
+        while heap and heap[0][0] <= now:
+            eligible_at, _, proxy_url = heapq.heappop(heap)
+            if due.get(proxy_url) != eligible_at:
+                continue  # Stale entry
+            del due[proxy_url]
+            if proxy_url not in self._busy:
+                self._ready[proxy_url] = None
+    
+    def reschedule(self, proxy_url: str):
+        """Re-read a proxy's cooldowns after mark_proxy_* changed them."""
+        if proxy_url not in self._members:
+            return
+        eligible_at = proxy_eligible_at(proxy_url)
+        if eligible_at > time.time():
+            self._ready.pop(proxy_url, None)
+            self._due[proxy_url] = eligible_at
+            heapq.heappush(self._heap, (eligible_at, next(self._seq), proxy_url))
+        else:
+            self._due.pop(proxy_url, None)
+            if proxy_url not in self._busy:
+                self._ready[proxy_url] = None
+    
+    def _defer(self, proxy_url: str, held: Tuple[float, float, float], now: float):
+        """Another worker holds the proxy or cooled it down: adopt that and retry later."""
+        _, rate_limited_until, resting_until = held
+        session = get_or_create_session(proxy_url)
+        if rate_limited_until > session.rate_limited_until:
+            session.rate_limited_until = rate_limited_until
+            FLEET_COUNTERS.rate_limited.set(proxy_url, rate_limited_until)
+        if resting_until > session.resting_until:
+            session.resting_until = resting_until
+            session.request_count = 0
+            FLEET_COUNTERS.resting.set(proxy_url, resting_until)
+        eligible_at = max(proxy_eligible_at(proxy_url), now + CONFIG["SHARED_BUSY_RETRY"])
+        self._due[proxy_url] = eligible_at
+        heapq.heappush(self._heap, (eligible_at, next(self._seq), proxy_url))
+    
+    def _pick_ready(self) -> str:
+        """
+        Pop one ready proxy: a health-weighted draw among the longest-idle
+        few, so rotation order mostly holds but a slow or flaky proxy at
+        the head of the queue rarely wins. Losers of a draw go to the back
+        so a run of poor proxies cannot clog the head.
+        """
+        ready = self._ready
+        if CONFIG["HEALTH_SAMPLE"] <= 1 or len(ready) == 1:
+            return ready.popitem(last=False)[0]
+        candidates = list(itertools.islice(ready, CONFIG["HEALTH_SAMPLE"]))
+        sessions = PROXY_SESSIONS
+        weights = [session.health_score if (session := sessions.get(p)) is not None else 1.0 for p in candidates]
+        if min(weights) == max(weights):
+            proxy_url = candidates[0]
+        else:
+            r = current_rng().random() * sum(weights)
+            for proxy_url, weight in zip(candidates, weights):
+                r -= weight
+                if r < 0:
+                    break
+            for loser in candidates:
+                if loser != proxy_url:
+                    ready.move_to_end(loser)
+        del ready[proxy_url]
+        return proxy_url
+    
+    def checkout(self) -> Optional[str]:
+        """Take a (health-weighted) longest-idle eligible proxy, or None if none is ready."""
+        now = time.time()
+        self._advance(now)
+        while self._ready:
+            proxy_url = self._pick_ready()
+            if self.shared is not None:
+                held = self.shared.claim(proxy_url, now)
+                if held is not None:
+                    self._defer(proxy_url, held, now)
+                    if held is self.shared.BUSY:
+                        return None  # Locked by another worker: every claim would wait as long
+                    continue
+            self._busy.add(proxy_url)
+            return proxy_url
+        return None
+    
+    def release(self, proxy_url: str):
+        """Return a checked-out proxy; it re-enters the ready queue unless cooling."""
+        self._busy.discard(proxy_url)
+        if self.shared is not None:
+            self.shared.release(proxy_url)
+        if proxy_url in self._draining:
+            self._draining.discard(proxy_url)
+            forget_proxy(proxy_url)
+        elif proxy_url in self._members and proxy_url not in self._due:
+            self._ready[proxy_url] = None
+    
+    def seconds_until_next_eligible(self) -> float:
+        """Time until the earliest cooldown ends (inf if nothing is cooling)."""
+        heap, due = self._heap, self._due
+        while heap and due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            return math.inf
+        return max(0.0, heap[0][0] - time.time())
+    
+    def is_busy(self, proxy_url: str) -> bool:
+        return proxy_url in self._busy
+    
+    def available_count(self) -> int:
+        """Proxies not cooling down (ready or currently checked out)."""
+        self._advance(time.time())
+        return len(self._members) - len(self._due)
+    
+    def ready_proxies(self, limit: int) -> List[str]:
+        """Peek at up to `limit` proxies at the head of the ready queue."""
+        self._advance(time.time())
+        return list(itertools.islice(self._ready, limit))
+
+
+PROXY_SCHEDULER = ProxyScheduler(PROXIES, shared=SHARED_PROXY_STATE)
+
+
+# ==========================================
+#     CAPACITY SCHEDULER (WEIGHTED FAIR QUEUEING)
+# ==========================================
+@dataclass(slots=True)
+class TenantFlow:
+    """Fair-queueing state for one tenant (an API key or a search mode)."""
+    weight: float
+    finish_tag: float = 0.0
+    waiting: int = 0
+    granted: int = 0
+
+
+class CapacityScheduler:
+    """
+    Splits proxy slots across concurrent searches by weighted fair queueing.
+    
+    Every slot request gets a virtual finish tag
+    max(V, tenant's last tag) + 1 / weight and waiting requests are served
+    smallest tag first (self-clocked: V is the tag of the last grant). Under
+    contention a tenant with weight 2 gets twice the slots of one with
+    weight 1, and a tenant that just arrived is served next instead of
+    queueing behind a search that already holds the fleet. Searches of the
+    same tenant share its share. With no contention a request is granted
+    at once. Proxies still come from PROXY_SCHEDULER; this only decides who
+    gets the next one.
+    
+    Requests name a group (the search mode). With ADAPTIVE_CONCURRENCY on,
+    a group whose CONCURRENCY_LIMITS entry is full is passed over and the
+    smallest tag among the other groups' requests is served instead.
+    """
+    
+    MAX_IDLE_TENANTS = 1024
+    
+    def __init__(self, proxies: ProxyScheduler):
+        self.proxies = proxies
+        self.virtual_time = 0.0
+        self._flows: Dict[str, TenantFlow] = {}
+        # Per group: min-heap of (finish tag, seq, tenant, future)
+        self._waiters: Dict[Optional[str], List[Tuple[float, int, str, asyncio.Future]]] = {}
+        self._grants: Dict[str, Tuple["AdaptiveConcurrency", int]] = {}  # Checked-out proxy -> (limiter, ticket)
+        self._seq = itertools.count()
+    
+    def _flow(self, tenant: str, weight: float) -> TenantFlow:
+        flow = self._flows.get(tenant)
+        if flow is None:
+            if len(self._flows) >= self.MAX_IDLE_TENANTS:
+                self._prune()
+            flow = self._flows[tenant] = TenantFlow(weight=weight)
+        flow.weight = weight
+        return flow
+    
+    def _prune(self):
+        """Forget tenants with nothing queued whose tag V has passed (they'd restart at V anyway)."""
+        for tenant in [t for t, f in self._flows.items() if not f.waiting and f.finish_tag <= self.virtual_time]:
+            del self._flows[tenant]
+    
+    def _tag(self, flow: TenantFlow) -> float:
+        flow.finish_tag = max(self.virtual_time, flow.finish_tag) + 1.0 / flow.weight
+        return flow.finish_tag
+    
+    @staticmethod
+    def _limiter(group: Optional[str]) -> Optional["AdaptiveConcurrency"]:
+        if not CONFIG["ADAPTIVE_CONCURRENCY"]:
+            return None
+        return CONCURRENCY_LIMITS.get(group)
+    
+    def _has_room(self, group: Optional[str]) -> bool:
+        limiter = self._limiter(group)
+        return limiter is None or limiter.has_room()
+    
+    def _checkout(self, group: Optional[str]) -> Optional[str]:
+        proxy_url = self.proxies.checkout()
+        if proxy_url is not None:
+            limiter = self._limiter(group)
+            if limiter is not None:
+                self._grants[proxy_url] = (limiter, limiter.grant())
+        return proxy_url
+    
+    def _dispatch(self):
+        """Grant ready proxies to queued requests, smallest finish tag first among groups with room."""
+        while True:
+            head = None
+            for group, waiters in self._waiters.items():
+                while waiters and waiters[0][3].done():
+                    heapq.heappop(waiters)  # Caller gave up
+                if waiters and self._has_room(group) and (head is None or waiters[0] < head[1][0]):
+                    head = (group, waiters)
+            if head is None:
+                return
+            group, waiters = head
+            proxy_url = self._checkout(group)
+            if proxy_url is None:
+                return
+            tag, _, tenant, fut = heapq.heappop(waiters)
+            flow = self._flows[tenant]
+            flow.waiting -= 1
+            flow.granted += 1
+            self.virtual_time = tag
+            fut.set_result(proxy_url)
+    
+    async def acquire(self, tenant: str, weight: float, poll: float, group: Optional[str] = None) -> str:
+        """
+        Wait for this tenant's turn and return a checked-out proxy.
+        
+        Waits as long as it takes; callers bound it with their own deadline
+        (cancellation gives the slot back). While waiting it re-checks every
+        `poll` seconds, or when the earliest cooldown ends if sooner.
+        """
+        flow = self._flow(tenant, weight)
+        self._dispatch()
+        if not self._waiters.get(group) and self._has_room(group):
+            proxy_url = self._checkout(group)
+            if proxy_url is not None:
+                self.virtual_time = self._tag(flow)
+                flow.granted += 1
+                return proxy_url
+        
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters.setdefault(group, []), (self._tag(flow), next(self._seq), tenant, fut))
+        flow.waiting += 1
+        try:
+            while True:
+                self._dispatch()
+                if fut.done():
+                    return fut.result()
+                # release() grants directly, so only wake early for that;
+                # cooldowns ending are picked up by polling (a full group
+                # only frees up on a release, so it just polls)
+                timeout = poll if not self._has_room(group) else min(poll, self.proxies.seconds_until_next_eligible())
+                await asyncio.wait((fut,), timeout=timeout)
+        except BaseException:
+            if fut.done():
+                # Granted while being cancelled: hand the slot to the next in line
+                self.release(fut.result())
+            else:
+                fut.cancel()
+                flow.waiting -= 1
+            raise
+    
+    def release(self, proxy_url: str, status: Optional[str] = None):
+        """Return a proxy; `status` is the check's result for the adaptive limit (None = no check made)."""
+        grant = self._grants.pop(proxy_url, None)
+        if grant is not None:
+            limiter, ticket = grant
+            limiter.release(ticket, status)
+        self.proxies.release(proxy_url)
+        self._dispatch()
+    
+    def refresh(self):
+        """Serve queued requests now (proxies were added to the fleet)."""
+        self._dispatch()
+    
+    def queued(self) -> int:
+        return sum(flow.waiting for flow in self._flows.values())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "virtual_time": round(self.virtual_time, 3),
+            "queued": self.queued(),
+            "tenants": {
+                tenant: {"weight": flow.weight, "waiting": flow.waiting, "granted": flow.granted}
+                for tenant, flow in self._flows.items()
+            },
+        }
+
+
+CAPACITY = CapacityScheduler(PROXY_SCHEDULER)
+
+
+def resolve_tenant(mode_name: str, api_key: Optional[str] = None) -> Tuple[str, float]:
+    """(tenant label, weight) for a search. Keys are hashed so /status never shows them."""
+    if api_key:
+        weight = CONFIG["API_KEY_WEIGHTS"].get(api_key, CONFIG["DEFAULT_API_KEY_WEIGHT"])
+        return f"key:{hashlib.sha1(api_key.encode()).hexdigest()[:8]}", weight
+    return f"mode:{mode_name}", CONFIG["MODE_WEIGHTS"].get(mode_name, 1.0)
+
+
+# ==========================================
+#     ADAPTIVE CONCURRENCY (AIMD)
+# ==========================================
+CONGESTION_STATUSES = frozenset({"timeout", "network_error", "rate_limit", "challenge"})
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the checks a mode keeps in flight, across all its searches.
+    It holds no queue: CAPACITY skips a mode's requests while it is full,
+    so the fair-queueing weights still decide who runs next. It starts at
+    the ceiling (the mode's old fixed concurrency) and only ever cuts
+    below it when errors say so.
+    
+    Outcomes are judged in windows of at least `limit` checks and
+    CONCURRENCY_INCREASE_INTERVAL seconds. As soon as a window's errors
+    (timeouts, network errors, rate limits, challenges) pass
+    CONCURRENCY_ERROR_RATE of the limit (or of the window's checks, once
+    there are more), the limit is cut by CONCURRENCY_DECREASE without
+    waiting for the window to end. A window that ends clean raises it by
+    CONCURRENCY_INCREASE, but only if the limit was actually reached, so an
+    idle mode doesn't creep up to its ceiling and overshoot on the next
+    burst. Raising is slow on purpose: every probe past the upstream's
+    capacity costs rate-limited proxies a COOLDOWN_TIME. Checks started
+    before a cut don't count towards the next one: their errors were
+    caused by the old limit.
+    """
+    
+    def __init__(self, ceiling: int):
+        self.ceiling = ceiling
+        self.limit = float(ceiling)
+        self.in_flight = 0
+        self.generation = 0  # Bumped by every cut
+        self.increases = 0
+        self.decreases = 0
+        self.last_change = 0.0
+        self._window_checks = 0
+        self._window_errors = 0
+        self._window_peak = 0
+        self._window_started = time.time()
+    
+    def current_limit(self) -> int:
+        if not CONFIG["ADAPTIVE_CONCURRENCY"]:
+            return self.ceiling
+        return int(self.limit)
+    
+    def has_room(self) -> bool:
+        return self.in_flight < int(self.limit)
+    
+    def grant(self) -> int:
+        """Take a slot; returns the ticket to pass to release()."""
+        self.in_flight += 1
+        self._window_peak = max(self._window_peak, self.in_flight)
+        return self.generation
+    
+    def release(self, ticket: int, status: Optional[str] = None):
+        """Free a slot; `status` is the check's result (None = no check was made)."""
+        self.in_flight -= 1
+        if status is not None and ticket == self.generation:
+            self._observe(status in CONGESTION_STATUSES)
+    
+    def _reset_window(self):
+        self._window_checks = 0
+        self._window_errors = 0
+        self._window_peak = self.in_flight
+        self._window_started = time.time()
+    
+    def _observe(self, congested: bool):
+        self._window_checks += 1
+        self._window_errors += congested
+        cap = int(self.limit)
+        if self._window_errors > CONFIG["CONCURRENCY_ERROR_RATE"] * max(cap, self._window_checks):
+            self.limit = max(float(CONFIG["CONCURRENCY_MIN"]), self.limit * CONFIG["CONCURRENCY_DECREASE"])
+            self.generation += 1
+            self.decreases += 1
+            self.last_change = time.time()
+            logger.info(f"📉 Concurrency {cap} → {int(self.limit)} ({self._window_errors}/{self._window_checks} errors)")
+            self._reset_window()
+        elif (self._window_checks >= cap
+              and time.time() - self._window_started >= CONFIG["CONCURRENCY_INCREASE_INTERVAL"]):
+            if self._window_peak >= cap and self.limit < self.ceiling:
+                self.limit = min(float(self.ceiling), self.limit + CONFIG["CONCURRENCY_INCREASE"])
+                self.increases += 1
+                self.last_change = time.time()
+            self._reset_window()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": CONFIG["ADAPTIVE_CONCURRENCY"],
+            "limit": self.current_limit(),
+            "ceiling": self.ceiling,
+            "in_flight": self.in_flight,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "window": {"checks": self._window_checks, "errors": self._window_errors},
+            "last_change_ago": round(time.time() - self.last_change, 1) if self.last_change else None,
+        }
+
+
+CONCURRENCY_LIMITS = {
+    "simple": AdaptiveConcurrency(CONFIG["MAX_CONCURRENT"]),
+    "semi_quad": AdaptiveConcurrency(CONFIG["SEMI_QUAD_MAX_CONCURRENT"]),
+}
+
+
+# ==========================================
+#     FLEET COUNTERS (INCREMENTAL)
+# ==========================================
+class ExpiringSet:
+    """
+    Members that drop out at a known time, with an O(1) live count.
+    
+    set() records (or extends) a member's expiry; count() pops only the
+    entries that expired since the last read, so polling stays cheap no
+    matter how large the fleet is.
+    """
+    
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+    
+    def set(self, key: str, expires_at: float):
+        self._expires[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+    
+    def discard(self, key: str):
+        self._expires.pop(key, None)
+    
+    def clear(self):
+        self._expires.clear()
+        self._heap.clear()
+    
+    def count(self, now: Optional[float] = None) -> int:
+        if now is None:
+            now = time.time()
+        heap, expires = self._heap, self._expires
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            if expires.get(key) == expires_at:
+                del expires[key]
+        return len(expires)
+
+
+class FleetCounters:
+    """Aggregates kept up to date by the mark_* functions for /status polling."""
+    
+    def __init__(self):
+        self.total_success = 0
+        self.total_fails = 0
+        self.rate_limited = ExpiringSet()
+        self.resting = ExpiringSet()
+        self.quarantined = ExpiringSet()
+        self.warm = ExpiringSet()
+    
+    def reset(self):
+        self.total_success = 0
+        self.total_fails = 0
+        self.rate_limited.clear()
+        self.resting.clear()
+        self.quarantined.clear()
+        self.warm.clear()
+    
+    def forget(self, proxy_url: str):
+        """Drop a proxy that left the fleet from the live counts (totals are history and stay)."""
+        for members in (self.rate_limited, self.resting, self.quarantined, self.warm):
+            members.discard(proxy_url)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Point-in-time fleet stats (the shape get_proxy_stats returns)."""
+        now = time.time()
+        if SHARED_PROXY_STATE is not None:
+            # Every worker reports the same fleet; warm sessions stay per-process
+            shared = SHARED_PROXY_STATE.fleet_stats(now)
+            total_success, total_fails = shared["total_success"], shared["total_fails"]
+            available, rate_limited, resting = shared["available"], shared["rate_limited"], shared["resting"]
+        else:
+            total_success, total_fails = self.total_success, self.total_fails
+            available = PROXY_SCHEDULER.available_count()
+            rate_limited, resting = self.rate_limited.count(now), self.resting.count(now)
+        total_requests = total_success + total_fails
+        return {
+            "total_proxies": len(PROXIES),
+            "available": available,
+            "rate_limited": rate_limited,
+            "resting": resting,
+            "quarantined": self.quarantined.count(now),
+            "total_requests": total_requests,
+            "total_success": total_success,
+            "total_fails": total_fails,
+            "success_rate": f"{(total_success / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
+            "warm_count": self.warm.count(now),
+        }
+
+
+FLEET_COUNTERS = FleetCounters()
+
+
+def get_rate_limited_count() -> int:
+    """Get count of currently rate-limited proxies (fleet-wide with PROXY_STATE_DB, like /status)."""
+    if SHARED_PROXY_STATE is not None:
+        return SHARED_PROXY_STATE.rate_limited_count(time.time())
+    return FLEET_COUNTERS.rate_limited.count()
+
+
+def get_warm_count() -> int:
+    """Get count of currently warm sessions."""
+    return FLEET_COUNTERS.warm.count()
+
+
+def get_proxy_stats() -> Dict[str, Any]:
+    """Get detailed proxy statistics (O(1) snapshot of incremental counters)."""
+    return FLEET_COUNTERS.snapshot()
+
+
+@app.route('/api/stats')
+async def api_stats():
+    return jsonify(get_proxy_stats())
+
+
+# ==========================================
+#     METRICS (STAGE HISTOGRAMS + COUNTERS)
+# ==========================================
+# Seconds; network stages span ms..minutes, CPU stages span µs..ms
+NETWORK_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CPU_BUCKETS = (1e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 0.01)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and two adds."""
+    
+    __slots__ = ("bounds", "counts", "sum", "count")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class CheckMetrics:
+    """
+    Where a check's time goes, per stage:
+      proxy_wait   - a search worker waiting for a free proxy
+      connect      - opening a connection (TCP + proxy/TLS), new connections only
+      upstream     - request sent -> response read, minus connect
+      classify     - classify_response()
+      bookkeeping  - session/proxy/cache updates after classification
+    plus a counter per check status.
+    """
+    
+    STAGES = {
+        "proxy_wait": NETWORK_BUCKETS,
+        "connect": NETWORK_BUCKETS,
+        "upstream": NETWORK_BUCKETS,
+        "classify": CPU_BUCKETS,
+        "bookkeeping": CPU_BUCKETS,
+    }
+    STATUSES = ("available", "taken", "rate_limit", "challenge", "timeout", "network_error", "unknown")
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.stages = {stage: Histogram(bounds) for stage, bounds in self.STAGES.items()}
+        self.statuses = dict.fromkeys(self.STATUSES, 0)
+    
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+    
+    def count_status(self, status: str):
+        try:
+            self.statuses[status] += 1
+        except KeyError:
+            self.statuses[status] = 1
+
+
+METRICS = CheckMetrics()
+
+
+class ConnectTrace:
+    """httpx trace hook: accumulates time spent in connection.* steps."""
+    
+    __slots__ = ("_started", "seconds")
+    
+    def __init__(self):
+        self._started = 0.0
+        self.seconds = 0.0
+    
+    async def __call__(self, event_name: str, info: Dict[str, Any]):
+        if not event_name.startswith("connection."):
+            return
+        if event_name.endswith(".started"):
+            self._started = time.perf_counter()
+        elif event_name.endswith((".complete", ".failed")):
+            self.seconds += time.perf_counter() - self._started
+
+
+def record_proxy_latency(session: ProxySessionData, seconds: float):
+    """Fold one upstream response time into the proxy's EWMA."""
+    if session.latency_ewma == 0.0:
+        session.latency_ewma = seconds
+    else:
+        session.latency_ewma += CONFIG["LATENCY_EWMA_ALPHA"] * (seconds - session.latency_ewma)
+
+
+def proxy_label(proxy_url: str) -> str:
+    """
+    host:port plus a short digest of the full URL: unique even when many
+    credentials share one gateway, and credentials never leave the process.
+    """
+    host_port = proxy_url.split("://", 1)[-1].rsplit("@", 1)[-1]
+    return f"{host_port}/{hashlib.sha1(proxy_url.encode()).hexdigest()[:8]}"
+
+
+def render_metrics() -> str:
+    """Text exposition format (Prometheus 0.0.4) for /metrics."""
+    lines = [
+        "# HELP checker_stage_seconds Time spent per stage of a username check.",
+        "# TYPE checker_stage_seconds histogram",
+    ]
+    for stage, histogram in METRICS.stages.items():
+        lines.extend(histogram.render("checker_stage_seconds", f'stage="{stage}"'))
+    
+    lines += [
+        "# HELP checker_checks_total Username checks by result status.",
+        "# TYPE checker_checks_total counter",
+    ]
+    lines += [f'checker_checks_total{{status="{status}"}} {count}' for status, count in METRICS.statuses.items()]
+    
+    stats = get_proxy_stats()
+    lines += [
+        "# HELP checker_proxies Proxies by state.",
+        "# TYPE checker_proxies gauge",
+        f'checker_proxies{{state="total"}} {stats["total_proxies"]}',
+        f'checker_proxies{{state="available"}} {stats["available"]}',
+        f'checker_proxies{{state="rate_limited"}} {stats["rate_limited"]}',
+        f'checker_proxies{{state="resting"}} {stats["resting"]}',
+        f'checker_proxies{{state="quarantined"}} {stats["quarantined"]}',
+        f'checker_proxies{{state="warm"}} {stats["warm_count"]}',
+        "# HELP checker_proxy_requests_total Proxy uses by outcome.",
+        "# TYPE checker_proxy_requests_total counter",
+        # Same source as /status: fleet-wide when PROXY_STATE_DB is shared
+        f'checker_proxy_requests_total{{outcome="success"}} {stats["total_success"]}',
+        f'checker_proxy_requests_total{{outcome="fail"}} {stats["total_fails"]}',
+        "# HELP checker_concurrency_limit Adaptive in-flight check limit per mode.",
+        "# TYPE checker_concurrency_limit gauge",
+    ]
+    lines += [f'checker_concurrency_limit{{mode="{mode_name}"}} {limiter.current_limit()}'
+              for mode_name, limiter in CONCURRENCY_LIMITS.items()]
+    
+    # Per-proxy series are capped (slowest first) to keep scrapes small on big fleets
+    slowest = heapq.nlargest(
+        CONFIG["METRICS_PROXY_SERIES"],
+        (session for session in PROXY_SESSIONS.values() if session.latency_ewma > 0.0),
+        key=lambda session: session.latency_ewma,
+    )
+    lines += [
+        "# HELP checker_proxy_latency_ewma_seconds Smoothed upstream response time per proxy.",
+        "# TYPE checker_proxy_latency_ewma_seconds gauge",
+    ]
+    lines += [
+        f'checker_proxy_latency_ewma_seconds{{proxy="{proxy_label(session.proxy_url)}"}} {session.latency_ewma:.6f}'
+        for session in slowest
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================
+#     PROXY HEALTH (SCORING + CIRCUIT BREAKER)
+# ==========================================
+def proxy_health_score(session: ProxySessionData) -> float:
+    """
+    Selection weight in [HEALTH_MIN_SCORE, 1]: the chance a check through
+    this proxy gets an answer at all, times a speed factor that halves at
+    HEALTH_LATENCY_REF seconds. A proxy with no history scores 1.
+    """
+    reliability = (1.0 - session.timeout_rate) * (1.0 - session.error_rate)
+    speed = CONFIG["HEALTH_LATENCY_REF"] / (CONFIG["HEALTH_LATENCY_REF"] + session.latency_ewma)
+    return max(CONFIG["HEALTH_MIN_SCORE"], reliability * speed)
+
+
+def quarantine_proxy(proxy_url: str, session: ProxySessionData):
+    """Open the circuit breaker: exponential backoff per re-trip, capped at BREAKER_MAX_SECONDS."""
+    backoff = min(CONFIG["BREAKER_BASE_SECONDS"] * 2 ** session.quarantine_level, CONFIG["BREAKER_MAX_SECONDS"])
+    session.quarantine_level += 1
+    session.quarantined_until = time.time() + backoff
+    # Half-open on release: a single further failure re-trips straight away
+    session.consecutive_failures = CONFIG["BREAKER_FAILURES"] - 1
+    FLEET_COUNTERS.quarantined.set(proxy_url, session.quarantined_until)
+    PROXY_SCHEDULER.reschedule(proxy_url)
+    logger.warning(f"🚧 Proxy {proxy_label(proxy_url)} quarantined for {backoff:.0f}s (level {session.quarantine_level})")
+
+
+def record_proxy_outcome(proxy_url: str, outcome: str, latency: Optional[float] = None):
+    """
+    Fold one check's transport outcome into the proxy's health:
+    "ok" (any HTTP answer, rate limits included), "timeout" or "network_error".
+    """
+    session = get_or_create_session(proxy_url)
+    alpha = CONFIG["HEALTH_EWMA_ALPHA"]
+    session.timeout_rate += alpha * ((outcome == "timeout") - session.timeout_rate)
+    session.error_rate += alpha * ((outcome == "network_error") - session.error_rate)
+    if latency is not None:
+        record_proxy_latency(session, latency)
+    
+    failure_rate = session.timeout_rate + session.error_rate
+    if outcome == "ok":
+        session.consecutive_failures = 0
+        if failure_rate < CONFIG["BREAKER_FAILURE_RATE"]:
+            session.quarantine_level = 0
+    else:
+        session.consecutive_failures += 1
+        # Checks still in flight when the breaker opened must not re-trip it
+        if session.quarantined_until <= time.time() and (
+            session.consecutive_failures >= CONFIG["BREAKER_FAILURES"]
+            or failure_rate >= CONFIG["BREAKER_FAILURE_RATE"]
+        ):
+            quarantine_proxy(proxy_url, session)
+    session.health_score = proxy_health_score(session)
+
+
+# ==========================================
+#     UPSTREAM CLIENT POOL (KEEP-ALIVE)
+# ==========================================
+@dataclass
+class PooledClient:
+    """A reusable upstream client bound to one proxy and TLS fingerprint."""
+    client: Any
+    browser_impersonation: str
+    last_used: float = 0.0
+    in_use: int = 0
+    retired: bool = False
+
+
+def create_upstream_client(proxy_url: str, browser_impersonation: str) -> Any:
+    """Create a keep-alive client for a proxy (curl_cffi or httpx)."""
+    if USE_CURL_CFFI:
+        return CurlAsyncSession(
+            proxy=proxy_url,
+            impersonate=browser_impersonation,
+            timeout=CONFIG["REQUEST_TIMEOUT"]
+        )
+    return httpx.AsyncClient(
+        proxy=proxy_url,
+        timeout=CONFIG["REQUEST_TIMEOUT"],
+        limits=httpx.Limits(
+            max_keepalive_connections=CONFIG["CLIENT_KEEPALIVE_CONNECTIONS"],
+            keepalive_expiry=CONFIG["CLIENT_IDLE_TIMEOUT"],
+        ),
+    )
+
+
+async def close_upstream_client(client: Any):
+    """Close a client regardless of backend."""
+    try:
+        if USE_CURL_CFFI:
+            await client.close()
+        else:
+            await client.aclose()
+    except Exception as e:
+        logger.debug(f"Client close failed: {e}")
+
+
+class UpstreamClientPool:
+    """
+    Pool of upstream clients keyed by proxy URL.
+    
+    Checks and warming through the same proxy reuse one client, so the
+    TCP + proxy CONNECT + TLS handshake is paid once per proxy instead of
+    once per request. The pool is bounded (LRU eviction of idle clients),
+    closes clients idle for CLIENT_IDLE_TIMEOUT and is closed on shutdown.
+    
+    Only curl_cffi bakes the TLS fingerprint into the client, so only then
+    does an identity refresh with a new impersonation replace it. Headers
+    go with each request, so httpx clients outlive identity refreshes.
+    """
+    
+    def __init__(self, max_clients: int, idle_timeout: float):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self._clients: "OrderedDict[str, PooledClient]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._clients)
+    
+    @asynccontextmanager
+    async def client(self, proxy_url: str, browser_impersonation: str):
+        """Borrow the pooled client for a proxy, creating it if needed."""
+        entry = self._clients.get(proxy_url)
+        while USE_CURL_CFFI and entry is not None and entry.browser_impersonation != browser_impersonation:
+            # Identity was refreshed with a new TLS fingerprint - retire the old client
+            await self._retire(proxy_url)
+            entry = self._clients.get(proxy_url)
+        
+        if entry is None:
+            entry = PooledClient(
+                client=create_upstream_client(proxy_url, browser_impersonation),
+                browser_impersonation=browser_impersonation,
+            )
+            self._clients[proxy_url] = entry
+            await self._enforce_limit()
+        else:
+            self._clients.move_to_end(proxy_url)
+        
+        entry.in_use += 1
+        try:
+            yield entry.client
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.time()
+            if entry.retired and entry.in_use == 0:
+                await close_upstream_client(entry.client)
+    
+    async def _retire(self, proxy_url: str):
+        """Drop a client from the pool; close it once nobody is using it."""
+        entry = self._clients.pop(proxy_url, None)
+        if entry is None:
+            return
+        entry.retired = True
+        if entry.in_use == 0:
+            await close_upstream_client(entry.client)
+    
+    async def _enforce_limit(self):
+        """Evict least-recently-used idle clients above the size cap."""
+        excess = len(self._clients) - self.max_clients
+        if excess <= 0:
+            return
+        victims = [url for url, entry in self._clients.items() if entry.in_use == 0][:excess]
+        for proxy_url in victims:
+            await self._retire(proxy_url)
+    
+    async def evict_idle(self) -> int:
+        """Close clients that have not been used for idle_timeout seconds."""
+        cutoff = time.time() - self.idle_timeout
+        victims = [
+            url for url, entry in self._clients.items()
+            if entry.in_use == 0 and entry.last_used < cutoff
+        ]
+        for proxy_url in victims:
+            await self._retire(proxy_url)
+        return len(victims)
+    
+    async def discard(self, proxy_url: str):
+        """Retire a proxy's client (closed once its in-flight requests finish)."""
+        await self._retire(proxy_url)
+    
+    async def close_all(self):
+        """Close every pooled client (shutdown)."""
+        for proxy_url in list(self._clients):
+            await self._retire(proxy_url)
+
+
+CLIENT_POOL = UpstreamClientPool(
+    max_clients=CONFIG["CLIENT_POOL_MAX"],
+    idle_timeout=CONFIG["CLIENT_IDLE_TIMEOUT"],
+)
+
+
+async def client_pool_janitor():
+    """Background task: periodically close idle pooled clients."""
+    while True:
+        await asyncio.sleep(max(1.0, CLIENT_POOL.idle_timeout / 2))
+        evicted = await CLIENT_POOL.evict_idle()
+        if evicted:
+            logger.debug(f"Closed {evicted} idle upstream clients")
+
+
+# ==========================================
+#     MULTI-ENDPOINT SESSION WARMING
+# ==========================================
+WARM_ENDPOINTS_ADVANCED = [
+    ("GET", "https://i.instagram.com/api/v1/launcher/sync/", None),
+    ("GET", "https://i.instagram.com/api/v1/accounts/login_activity/", None),
+    ("POST", "https://i.instagram.com/api/v1/qe/sync/", {"experiments": "ig_android_device_detection_info_upload"}),
+]
+
+
+async def warm_single_session_advanced(proxy_url: str) -> bool:
+    """
+    Advanced session warming - simulates real app behavior.
+    Uses curl_cffi with browser impersonation (if available).
+    Falls back to httpx for Railway compatibility.
+    """
+    try:
+        session_data = get_or_create_session(proxy_url)
+        identity = session_data.identity
+        
+        # Randomly choose 1-2 endpoints to warm
+        rand = current_rng()
+        endpoints_to_use = rand.sample(WARM_ENDPOINTS_ADVANCED, k=rand.randint(1, 2))
+        
+        async with CLIENT_POOL.client(proxy_url, session_data.browser_impersonation) as client:
+            for method, url, data in endpoints_to_use:
+                try:
+                    await asyncio.sleep(micro_jitter())
+                    headers = identity.headers.copy()
+                    
+                    if method == "GET":
+                        response = await client.get(url, headers=headers)
+                    else:
+                        post_data = data.copy() if data else {}
+                        post_data["_uuid"] = identity.guid
+                        response = await client.post(url, headers=headers, data=post_data)
+                    
+                    if hasattr(response, 'cookies'):
+                        update_session_cookies(proxy_url, dict(response.cookies))
+                except Exception:
+                    pass
+                
+                await asyncio.sleep(rand.uniform(0.2, 0.6))
+        
+        mark_session_warm(proxy_url)
+        return True
+            
+    except Exception as e:
+        logger.debug(f"Warm failed for {proxy_url[:30]}: {e}")
+        return False
+
+
+async def ensure_session_warm(proxy_url: str) -> bool:
+    """Ensure a session is warm before checking username."""
+    if is_session_warm(proxy_url):
+        return True
+    return await warm_single_session_advanced(proxy_url)
+
+
+async def warm_all_sessions_background():
+    """Background task to warm all proxy sessions."""
+    logger.info("🔥 Starting background session warming...")
+    
+    warmed = 0
+    # A snapshot: ProxyListReloader rewrites PROXIES in place while this sleeps
+    for proxy_url in list(PROXIES):
+        if is_proxy_available(proxy_url) and not is_session_warm(proxy_url):
+            success = await warm_single_session_advanced(proxy_url)
+            if success:
+                warmed += 1
+            await asyncio.sleep(current_rng().uniform(0.3, 0.8))
+    
+    logger.info(f"🔥 Warmed {warmed}/{len(PROXIES)} sessions")
+
+
+# ==========================================
+#     HUMAN-LIKE TIMING (Enhanced)
+# ==========================================
+async def simulate_typing_delay(username: str):
+    """Simulate the delay of typing a username with variance."""
+    if CONFIG["TYPING_SIMULATION"]:
+        rand = current_rng()
+        # Variable typing speed per character
+        total_delay = 0
+        for char in username:
+            # Random speed per character (faster for common letters)
+            if char in 'etaoin':
+                total_delay += rand.uniform(0.03, 0.08)
+            else:
+                total_delay += rand.uniform(0.06, 0.15)
+            
+            # Occasional pause (thinking)
+            if rand.random() < 0.05:
+                total_delay += rand.uniform(0.2, 0.5)
+        
+        await asyncio.sleep(total_delay)
+
+
+# ==========================================
+#     USERNAME GENERATOR
+# ==========================================
+def generate_simple_username() -> str:
+    """Generate a simple 5-char username (NO symbols)."""
+    rand = current_rng()
+    return rand.choice(LETTERS) + ''.join(rand.choices(CHARS, k=4))
+
+
+def generate_semi_quad_username() -> str:
+    """Generate a semi-quad username (5 chars with _ or . in allowed positions)."""
+    return decode_semi_quad_username(current_rng().randrange(SEMI_QUAD_KEYSPACE_SIZE))
+
+
+# ==========================================
+#     NON-REPEATING KEYSPACE ENUMERATION
+# ==========================================
+SIMPLE_KEYSPACE_SIZE = len(LETTERS) * len(CHARS) ** 4  # 43,670,016 names
+
+
+def decode_simple_username(index: int) -> str:
+    """Map an index in [0, SIMPLE_KEYSPACE_SIZE) to its simple username."""
+    index, d4 = divmod(index, 36)
+    index, d3 = divmod(index, 36)
+    index, d2 = divmod(index, 36)
+    first, d1 = divmod(index, 36)
+    return LETTERS[first] + CHARS[d1] + CHARS[d2] + CHARS[d3] + CHARS[d4]
+
+
+class KeyspaceEnumerator:
+    """
+    Visit every index of a keyspace exactly once, in pseudo-random order.
+    
+    A cursor walks 0..size-1 and a keyed Feistel network (with cycle
+    walking) maps each position to a unique index, so the order looks
+    random but never repeats. A visited bitmap (1 bit per name, mmap'ed
+    to disk) guards against repeats across crashes, where the persisted
+    cursor can lag behind. When the space is exhausted a new epoch starts
+    with a fresh key and an empty bitmap.
+    
+    A name is only marked visited once its check comes back taken or
+    available (see settle); names whose check failed or was cut short, and
+    names a search drew but never got to, go to a retry queue that is
+    drawn from before the cursor moves on.
+    
+    With a `partition` the cursor only walks the position ranges this
+    instance is given (see KEYSPACE PARTITIONING); the permutation key then
+    comes from the partition so every instance shares one order.
+    """
+    
+    ROUNDS = 4
+    ANSWERED = frozenset({"taken", "available"})
+    
+    def __init__(self, name: str, size: int, decode, state_dir: Optional[Path] = None,
+                 partition: Optional["KeyspacePartition"] = None):
+        self.name = name
+        self.size = size
+        self.decode = decode
+        self.partition = partition
+        bits = max(2, (size - 1).bit_length())
+        bits += bits & 1  # Balanced Feistel halves
+        self._half_bits = bits // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        
+        self.cursor = 0
+        self.epoch = 0
+        self.key = self._draw_key()
+        self._draws_since_save = 0
+        self._retry: deque = deque()  # Drawn indices whose check has to be redone
+        # End of the position range being walked; partitioned instances
+        # start with an empty range so the first draw claims one
+        self.range_end = size if partition is None else 0
+        
+        self._state_path = None
+        self._bitmap_file = None
+        bitmap_bytes = (size + 7) // 8
+        if state_dir is not None:
+            state_dir.mkdir(parents=True, exist_ok=True)
+            self._state_path = state_dir / f"{name}.json"
+            self._load_state()
+            bitmap_path = state_dir / f"{name}.bitmap"
+            self._bitmap_file = open(bitmap_path, "a+b")
+            if os.path.getsize(bitmap_path) != bitmap_bytes:
+                self._bitmap_file.truncate(bitmap_bytes)
+            self._bitmap = mmap.mmap(self._bitmap_file.fileno(), bitmap_bytes)
+        else:
+            self._bitmap = bytearray(bitmap_bytes)
+        self._set_round_keys()
+    
+    def _draw_key(self) -> int:
+        if self.partition is not None:
+            return self.partition.key(self.name, self.epoch)
+        # Seeded runs get the same permutation for the same (name, epoch)
+        return derive_rng("keyspace", self.name, self.epoch).getrandbits(64)
+    
+    def _set_round_keys(self):
+        self._round_keys = [
+            (self.key >> (16 * i) ^ (0x9E3779B1 * (i + 1))) & 0xFFFFFFFF
+            for i in range(self.ROUNDS)
+        ]
+    
+    def _load_state(self):
+        try:
+            with open(self._state_path, "r") as f:
+                state = json.load(f)
+            if state.get("size") == self.size and state.get("partition") == self._partition_name():
+                self.cursor = state["cursor"]
+                self.epoch = state["epoch"]
+                self.key = state["key"]
+                self._retry.extend(state.get("retry", []))
+                if self.partition is not None:
+                    self.range_end = self.partition.resume(self, state.get("range_end", 0))
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.error(f"Ignoring corrupt keyspace state for {self.name}: {e}")
+    
+    def save(self):
+        """Persist cursor/key/epoch (atomic replace)."""
+        self._draws_since_save = 0
+        if self._state_path is None:
+            return
+        tmp_path = self._state_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "size": self.size, "cursor": self.cursor, "epoch": self.epoch, "key": self.key,
+                "partition": self._partition_name(), "range_end": self.range_end,
+                "retry": list(self._retry),
+            }, f)
+        os.replace(tmp_path, self._state_path)
+    
+    def _partition_name(self) -> Optional[str]:
+        return self.partition.describe() if self.partition is not None else None
+    
+    def close(self):
+        # Bitmap pages live in the shared page cache, so a crashed process
+        # keeps its marks; an explicit msync is only needed on clean exit.
+        self.save()
+        if self.partition is not None:
+            self.partition.release(self)
+        if self._bitmap_file is not None:
+            self._bitmap.flush()
+            self._bitmap.close()
+            self._bitmap_file.close()
+            self._bitmap_file = None
+    
+    def _feistel(self, x: int) -> int:
+        half_bits, mask = self._half_bits, self._half_mask
+        left, right = x >> half_bits, x & mask
+        for k in self._round_keys:
+            f = ((right ^ k) * 0x45D9F3B) & 0xFFFFFFFF
+            f ^= f >> 16
+            left, right = right, left ^ (f & mask)
+        return (left << half_bits) | right
+    
+    def permute(self, position: int) -> int:
+        """Bijection on [0, size): Feistel permutation with cycle walking."""
+        index = self._feistel(position)
+        while index >= self.size:
+            index = self._feistel(index)
+        return index
+    
+    def is_visited(self, index: int) -> bool:
+        return bool(self._bitmap[index >> 3] & (1 << (index & 7)))
+    
+    def mark_visited(self, index: int):
+        self._bitmap[index >> 3] |= 1 << (index & 7)
+    
+    def _new_epoch(self, epoch: Optional[int] = None):
+        self.epoch = self.epoch + 1 if epoch is None else epoch
+        self.cursor = 0
+        self.key = self._draw_key()
+        self._set_round_keys()
+        self._bitmap[:] = bytes(len(self._bitmap))
+        self._retry.clear()  # The new epoch draws them again anyway
+        logger.info(f"Keyspace {self.name} exhausted, starting epoch {self.epoch}")
+    
+    def _next_range(self):
+        if self.partition is None:
+            self._new_epoch()
+            return
+        epoch, start, end = self.partition.claim(self)
+        if epoch != self.epoch:
+            self._new_epoch(epoch)
+        self.cursor, self.range_end = start, end
+    
+    def next_index(self) -> int:
+        """Next index of the current epoch that is neither visited nor drawn."""
+        if self._retry:
+            return self._retry.popleft()
+        while True:
+            if self.cursor >= self.range_end:
+                self._next_range()
+            index = self.permute(self.cursor)
+            self.cursor += 1
+            if not self.is_visited(index):
+                break
+        self._draws_since_save += 1
+        if self._draws_since_save >= CONFIG["KEYSPACE_SAVE_EVERY"]:
+            self.save()
+            if self.partition is not None:
+                self.partition.renew(self)
+        return index
+    
+    def next(self) -> str:
+        """Next never-checked username."""
+        return self.decode(self.next_index())
+    
+    def next_batch(self, count: int) -> List[str]:
+        """Next `count` never-checked usernames (one batch of candidates)."""
+        if self.partition is not None:
+            self.partition.check(self)
+        decode = self.decode
+        return [decode(self.next_index()) for _ in range(count)]
+    
+    def draw(self, count: int) -> List[Tuple[str, int]]:
+        """Like next_batch, with a ticket per name to hand back to settle()."""
+        if self.partition is not None:
+            self.partition.check(self)
+        decode = self.decode
+        drawn = []
+        for _ in range(count):
+            index = self.next_index()
+            drawn.append((decode(index), self.epoch * self.size + index))
+        return drawn
+    
+    def settle(self, ticket: int, status: Optional[str]):
+        """
+        Record the outcome of a drawn name's check. Taken/available marks it
+        visited; a failed check or no status (cancelled, out of time, never
+        checked) queues it for a retry. "unknown" is cached, so a retry
+        would only be skipped: it stays unmarked until the next epoch.
+        
+        Seeded runs never retry: which checks a find cancels depends on
+        timing, so retries would make the draw order differ between runs.
+        The name just stays unmarked until the next epoch.
+        """
+        epoch, index = divmod(ticket, self.size)
+        if epoch != self.epoch:
+            return  # Drawn before the space wrapped; the new epoch covers it
+        if status in self.ANSWERED:
+            self.mark_visited(index)
+        elif status != "unknown" and CONFIG["SEED"] is None:
+            self._retry.append(index)
+
+
+# Semi-quad: letter + one symbol at position 1-3 + alphanumerics elsewhere.
+# With a single symbol that never sits last, Instagram's rules (no trailing
+# '.', no '..', '._' or '_.') can't be broken, so every index is valid.
+SEMI_QUAD_SYMBOLS = '._'
+SEMI_QUAD_SYMBOL_POSITIONS = (1, 2, 3)
+SEMI_QUAD_KEYSPACE_SIZE = (
+    len(LETTERS) * len(SEMI_QUAD_SYMBOL_POSITIONS) * len(SEMI_QUAD_SYMBOLS) * len(CHARS) ** 3
+)  # 7,278,336 names
+
+
+def decode_semi_quad_username(index: int) -> str:
+    """Map an index in [0, SEMI_QUAD_KEYSPACE_SIZE) to its semi-quad username."""
+    index, d3 = divmod(index, 36)
+    index, d2 = divmod(index, 36)
+    index, d1 = divmod(index, 36)
+    index, symbol = divmod(index, 2)
+    first, pos = divmod(index, 3)
+    tail = [CHARS[d1], CHARS[d2], CHARS[d3]]
+    tail.insert(SEMI_QUAD_SYMBOL_POSITIONS[pos] - 1, SEMI_QUAD_SYMBOLS[symbol])
+    return LETTERS[first] + ''.join(tail)
+
+
+# ==========================================
+#     KEYSPACE PARTITIONING (MULTI-INSTANCE)
+# ==========================================
+# Replicas that enumerate independently check the same names. Both modes
+# below cut the permutation's position space into KEYSPACE_BLOCK_SIZE
+# blocks and give each block to one instance. Positions (not indices)
+# are partitioned, so a block is still a pseudo-random spread of names;
+# the permutation key is derived from (name, epoch) alone so that every
+# instance walks the same order.
+class KeyspacePartition:
+    """
+    Static sharding: shard SHARD_ID of SHARD_COUNT owns every block b with
+    b % SHARD_COUNT == SHARD_ID. No coordination, but changing SHARD_COUNT
+    reassigns blocks, so names already checked by one layout can be
+    re-checked under the next (the result cache only hides recent ones).
+    Use the coordinated mode when instances come and go.
+    """
+    
+    def __init__(self, block_size: int, shard_id: int = 0, shard_count: int = 1):
+        if not 0 <= shard_id < shard_count:
+            raise ValueError(f"SHARD_ID must be in [0, {shard_count}), got {shard_id}")
+        self.block_size = block_size
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+    
+    def describe(self) -> str:
+        return f"static:{self.shard_id}/{self.shard_count}:{self.block_size}"
+    
+    @staticmethod
+    def key(name: str, epoch: int) -> int:
+        seed = CONFIG["SEED"] if CONFIG["SEED"] is not None else ""
+        digest = hashlib.sha256(f"keyspace:{seed}:{name}:{epoch}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+    
+    def claim(self, keyspace: KeyspaceEnumerator) -> Tuple[int, int, int]:
+        """(epoch, start, end) of this instance's next position range."""
+        block = -(-keyspace.cursor // self.block_size)  # First block boundary at or after the cursor
+        block += (self.shard_id - block) % self.shard_count
+        epoch = keyspace.epoch
+        if block * self.block_size >= keyspace.size:
+            epoch, block = epoch + 1, self.shard_id
+            if block * self.block_size >= keyspace.size:
+                raise ValueError(f"Keyspace {keyspace.name} has fewer blocks than SHARD_COUNT")
+        start = block * self.block_size
+        return epoch, start, min(start + self.block_size, keyspace.size)
+    
+    def resume(self, keyspace: KeyspaceEnumerator, range_end: int) -> int:
+        return range_end
+    
+    def renew(self, keyspace: KeyspaceEnumerator):
+        pass
+    
+    def check(self, keyspace: KeyspaceEnumerator):
+        """Called before each batch; coordinated mode renews a lease going stale here."""
+    
+    def release(self, keyspace: KeyspaceEnumerator):
+        pass
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"mode": "static", "shard_id": self.shard_id, "shard_count": self.shard_count,
+                "block_size": self.block_size}
+
+
+class CoordinatedPartition(KeyspacePartition):
+    """
+    Instances claim blocks one at a time from a shared JSON file guarded by
+    flock (a local coordinator for replicas on one host or on a shared
+    volume). Adding an instance just adds a claimer, so new nodes always
+    get unclaimed blocks and nothing needs rebalancing.
+    
+    Each claim is a lease: the holder renews it (recording its progress)
+    every KEYSPACE_SAVE_EVERY draws and on shutdown hands back what it did
+    not walk. If an instance dies, its lease expires after
+    KEYSPACE_LEASE_SECONDS and the unwalked rest of the block goes to the
+    next claimer. When every block of an epoch is handed out, the next
+    claim starts a new epoch for everyone.
+    """
+    
+    def __init__(self, path: Path, block_size: int, instance_id: str, lease_seconds: float):
+        if fcntl is None:
+            raise RuntimeError("KEYSPACE_COORD_FILE needs POSIX file locking (fcntl)")
+        super().__init__(block_size)
+        self.path = path
+        self.instance_id = instance_id
+        self.lease_seconds = lease_seconds
+        self._renewed_at: Dict[str, float] = {}
+    
+    def describe(self) -> str:
+        return f"coordinated:{self.path.name}:{self.block_size}"
+    
+    @contextmanager
+    def _locked_state(self):
+        """Exclusive read-modify-write of the coordination file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, "r") as f:
+                        state = json.load(f)
+                except FileNotFoundError:
+                    state = {}
+                yield state
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _space(self, state: Dict[str, Any], keyspace: KeyspaceEnumerator, now: float) -> Dict[str, Any]:
+        space = state.setdefault(keyspace.name, {
+            "size": keyspace.size, "epoch": 0, "next_block": 0, "returned": [], "leases": {},
+        })
+        for holder, lease in list(space["leases"].items()):
+            if lease["expires"] < now:
+                del space["leases"][holder]
+                self._return(space, lease)
+        return space
+    
+    @staticmethod
+    def _return(space: Dict[str, Any], lease: Dict[str, Any]):
+        """Put a lease's unwalked positions back for the next claimer (same epoch only)."""
+        if lease["epoch"] == space["epoch"] and lease["progress"] < lease["end"]:
+            space["returned"].append([lease["progress"], lease["end"]])
+    
+    def claim(self, keyspace: KeyspaceEnumerator) -> Tuple[int, int, int]:
+        now = time.time()
+        with self._locked_state() as state:
+            space = self._space(state, keyspace, now)
+            space["leases"].pop(self.instance_id, None)  # Our previous block is fully walked
+            if space["returned"]:
+                start, end = space["returned"].pop(0)
+            else:
+                if space["next_block"] * self.block_size >= keyspace.size:
+                    space["epoch"] += 1
+                    space["next_block"] = 0
+                    space["returned"] = []
+                start = space["next_block"] * self.block_size
+                end = min(start + self.block_size, keyspace.size)
+                space["next_block"] += 1
+            space["leases"][self.instance_id] = {
+                "epoch": space["epoch"], "start": start, "end": end, "progress": start,
+                "expires": now + self.lease_seconds,
+            }
+            self._renewed_at[keyspace.name] = now
+            return space["epoch"], start, end
+    
+    def resume(self, keyspace: KeyspaceEnumerator, range_end: int) -> int:
+        """Keep walking a saved range only if our lease on it is still live."""
+        with self._locked_state() as state:
+            lease = self._space(state, keyspace, time.time())["leases"].get(self.instance_id)
+        if lease and lease["epoch"] == keyspace.epoch and lease["start"] <= keyspace.cursor < lease["end"]:
+            return lease["end"]
+        return keyspace.cursor  # Claim afresh on the next draw
+    
+    def renew(self, keyspace: KeyspaceEnumerator):
+        self._renewed_at[keyspace.name] = time.time()
+        with self._locked_state() as state:
+            space = self._space(state, keyspace, time.time())
+            lease = space["leases"].get(self.instance_id)
+            if lease is None or lease["epoch"] != keyspace.epoch:
+                # Expired and handed on: stop walking it
+                keyspace.range_end = keyspace.cursor
+                return
+            lease["progress"] = keyspace.cursor
+            lease["expires"] = time.time() + self.lease_seconds
+    
+    def check(self, keyspace: KeyspaceEnumerator):
+        # An instance idle for a while (no searches) may have lost its lease
+        # to another claimer; find out before drawing from that range again
+        if keyspace.cursor < keyspace.range_end and (
+            time.time() - self._renewed_at.get(keyspace.name, 0.0) > self.lease_seconds / 2
+        ):
+            self.renew(keyspace)
+    
+    def release(self, keyspace: KeyspaceEnumerator):
+        with self._locked_state() as state:
+            space = self._space(state, keyspace, time.time())
+            lease = space["leases"].pop(self.instance_id, None)
+            if lease is not None:
+                lease["progress"] = max(lease["progress"], keyspace.cursor)
+                self._return(space, lease)
+        keyspace.range_end = keyspace.cursor
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"mode": "coordinated", "instance_id": self.instance_id, "block_size": self.block_size}
+
+
+def build_keyspace_partition() -> Optional[KeyspacePartition]:
+    if CONFIG["KEYSPACE_COORD_FILE"]:
+        return CoordinatedPartition(
+            Path(__file__).parent / CONFIG["KEYSPACE_COORD_FILE"], CONFIG["KEYSPACE_BLOCK_SIZE"],
+            CONFIG["INSTANCE_ID"], CONFIG["KEYSPACE_LEASE_SECONDS"],
+        )
+    if CONFIG["SHARD_COUNT"] > 1:
+        return KeyspacePartition(CONFIG["KEYSPACE_BLOCK_SIZE"], CONFIG["SHARD_ID"], CONFIG["SHARD_COUNT"])
+    return None
+
+
+KEYSPACE_DIR = Path(__file__).parent / CONFIG["KEYSPACE_DIR"] if CONFIG["KEYSPACE_DIR"] else None
+KEYSPACE_PARTITION = build_keyspace_partition()
+
+SIMPLE_KEYSPACE = KeyspaceEnumerator(
+    "simple", SIMPLE_KEYSPACE_SIZE, decode_simple_username, KEYSPACE_DIR, KEYSPACE_PARTITION
+)
+SEMI_QUAD_KEYSPACE = KeyspaceEnumerator(
+    "semi_quad", SEMI_QUAD_KEYSPACE_SIZE, decode_semi_quad_username, KEYSPACE_DIR, KEYSPACE_PARTITION
+)
+KEYSPACES = [SIMPLE_KEYSPACE, SEMI_QUAD_KEYSPACE]
+
+
+# ==========================================
+#     USERNAME RESULT CACHE (LRU + SQLite)
+# ==========================================
+class UsernameCache:
+    """
+    Last known status per username with per-status TTLs.
+    
+    Two tiers: an in-memory LRU for hot lookups and a SQLite table that
+    survives restarts. Writes to SQLite are batched (write-behind) and
+    flushed every CACHE_FLUSH_EVERY results, after each search and on
+    shutdown.
+    """
+    
+    def __init__(self, db_path: Optional[Path], memory_size: int, ttls: Dict[str, float]):
+        self.memory_size = memory_size
+        self.ttls = ttls
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._pending: List[Tuple[str, str, float]] = []
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            try:
+                self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS username_status ("
+                    "username TEXT PRIMARY KEY, status TEXT NOT NULL, checked_at REAL NOT NULL)"
+                )
+                self.prune()
+            except sqlite3.Error as e:
+                logger.error(f"Username cache disabled on-disk tier: {e}")
+                self._db = None
+    
+    def _is_fresh(self, status: str, checked_at: float, now: float) -> bool:
+        ttl = self.ttls.get(status)
+        return ttl is not None and now - checked_at < ttl
+    
+    def _remember(self, username: str, status: str, checked_at: float):
+        self._memory[username] = (status, checked_at)
+        self._memory.move_to_end(username)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def get(self, username: str) -> Optional[str]:
+        """Return the cached status if still fresh, else None."""
+        now = time.time()
+        entry = self._memory.get(username)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT status, checked_at FROM username_status WHERE username = ?",
+                (username,)
+            ).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+                self._remember(username, *entry)
+        
+        if entry is None:
+            return None
+        if self._is_fresh(entry[0], entry[1], now):
+            self._memory.move_to_end(username)
+            return entry[0]
+        self._memory.pop(username, None)
+        return None
+    
+    def put(self, username: str, status: str):
+        """Record a result; statuses without a TTL are not cached."""
+        if status not in self.ttls:
+            return
+        now = time.time()
+        self._remember(username, status, now)
+        if self._db is not None:
+            self._pending.append((username, status, now))
+            if len(self._pending) >= CONFIG["CACHE_FLUSH_EVERY"]:
+                self.flush()
+    
+    def flush(self):
+        """Write pending results to the on-disk tier."""
+        if self._db is None or not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO username_status (username, status, checked_at) VALUES (?, ?, ?)",
+                    pending
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Username cache flush failed: {e}")
+    
+    def prune(self):
+        """Delete on-disk rows older than the longest TTL."""
+        if self._db is None:
+            return
+        cutoff = time.time() - max(self.ttls.values())
+        with self._db:
+            self._db.execute("DELETE FROM username_status WHERE checked_at < ?", (cutoff,))
+    
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+USERNAME_CACHE = UsernameCache(
+    db_path=Path(__file__).parent / CONFIG["CACHE_DB"] if CONFIG["CACHE_DB"] else None,
+    memory_size=CONFIG["CACHE_MEMORY_SIZE"],
+    ttls={
+        "taken": CONFIG["CACHE_TTL_TAKEN"],
+        "available": CONFIG["CACHE_TTL_AVAILABLE"],
+        "unknown": CONFIG["CACHE_TTL_UNKNOWN"],
+    },
+)
+
+
+def next_uncached_batch(keyspace: KeyspaceEnumerator, count: int,
+                        max_rounds: int = 50) -> Tuple[List[Tuple[str, int]], int]:
+    """
+    Draw `count` candidates with no fresh cached result. Returns
+    ((name, ticket) pairs, skipped); settle each ticket once checked.
+    """
+    candidates: List[Tuple[str, int]] = []
+    skipped = 0
+    for _ in range(max_rounds):
+        for username, ticket in keyspace.draw(count - len(candidates)):
+            cached = USERNAME_CACHE.get(username)
+            if cached is None:
+                candidates.append((username, ticket))
+            else:
+                keyspace.settle(ticket, cached)
+                skipped += 1
+        if len(candidates) >= count:
+            break
+    return candidates, skipped
+
+
+# ==========================================
+#     CORE: CHECK USERNAME (curl_cffi)
+# ==========================================
+
+# Exact rate limit patterns from Instagram
+RATE_LIMIT_PATTERNS = [
+    '"message":"Please wait a few minutes before you try again."',
+    '"spam":true',
+    '"status":"fail","message":"rate_limit',
+    'Please wait a few minutes',
+    '"error_type":"rate_limit_error"',
+]
+
+CHALLENGE_PATTERNS = [
+    '"challenge_required"',
+    '"message":"challenge_required"',
+    'checkpoint_required',
+]
+
+
+# ==========================================
+#     RESPONSE CLASSIFIER
+# ==========================================
+# Lowercased once at import, so a body is lowercased at most ONCE per
+# response instead of once per pattern.
+RATE_LIMIT_NEEDLES = [(p.lower(), p) for p in RATE_LIMIT_PATTERNS]
+CHALLENGE_NEEDLES = [p.lower() for p in CHALLENGE_PATTERNS]
+
+
+def classify_response(status_code: int, body: bytes) -> Tuple[str, Optional[str]]:
+    """
+    Turn an upstream response into one status.
+    
+    Only a bounded prefix of the raw body is looked at, decoded as latin-1
+    (a plain byte copy that can't fail - every pattern is ASCII). The
+    common available/taken case is decided without lowercasing; otherwise
+    the prefix is lowercased once for all rate-limit and challenge
+    patterns. Returns (status, matched_rate_limit_pattern).
+    """
+    text = body[:CONFIG["CLASSIFY_PREFIX_BYTES"]].decode("latin-1")
+    
+    # Check for available / taken username
+    if '"available":' in text:
+        if '"available":true' in text or '"available": true' in text:
+            return "available", None
+        if '"available":false' in text or '"available": false' in text:
+            return "taken", None
+    
+    # Check for EXACT rate limit patterns, then challenge patterns
+    lowered = text.lower()
+    for needle, pattern in RATE_LIMIT_NEEDLES:
+        if needle in lowered:
+            return "rate_limit", pattern
+    for needle in CHALLENGE_NEEDLES:
+        if needle in lowered:
+            return "challenge", None
+    
+    # Other known responses that are NOT rate limits
+    if status_code == 200 and '"status":"ok"' in text:
+        return "taken", None
+    return "unknown", None
+
+
+async def check_username_stealth(
+    proxy_url: str,
+    username: str,
+    ensure_warm: bool = True,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Check a single username with ULTIMATE STEALTH.
+    Uses curl_cffi for TLS fingerprint randomization (if available).
+    Falls back to httpx for Railway compatibility.
+    IMPROVED: More accurate rate limit detection.
+    
+    `deadline` (event loop time) bounds warming, delays and the HTTP call;
+    a check cut off by it is reported as a timeout without blaming the proxy.
+    """
+    loop = asyncio.get_running_loop()
+    if deadline is not None and deadline <= loop.time():
+        return {"status": "timeout", "username": username, "deadline": True}
+    deadline_scope = asyncio.timeout_at(deadline)
+    budget_clamped = False  # The request timeout was cut to the search's remaining time
+    
+    try:
+        session_data = get_or_create_session(proxy_url)
+        identity = session_data.identity
+        
+        async with deadline_scope:
+            # Ensure session is warm
+            if ensure_warm:
+                await ensure_session_warm(proxy_url)
+            
+            # Add micro-jitter before request
+            await asyncio.sleep(micro_jitter())
+            
+            # Simulate slow connection occasionally
+            rand = current_rng()
+            if rand.random() < CONFIG["SLOW_CONNECTION_CHANCE"]:
+                await asyncio.sleep(rand.uniform(0.5, 1.5))
+            
+            # Simulate typing the username
+            await simulate_typing_delay(username)
+            
+            data = {
+                "username": username,
+                "_uuid": identity.guid,
+            }
+            
+            # ========== MAKE REQUEST (pooled curl_cffi or httpx client) ==========
+            async with CLIENT_POOL.client(proxy_url, session_data.browser_impersonation) as client:
+                if USE_CURL_CFFI:
+                    for name, value in session_data.cookies.items():
+                        client.cookies.set(name, value)
+                
+                request_timeout = CONFIG["REQUEST_TIMEOUT"]
+                if deadline is not None and deadline - loop.time() < request_timeout:
+                    request_timeout = max(0.1, deadline - loop.time())
+                    budget_clamped = True
+                
+                # curl_cffi has no trace hook; its connect time stays inside "upstream"
+                connect_trace = None if USE_CURL_CFFI else ConnectTrace()
+                request_started = time.perf_counter()
+                response = await client.post(
+                    CONFIG["API_URL"],
+                    headers=identity.headers,
+                    data=data,
+                    timeout=request_timeout,
+                    **({"extensions": {"trace": connect_trace}} if connect_trace else {})
+                )
+                
+                if hasattr(response, 'cookies'):
+                    update_session_cookies(proxy_url, dict(response.cookies))
+                
+                body = response.content
+                status_code = response.status_code
+                upstream_seconds = time.perf_counter() - request_started
+        
+        if connect_trace is not None and connect_trace.seconds > 0.0:
+            METRICS.observe("connect", connect_trace.seconds)
+            upstream_seconds -= connect_trace.seconds
+        METRICS.observe("upstream", upstream_seconds)
+        
+        # ========== ACCURATE RESPONSE DETECTION ==========
+        classify_started = time.perf_counter()
+        status, matched_pattern = classify_response(status_code, body)
+        bookkeeping_started = time.perf_counter()
+        METRICS.observe("classify", bookkeeping_started - classify_started)
+        
+        try:
+            # Mark session as warm (successful request)
+            mark_session_warm(proxy_url)
+            record_proxy_outcome(proxy_url, "ok", upstream_seconds)
+            
+            if status in ("available", "taken"):
+                mark_proxy_used(proxy_url, success=True)
+                return {"status": status, "username": username, "proxy": proxy_url}
+            
+            if status == "rate_limit":
+                mark_proxy_rate_limited(proxy_url)
+                mark_proxy_used(proxy_url, success=False)
+                snippet = body[:200].decode("utf-8", "replace")
+                logger.warning(f"⚠️ TRUE RATE LIMIT on {proxy_url[:30]}... | Pattern: {matched_pattern}")
+                logger.warning(f"📝 Response: {snippet}")
+                return {"status": "rate_limit", "username": username, "proxy": proxy_url, "response": snippet, "pattern": matched_pattern}
+            
+            if status == "challenge":
+                mark_proxy_rate_limited(proxy_url)
+                mark_proxy_used(proxy_url, success=False)
+                return {"status": "challenge", "username": username, "proxy": proxy_url}
+            
+            # Unknown response - log it but DON'T count as rate limit
+            mark_proxy_used(proxy_url, success=True)
+            snippet = body[:150].decode("utf-8", "replace")
+            logger.debug(f"Unknown response (NOT rate limit): {snippet[:100]}")
+            return {"status": "unknown", "username": username, "response": snippet}
+        finally:
+            METRICS.observe("bookkeeping", time.perf_counter() - bookkeeping_started)
+            
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        if deadline_scope.expired() or budget_clamped:
+            # The search ran out of budget - not the proxy's fault. A clamped
+            # request timeout can fire just before the deadline scope does.
+            return {"status": "timeout", "username": username, "deadline": True}
+        mark_proxy_used(proxy_url, success=False)
+        record_proxy_outcome(proxy_url, "timeout")
+        return {"status": "timeout", "username": username}
+    except Exception as e:
+        if budget_clamped and loop.time() >= deadline:
+            # curl_cffi reports its own timeout as a generic error
+            return {"status": "timeout", "username": username, "deadline": True}
+        # Network errors are NOT rate limits
+        mark_proxy_used(proxy_url, success=False)
+        record_proxy_outcome(proxy_url, "network_error")
+        return {"status": "network_error", "username": username, "error": str(e)[:80]}
+
+
+
+
+# ==========================================
+#     SEARCH TRACING (BOUNDED + SAMPLED)
+# ==========================================
+class TraceSink:
+    """Appends trace events to a JSONL file; opened on first write."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+    
+    def write(self, trace_id: str, record: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"trace_id": trace_id, **record}, default=str) + "\n")
+    
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SearchTracer:
+    """
+    Debug trace of one search with a hard memory bound.
+    
+    Events land in a fixed-size ring buffer (oldest dropped first) and, with
+    TRACE_FILE set, are streamed to the sink as they happen. Per-check events
+    (REQUEST, RESPONSE, DELAY) are sampled: every Nth is kept for a sample
+    rate of 1/N. Lifecycle and rate-limit events are always kept. Counts of
+    every event type, kept or not, are exact.
+    """
+    
+    SAMPLED_EVENTS = frozenset({"REQUEST", "RESPONSE", "DELAY"})
+    
+    def __init__(self, search_type: str, buffer_size: int, sample_rate: float, sink: Optional[TraceSink]):
+        self.trace_id = new_uuid().hex[:12]
+        self.search_type = search_type
+        self.started_at = time.time()
+        self.finished = False
+        self.sample_rate = sample_rate
+        self.events: deque = deque(maxlen=buffer_size)
+        self.event_counts: Dict[str, int] = {}
+        self.recorded = 0
+        self._stride = round(1 / sample_rate) if sample_rate > 0 else 0
+        self._sink = sink
+    
+    def sample(self, event_type: str) -> bool:
+        """Count an event and decide whether to keep it (build its payload only if True)."""
+        seen = self.event_counts.get(event_type, 0)
+        self.event_counts[event_type] = seen + 1
+        if event_type not in self.SAMPLED_EVENTS:
+            return True
+        return self._stride > 0 and seen % self._stride == 0
+    
+    def record(self, event_type: str, data: Dict[str, Any]):
+        entry = {"time": round(time.time() - self.started_at, 4), "event": event_type, "data": data}
+        self.events.append(entry)
+        self.recorded += 1
+        if self._sink is not None:
+            self._sink.write(self.trace_id, entry)
+    
+    def event(self, event_type: str, data: Dict[str, Any]):
+        if self.sample(event_type):
+            self.record(event_type, data)
+    
+    def finish(self):
+        self.finished = True
+        if self._sink is not None:
+            self._sink.flush()
+    
+    def export(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "search_type": self.search_type,
+            "finished": self.finished,
+            "sample_rate": self.sample_rate,
+            "event_counts": dict(self.event_counts),
+            "recorded": self.recorded,
+            "dropped_from_buffer": self.recorded - len(self.events),
+            "events": list(self.events),
+        }
+
+
+TRACE_SINK = TraceSink(Path(CONFIG["TRACE_FILE"])) if CONFIG["TRACE_FILE"] else None
+RECENT_TRACES: "OrderedDict[str, SearchTracer]" = OrderedDict()
+
+
+def start_trace(search_type: str) -> SearchTracer:
+    """New tracer, registered for /traces/<id> (only the newest TRACE_RETAIN are kept)."""
+    tracer = SearchTracer(search_type, CONFIG["TRACE_BUFFER_SIZE"], CONFIG["TRACE_SAMPLE_RATE"], TRACE_SINK)
+    RECENT_TRACES[tracer.trace_id] = tracer
+    while len(RECENT_TRACES) > CONFIG["TRACE_RETAIN"]:
+        RECENT_TRACES.popitem(last=False)
+    return tracer
+
+
+# ==========================================
+#     UNIFIED SEARCH SYSTEM
+# ==========================================
+class SearchMode(Enum):
+    SIMPLE = "simple"
+    SEMI_QUAD = "semi_quad"
+
+
+def tally_check_result(stats: Dict[str, int], result: Dict[str, Any]):
+    """Fold one check result into a search's running stats and the result cache."""
+    status = result["status"]
+    stats["checked"] += 1
+    METRICS.count_status(status)
+    USERNAME_CACHE.put(result.get("username"), status)
+    
+    if status in ("taken", "unknown"):
+        # Unknown response - still a successful connection, count as taken (conservative)
+        stats["taken"] += 1
+    elif status in ("rate_limit", "challenge"):
+        stats["rate_limits"] += 1
+    elif status == "timeout" and "timeouts" in stats:
+        stats["timeouts"] += 1
+    elif status != "available":
+        # Network errors and timeouts are NOT rate limits
+        stats["errors"] += 1
+
+
+class SearchFinished(Exception):
+    """Raised by a search worker to stop its task group once a name is found."""
+
+
+def search_timeout(mode: SearchMode) -> float:
+    return 30 if mode == SearchMode.SEMI_QUAD else CONFIG["TIMEOUT"]
+
+
+SEARCH_COUNTER = itertools.count()  # Labels per-search generators in seeded mode
+
+
+async def unified_search(
+    mode: SearchMode,
+    detailed_logging: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_found: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    api_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    UNIFIED Search Function with ULTIMATE STEALTH.
+    
+    `progress`, if given, is called (synchronously, never awaited) with a
+    "start" event, a "progress" event after every completed check and a
+    "found" event; the caller gets the final result as the return value.
+    
+    `on_found`, if given, sees every available name; returning True keeps
+    the search running for another one (shared pipelines). `stats` lets the
+    caller supply the running stats dict so it accumulates across searches.
+    Proxy slots come from CAPACITY, shared fairly with concurrent searches
+    by tenant (`api_key` if given, else the mode).
+    """
+    start_time = time.time()
+    
+    # Mode-specific configuration
+    if mode == SearchMode.SEMI_QUAD:
+        keyspace = SEMI_QUAD_KEYSPACE
+        max_concurrent = CONFIG["SEMI_QUAD_MAX_CONCURRENT"]
+        apply_delays = False
+        search_type = "semi-quad"
+    else:
+        keyspace = SIMPLE_KEYSPACE
+        max_concurrent = CONFIG["MAX_CONCURRENT"]
+        apply_delays = True
+        search_type = "simple"
+    
+    timeout = search_timeout(mode)
+    tenant, weight = resolve_tenant(mode.value, api_key)
+    # Every check, delay and wait of this search must end by this point
+    deadline = asyncio.get_running_loop().time() + timeout
+    search_seq = next(SEARCH_COUNTER)
+    
+    if stats is None:
+        stats = {"checked": 0, "taken": 0, "errors": 0, "rate_limits": 0, "cache_skips": 0}
+    if detailed_logging:
+        stats.setdefault("timeouts", 0)
+    
+    # Bounded, sampled trace instead of unbounded per-event lists
+    tracer = start_trace(search_type) if detailed_logging else None
+    if tracer is not None:
+        log_event = tracer.event
+    else:
+        def log_event(event_type: str, data: Dict[str, Any]):
+            pass
+    
+    if not PROXIES:
+        result = {"status": "failed", "reason": "no_proxies", "duration": 0}
+        if tracer is not None:
+            tracer.finish()
+            result["detailed_log"] = tracer.export()
+        return result
+    
+    log_event("INIT", {
+        "proxies_count": len(PROXIES), "warm_sessions": get_warm_count(),
+        "search_type": search_type, "mode": mode.value,
+        "stealth_features": ["TLS_FINGERPRINT", "COOKIE_MGMT", "POISSON_TIMING", "HEADER_ENTROPY"]
+    })
+    
+    available_count = PROXY_SCHEDULER.available_count()
+    
+    if not available_count:
+        result = {
+            "status": "failed", "reason": "all_proxies_rate_limited",
+            "duration": 0, "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}"
+        }
+        if tracer is not None:
+            tracer.finish()
+            result["detailed_log"] = tracer.export()
+        return result
+    
+    if tracer is not None:
+        fingerprints = []
+        for p in PROXY_SCHEDULER.ready_proxies(5):
+            session = get_or_create_session(p)
+            fingerprints.append({
+                "proxy": proxy_label(p),
+                "browser": session.browser_impersonation,
+                "device": session.identity.device["model"],
+            })
+        log_event("TLS_FINGERPRINTS", {"sample": fingerprints})
+    
+    logger.info(f"🔍 Starting {search_type.upper()} search with {available_count} proxies (STEALTH v3.0)")
+    workers_count = min(max_concurrent, available_count)
+    if progress is not None:
+        progress({
+            "event": "start", "search_type": search_type, "mode": mode.value,
+            "available_proxies": available_count, "workers": workers_count, "timeout": timeout,
+        })
+    
+    # ========== SLIDING-WINDOW PIPELINE ==========
+    # A fixed set of workers each own one slot: check out a free proxy, pull
+    # the next candidate, check it, release the proxy and go again at once.
+    # A slow proxy only holds its own slot instead of stalling a whole batch.
+    candidates: deque = deque()
+    in_flight: Set[str] = set()
+    found: Dict[str, Any] = {}
+    refills = 0
+    wait_time = 2 if mode == SearchMode.SEMI_QUAD else 5
+    
+    async def checkout_proxy() -> str:
+        # The mode's adaptive limit (CONCURRENCY_LIMITS) applies inside CAPACITY
+        proxy_url = await CAPACITY.acquire(tenant, weight, wait_time, mode.value)
+        in_flight.add(proxy_url)
+        return proxy_url
+    
+    def release_proxy(proxy_url: str, status: Optional[str] = None):
+        in_flight.discard(proxy_url)
+        CAPACITY.release(proxy_url, status)
+    
+    def next_candidate() -> Optional[Tuple[str, int]]:
+        nonlocal refills
+        if not candidates:
+            # Skip names with a fresh cached result BEFORE spending a proxy slot
+            refills += 1
+            drawn, skipped = next_uncached_batch(keyspace, max_concurrent)
+            stats["cache_skips"] += skipped
+            candidates.extend(drawn)
+            log_event("CANDIDATES_REFILL", {"refill": refills, "count": len(drawn), "in_flight": len(in_flight)})
+        return candidates.popleft() if candidates else None
+    
+    async def worker():
+        while True:
+            # Queues fairly behind other searches when the fleet is busy
+            wait_started = time.perf_counter()
+            proxy_url = await checkout_proxy()
+            METRICS.observe("proxy_wait", time.perf_counter() - wait_started)
+            
+            candidate = next_candidate()
+            if candidate is None:
+                release_proxy(proxy_url)
+                await asyncio.sleep(wait_time)
+                continue
+            username, ticket = candidate
+            
+            if tracer is not None and tracer.sample("REQUEST"):
+                tracer.record("REQUEST", {"username": username, "proxy": proxy_label(proxy_url)})
+            status = None
+            try:
+                # Seeded runs: a check's draws (identity, jitter, warming)
+                # depend only on the username, not on which task ran first
+                with rng_scope("check", username):
+                    result = await check_username_stealth(proxy_url, username, deadline=deadline)
+                if not result.get("deadline"):
+                    status = result["status"]
+            finally:
+                release_proxy(proxy_url, status)
+                # Only a definitive answer marks the name visited; a failed,
+                # cancelled or out-of-time check puts it back for a retry
+                keyspace.settle(ticket, status)
+            
+            if result.get("deadline"):
+                # The check never awaited anything; looping again would spin
+                # without yielding, so the search timeout could never fire
+                return
+            
+            tally_check_result(stats, result)
+            if progress is not None:
+                progress({
+                    "event": "progress", "elapsed": round(time.time() - start_time, 3),
+                    "last_status": result["status"], "stats": dict(stats),
+                    "in_flight": len(in_flight), "queued_candidates": len(candidates), "refills": refills,
+                })
+            if tracer is not None:
+                if tracer.sample("RESPONSE"):
+                    tracer.record("RESPONSE", {"username": result.get("username"), "status": result["status"]})
+                if result["status"] in ("rate_limit", "challenge"):
+                    # Always kept, with the response data for debugging
+                    tracer.event("RATE_LIMIT", {
+                        "username": result.get("username"),
+                        "status": result["status"],
+                        "response": result.get("response", "N/A"),
+                        "pattern": result.get("pattern", "N/A"),
+                        "proxy": proxy_label(proxy_url),
+                    })
+            
+            if result["status"] == "available":
+                if on_found is not None and on_found(result):
+                    continue
+                if not found:
+                    found.update(result)
+                    if progress is not None:
+                        progress({"event": "found", "username": result["username"],
+                                  "elapsed": round(time.time() - start_time, 3)})
+                raise SearchFinished()
+            
+            if apply_delays:
+                # Per-slot Poisson pacing instead of a batch-wide pause
+                delay = poisson_delay()
+                await asyncio.sleep(delay)
+                if tracer is not None and tracer.sample("DELAY"):
+                    tracer.record("DELAY", {"refill": refills, "delay": round(delay, 3)})
+    
+    async def slot_worker(slot: int):
+        with rng_scope(search_type, search_seq, slot):
+            await worker()
+    
+    # Structured lifetime: on find, deadline or caller cancellation (client
+    # disconnect) the task group cancels every worker and AWAITS them, so no
+    # check outlives the search or leaks a borrowed client.
+    try:
+        async with asyncio.timeout_at(deadline):
+            try:
+                async with asyncio.TaskGroup() as workers:
+                    for slot in range(workers_count):
+                        workers.create_task(slot_worker(slot))
+            except* SearchFinished:
+                pass
+    except TimeoutError:
+        pass
+    finally:
+        # Candidates drawn but never checked go back for the next search
+        while candidates:
+            keyspace.settle(candidates.popleft()[1], None)
+        USERNAME_CACHE.flush()
+        keyspace.save()
+    
+    if found:
+        duration = round(time.time() - start_time, 2 if not detailed_logging else 4)
+        log_event("FOUND", {"username": found["username"], "duration": duration})
+        logger.info(f"✅ FOUND {search_type.upper()}: {found['username']} in {duration}s")
+        
+        response = {
+            "status": "success", "username": found["username"],
+            "duration": duration, "stats": stats,
+            "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}",
+            "warm_sessions": f"{get_warm_count()}/{len(PROXIES)}",
+            "stealth_version": "3.0"
+        }
+    else:
+        response = {
+            "status": "failed", "reason": "timeout",
+            "duration": round(time.time() - start_time, 2), "stats": stats,
+            "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}",
+            "warm_sessions": f"{get_warm_count()}/{len(PROXIES)}",
+            "stealth_version": "3.0"
+        }
+    if mode == SearchMode.SEMI_QUAD:
+        response["type"] = "semi-quad"
+    if tracer is not None:
+        log_event("FINISHED", {"status": response["status"], "stats": dict(stats)})
+        tracer.finish()
+        response["batches_processed"] = refills
+        response["detailed_log"] = tracer.export()
+    return response
+
+
+# ==========================================
+#     SHARED SEARCH PIPELINES (PER MODE AND TENANT)
+# ==========================================
+class SharedSearch:
+    """
+    One search pipeline per mode and tenant that concurrent callers attach to.
+    
+    Instead of N callers each running unified_search over the same fleet
+    (competing for proxies and tripping MAX_REQUESTS_PER_PROXY N times as
+    fast), the first caller starts a pipeline and later ones queue on it.
+    Finds go to waiting callers in FIFO order, one name per caller; the
+    pipeline keeps running while anyone is waiting and is cancelled when
+    the last waiter leaves. A find with nobody left to take it is kept
+    for SHARED_SURPLUS_TTL seconds and handed to the next caller.
+    
+    Callers with an API key get their own pipeline, which runs under the
+    key's weight in CAPACITY; keyless callers share the mode's pipeline.
+    """
+    
+    def __init__(self, mode: SearchMode, api_key: Optional[str] = None):
+        self.mode = mode
+        self.api_key = api_key
+        self.tenant, _ = resolve_tenant(mode.value, api_key)
+        self.label = f"{mode.value}/{self.tenant}" if api_key else mode.value
+        self.stats = {"checked": 0, "taken": 0, "errors": 0, "rate_limits": 0, "cache_skips": 0}
+        self.delivered = 0
+        self._waiters: deque = deque()  # Futures, oldest caller first
+        self._surplus: deque = deque()  # (found_at, result)
+        self._task: Optional[asyncio.Task] = None
+    
+    def waiting(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+    
+    def idle(self) -> bool:
+        return self._task is None and not self.waiting() and not self._surplus
+    
+    def _deliver(self, result: Dict[str, Any]) -> bool:
+        """on_found hook: hand the name to the oldest waiter; True = keep searching."""
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(result)
+                self.delivered += 1
+                logger.info(f"📬 SHARED {self.mode.value.upper()}: {result['username']} delivered ({self.waiting()} still waiting)")
+                return self.waiting() > 0
+        self._surplus.append((time.time(), result))
+        while len(self._surplus) > CONFIG["SHARED_SURPLUS_MAX"]:
+            self._surplus.popleft()
+        return False
+    
+    def _take_surplus(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        while self._surplus:
+            found_at, result = self._surplus.popleft()
+            if now - found_at <= CONFIG["SHARED_SURPLUS_TTL"]:
+                self.delivered += 1
+                return result
+        return None
+    
+    async def _run(self):
+        try:
+            while self.waiting():
+                result = await unified_search(self.mode, on_found=self._deliver, stats=self.stats,
+                                              api_key=self.api_key)
+                if result["status"] == "failed" and result["reason"] != "timeout":
+                    # No proxies / all rate limited: every waiter gets the same answer
+                    while self._waiters:
+                        fut = self._waiters.popleft()
+                        if not fut.done():
+                            fut.set_result(result)
+                    break
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+    
+    def _response(self, found: Optional[Dict[str, Any]], started: float,
+                  attached_stats: Dict[str, int]) -> Dict[str, Any]:
+        # self.stats runs for the pipeline's lifetime; a caller sees only
+        # the checks made while it was attached
+        stats = {key: count - attached_stats.get(key, 0) for key, count in self.stats.items()}
+        response = {
+            "duration": round(time.time() - started, 2), "stats": stats,
+            "rate_limited_proxies": f"{get_rate_limited_count()}/{len(PROXIES)}",
+            "warm_sessions": f"{get_warm_count()}/{len(PROXIES)}",
+            "shared_waiters": self.waiting(),
+            "stealth_version": "3.0"
+        }
+        if found is None:
+            response = {"status": "failed", "reason": "timeout", **response}
+        elif found.get("status") == "available":
+            response = {"status": "success", "username": found["username"], **response}
+        else:
+            return found
+        if self.mode == SearchMode.SEMI_QUAD:
+            response["type"] = "semi-quad"
+        return response
+    
+    async def search(self) -> Dict[str, Any]:
+        started = time.time()
+        attached_stats = dict(self.stats)
+        surplus = self._take_surplus()
+        if surplus is not None:
+            return self._response(surplus, started, attached_stats)
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            found = await asyncio.wait_for(fut, search_timeout(self.mode))
+        except TimeoutError:
+            found = None
+        finally:
+            if not self.waiting() and self._task is not None:
+                # Last waiter gone (done, timed out or disconnected). Forget
+                # the task now so a caller arriving while it unwinds starts
+                # a fresh pipeline instead of queueing on a dying one.
+                self._task.cancel()
+                self._task = None
+        return self._response(found, started, attached_stats)
+    
+    async def close(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "waiting": self.waiting(),
+            "delivered": self.delivered,
+            "checked": self.stats["checked"],
+            "checks_per_find": round(self.stats["checked"] / self.delivered, 1) if self.delivered else None,
+            "surplus": len(self._surplus),
+        }
+
+
+SHARED_SEARCHES: Dict[Tuple[SearchMode, str], SharedSearch] = {
+    (shared.mode, shared.tenant): shared for shared in map(SharedSearch, SearchMode)
+}
+SHARED_SEARCHES_MAX = 1024  # Idle per-key pipelines are dropped past this
+
+
+def shared_search(mode: SearchMode, api_key: Optional[str] = None) -> SharedSearch:
+    """The pipeline for this mode and tenant, created on first use."""
+    tenant, _ = resolve_tenant(mode.value, api_key)
+    shared = SHARED_SEARCHES.get((mode, tenant))
+    if shared is None:
+        if len(SHARED_SEARCHES) >= SHARED_SEARCHES_MAX:
+            for key in [key for key, other in SHARED_SEARCHES.items() if other.api_key and other.idle()]:
+                del SHARED_SEARCHES[key]
+        shared = SHARED_SEARCHES[(mode, tenant)] = SharedSearch(mode, api_key)
+    return shared
+
+
+# ==========================================
+#     SEARCH WRAPPERS
+# ==========================================
+async def stealth_search(api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Quick search with simple usernames (5 chars)."""
+    if CONFIG["SHARED_SEARCH"]:
+        # One pipeline per tenant, so it queues under the caller's key weight
+        return await shared_search(SearchMode.SIMPLE, api_key).search()
+    return await unified_search(mode=SearchMode.SIMPLE, detailed_logging=False, api_key=api_key)
+
+
+async def semi_quad_stealth_search(api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Fast search for semi-quad usernames (with _ or .)."""
+    if CONFIG["SHARED_SEARCH"]:
+        return await shared_search(SearchMode.SEMI_QUAD, api_key).search()
+    return await unified_search(mode=SearchMode.SEMI_QUAD, detailed_logging=False, api_key=api_key)
+
+
+async def detailed_stealth_search(api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Detailed search with full logging for debugging."""
+    return await unified_search(mode=SearchMode.SIMPLE, detailed_logging=True, api_key=api_key)
+
+
+async def detailed_semi_quad_stealth_search(api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Detailed semi-quad search with full logging."""
+    return await unified_search(mode=SearchMode.SEMI_QUAD, detailed_logging=True, api_key=api_key)
+
+
+# ==========================================
+#     JOB API (ASYNC SEARCHES)
+# ==========================================
+@dataclass(slots=True)
+class SearchJob:
+    """One submitted search running as a background task."""
+    job_id: str
+    mode: SearchMode
+    detailed: bool
+    created_at: float
+    api_key: Optional[str] = None  # Fair-share tenant; never echoed back
+    status: str = "running"  # running -> done | cancelled | failed
+    finished_at: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    task: Optional[asyncio.Task] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "mode": self.mode.value,
+            "detailed": self.detailed,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at or None,
+            "result": self.result,
+        }
+
+
+class JobTable:
+    """
+    Bounded job registry (insertion order = submission order).
+    
+    Finished jobs expire JOB_TTL seconds after they end. When the table is
+    full the oldest finished job is evicted; if every slot holds a running
+    job, submit() refuses instead of growing.
+    """
+    
+    def __init__(self, max_jobs: int, ttl: float):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, SearchJob]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._jobs)
+    
+    def running_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "running")
+    
+    def evict_expired(self, now: Optional[float] = None):
+        now = now or time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status != "running" and now - job.finished_at >= self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def _make_room(self) -> bool:
+        self.evict_expired()
+        if len(self._jobs) < self.max_jobs:
+            return True
+        for job_id, job in self._jobs.items():
+            if job.status != "running":
+                del self._jobs[job_id]
+                return True
+        return False
+    
+    def submit(self, mode: SearchMode, detailed: bool = False, api_key: Optional[str] = None) -> Optional[SearchJob]:
+        """Start a search in the background; None if the table is full of running jobs."""
+        if not self._make_room():
+            return None
+        job = SearchJob(job_id=new_uuid().hex, mode=mode, detailed=detailed, created_at=time.time(), api_key=api_key)
+        job.task = asyncio.create_task(self._run(job))
+        self._jobs[job.job_id] = job
+        return job
+    
+    async def _run(self, job: SearchJob):
+        try:
+            job.result = await unified_search(job.mode, detailed_logging=job.detailed, api_key=job.api_key)
+            job.status = "done"
+        except asyncio.CancelledError:
+            # unified_search's task group already cancelled and awaited its
+            # workers, so every proxy slot is back in the scheduler
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.result = {"status": "failed", "reason": "error", "error": str(e)[:200]}
+        finally:
+            job.finished_at = time.time()
+            job.task = None
+            job.done.set()
+    
+    def get(self, job_id: str) -> Optional[SearchJob]:
+        self.evict_expired()
+        return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[SearchJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.task is not None:
+            job.task.cancel()
+        return job
+    
+    async def cancel_all(self):
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+JOBS = JobTable(CONFIG["MAX_JOBS"], CONFIG["JOB_TTL"])
+JOB_MODES = {"simple": SearchMode.SIMPLE, "semi_quad": SearchMode.SEMI_QUAD, "semi-quad": SearchMode.SEMI_QUAD}
+
+
+def pick_search_mode() -> SearchMode:
+    """/search mix: 70% simple, 30% semi-quad."""
+    return SearchMode.SIMPLE if current_rng().random() < 0.7 else SearchMode.SEMI_QUAD
+
+
+# ==========================================
+#     STREAMING SEARCH (SSE / NDJSON)
+# ==========================================
+class ProgressStream:
+    """
+    Bridges unified_search's progress callback to one streaming client.
+    
+    publish() never blocks the search. If the client reads slower than
+    checks complete, consecutive "progress" snapshots collapse into the
+    newest one (each carries cumulative stats, so nothing is lost);
+    every other event is delivered in order.
+    """
+    
+    def __init__(self):
+        self._events: deque = deque()
+        self._latest_progress: Optional[Dict[str, Any]] = None
+        self._wakeup = asyncio.Event()
+    
+    def publish(self, event: Dict[str, Any]):
+        if event["event"] == "progress":
+            self._latest_progress = event
+        else:
+            if self._latest_progress is not None:
+                self._events.append(self._latest_progress)
+                self._latest_progress = None
+            self._events.append(event)
+        self._wakeup.set()
+    
+    async def drain(self, timeout: float) -> List[Dict[str, Any]]:
+        """Pending events, waiting up to `timeout` for one (empty list on timeout)."""
+        if not self._events and self._latest_progress is None:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wakeup.clear()
+        events = list(self._events)
+        self._events.clear()
+        if self._latest_progress is not None:
+            events.append(self._latest_progress)
+            self._latest_progress = None
+        return events
+
+
+def format_stream_event(event: Dict[str, Any], fmt: str) -> str:
+    data = json.dumps(event, default=str)
+    if fmt == "sse":
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def stream_search(mode: SearchMode, fmt: str, api_key: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Run one search and yield its events as SSE frames or NDJSON lines,
+    ending with a "result" event. If the client goes away the generator is
+    closed mid-yield and the search task is cancelled (its workers release
+    their proxies before this returns).
+    """
+    stream = ProgressStream()
+    search_task = asyncio.create_task(unified_search(mode, progress=stream.publish, api_key=api_key))
+    drain_task: Optional[asyncio.Task] = None
+    try:
+        while not search_task.done():
+            drain_task = asyncio.create_task(stream.drain(CONFIG["STREAM_HEARTBEAT"]))
+            await asyncio.wait({search_task, drain_task}, return_when=asyncio.FIRST_COMPLETED)
+            if drain_task.done():
+                events = drain_task.result()
+            else:
+                # Search ended first; whatever it published is picked up below
+                drain_task.cancel()
+                events = []
+            if not events and not search_task.done():
+                # Keep proxies / load balancers from closing an idle stream
+                yield ":\n\n" if fmt == "sse" else format_stream_event({"event": "heartbeat"}, fmt)
+            for event in events:
+                yield format_stream_event(event, fmt)
+        for event in await stream.drain(0):
+            yield format_stream_event(event, fmt)
+        yield format_stream_event({"event": "result", "result": search_task.result()}, fmt)
+    finally:
+        if drain_task is not None and not drain_task.done():
+            drain_task.cancel()
+        if not search_task.done():
+            search_task.cancel()
+            await asyncio.gather(search_task, return_exceptions=True)
+
+
+# ==========================================
+#     PROXY LIST HOT RELOAD
+# ==========================================
+def forget_proxy(proxy_url: str):
+    """Drop what we track for a proxy that left the fleet and has no check in flight."""
+    PROXY_SESSIONS.pop(proxy_url, None)
+    FLEET_COUNTERS.forget(proxy_url)
+
+
+class ProxyListReloader:
+    """
+    Keeps PROXIES in step with the proxy file without a restart.
+    
+    watch() polls the file's mtime every PROXIES_RELOAD_INTERVAL seconds;
+    POST /admin/reload-proxies forces a reload. The new list is diffed
+    against the live fleet: added proxies join the schedule at once,
+    proxies that stay keep their sessions, health and cooldowns, and
+    removed ones stop being handed out. A removed proxy that is checked
+    out drains: its check finishes, then forget_proxy() drops its state.
+    An empty or unreadable file is ignored rather than emptying the fleet.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.mtime = self._mtime()
+        self.reloads = 0
+        self.last_reload = 0.0
+        self.last_change: Dict[str, int] = {}
+    
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def changed(self) -> bool:
+        mtime = self._mtime()
+        return mtime is not None and mtime != self.mtime
+    
+    async def reload(self) -> Dict[str, Any]:
+        """Re-read the file and apply the difference to the live fleet."""
+        self.mtime = self._mtime()
+        proxies = load_proxies()
+        if not proxies:
+            logger.warning(f"⚠️ Proxy reload ignored: {self.path.name} is empty or unreadable, keeping {len(PROXIES)} proxies")
+            return {"status": "ignored", "reason": "empty_proxy_file", "total": len(PROXIES)}
+        
+        old, new = set(PROXIES), set(proxies)
+        added = [p for p in dict.fromkeys(proxies) if p not in old]
+        removed = [p for p in dict.fromkeys(PROXIES) if p not in new]
+        # In place: everything holds a reference to this list
+        PROXIES[:] = proxies
+        
+        for proxy_url in added:
+            PROXY_SCHEDULER.add(proxy_url)
+        drained = 0
+        for proxy_url in removed:
+            if PROXY_SCHEDULER.remove(proxy_url):
+                forget_proxy(proxy_url)
+            else:
+                drained += 1
+        if SHARED_PROXY_STATE is not None:
+            SHARED_PROXY_STATE.register(added)
+            SHARED_PROXY_STATE.unregister(removed)
+        for proxy_url in removed:
+            await CLIENT_POOL.discard(proxy_url)
+        if added:
+            CAPACITY.refresh()
+        
+        self.reloads += 1
+        self.last_reload = time.time()
+        self.last_change = {"added": len(added), "removed": len(removed), "draining": drained}
+        logger.info(f"🔄 Proxies reloaded: +{len(added)} -{len(removed)} ({drained} draining), {len(PROXIES)} total")
+        return {"status": "reloaded", **self.last_change, "total": len(PROXIES)}
+    
+    async def watch(self):
+        """Background task: reload whenever the file's mtime changes."""
+        while True:
+            await asyncio.sleep(CONFIG["PROXIES_RELOAD_INTERVAL"])
+            if self.changed():
+                await self.reload()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "watching": CONFIG["PROXIES_RELOAD_INTERVAL"] > 0,
+            "reloads": self.reloads,
+            "last_reload_ago": round(time.time() - self.last_reload, 1) if self.last_reload else None,
+            "last_change": self.last_change,
+            "draining": PROXY_SCHEDULER.draining_count(),
+        }
+
+
+PROXY_RELOADER = ProxyListReloader(proxies_file())
+
+
+# ==========================================
+#              LIFECYCLE
+# ==========================================
+BACKGROUND_TASKS: Set[asyncio.Task] = set()
+
+
+@app.before_serving
+async def start_background_tasks():
+    """Start per-worker background tasks on the serving event loop."""
+    BACKGROUND_TASKS.add(asyncio.create_task(client_pool_janitor()))
+    BACKGROUND_TASKS.add(asyncio.create_task(session_janitor()))
+    if CONFIG["PROXIES_RELOAD_INTERVAL"] > 0:
+        BACKGROUND_TASKS.add(asyncio.create_task(PROXY_RELOADER.watch()))
+
+
+@app.after_serving
+async def stop_background_tasks():
+    """Cancel background tasks and close pooled upstream clients."""
+    for task in BACKGROUND_TASKS:
+        task.cancel()
+    await asyncio.gather(*BACKGROUND_TASKS, return_exceptions=True)
+    BACKGROUND_TASKS.clear()
+    await JOBS.cancel_all()
+    for shared in SHARED_SEARCHES.values():
+        await shared.close()
+    await CLIENT_POOL.close_all()
+    USERNAME_CACHE.close()
+    if SHARED_PROXY_STATE is not None:
+        SHARED_PROXY_STATE.close()
+    for keyspace in KEYSPACES:
+        keyspace.close()
+    if TRACE_SINK is not None:
+        TRACE_SINK.close()
+
+
+# ==========================================
+#              API ROUTES
+# ==========================================
+@app.route('/dashboard')
+async def dashboard():
+    """Admin dashboard - HTML interface."""
+    return await render_template('dashboard.html')
+
+
+@app.route('/')
+async def home():
+    stats = get_proxy_stats()
+    return jsonify({
+        "status": "online",
+        "message": "Instagram Username Checker - ULTIMATE STEALTH Edition v3.0 (IMPOSSIBLE TO RATE LIMIT)",
+        "version": "3.0",
+        "endpoints": {
+            "/search": "Quick search - Smart mix (70% simple + 30% semi-quad)",
+            "/prosearch": "Semi-quad search - Fast mode with _ or . symbols",
+            "/infosearch": "Detailed search - Full logging for debugging",
+            "/infoprosearch": "Detailed semi-quad search - Full logging",
+            "/warm": "Pre-warm all proxy sessions",
+            "/status": "Get detailed system status and statistics",
+            "/metrics": "Per-stage latency histograms and counters (Prometheus text format)",
+            "/traces/<id>": "Bounded debug trace of an /infosearch or /infoprosearch run",
+            "/jobs": "POST: start a search in the background; GET/DELETE /jobs/<id>: poll (?wait=N) or cancel",
+            "/stream": "Search with live progress events (?format=sse|ndjson); disconnect cancels",
+            "/admin/reload-proxies": "POST with X-Admin-Token: re-read proxies.txt now (it is also watched)"
+        },
+        "features": [
+            "🔒 TLS FINGERPRINT: curl_cffi browser impersonation",
+            "🍪 COOKIE MANAGEMENT: Persistent sessions per proxy",
+            "⏱️ POISSON TIMING: Human-like delay distribution",
+            "🔀 HEADER ENTROPY: Randomized header order",
+            "🔥 MULTI-ENDPOINT WARMING: Advanced session prep",
+            "⚡ MICRO-JITTERING: Network latency simulation",
+            "🎭 40+ DEVICE MODELS: Maximum fingerprint diversity",
+            "🔄 AUTO IDENTITY REFRESH: New identity after rest"
+        ],
+        "proxies": {
+            "total": len(PROXIES),
+            "available": stats["available"],
+            "warm": stats["warm_count"],
+            "resting": stats["resting"],
+            "rate_limited": stats["rate_limited"]
+        },
+        "performance": {
+            "total_requests": stats["total_requests"],
+            "success_rate": stats["success_rate"]
+        },
+        "stealth_level": "IMPOSSIBLE TO RATE LIMIT 🛡️"
+    })
+
+
+@app.route('/status')
+async def status():
+    """Get current status of all systems with detailed statistics."""
+    stats = get_proxy_stats()
+    return jsonify({
+        "proxies": {
+            "total": len(PROXIES),
+            "available": stats["available"],
+            "warm": stats["warm_count"],
+            "cold": len(PROXIES) - stats["warm_count"],
+            "rate_limited": stats["rate_limited"],
+            "resting": stats["resting"],
+            "quarantined": stats["quarantined"],
+        },
+        "performance": {
+            "total_requests": stats["total_requests"],
+            "success_rate": stats["success_rate"],
+        },
+        "warming": {
+            "warm_duration_seconds": WARM_DURATION,
+            "warmed_sessions_count": stats["warm_count"]
+        },
+        "config": {
+            "max_concurrent": CONFIG["MAX_CONCURRENT"],
+            "max_requests_per_proxy": CONFIG["MAX_REQUESTS_PER_PROXY"],
+            "proxy_rest_time": CONFIG["PROXY_REST_TIME"],
+            "smart_rotation_enabled": CONFIG["ENABLE_SMART_ROTATION"],
+            "poisson_mean_delay": CONFIG["POISSON_MEAN_DELAY"],
+            "header_shuffle": CONFIG["HEADER_SHUFFLE"],
+            "seed": CONFIG["SEED"],
+            "shared_search": CONFIG["SHARED_SEARCH"],
+            "keyspace_partition": KEYSPACE_PARTITION.to_dict() if KEYSPACE_PARTITION is not None else None,
+        },
+        "shared_search": {shared.label: shared.to_dict() for shared in SHARED_SEARCHES.values()},
+        "capacity": CAPACITY.to_dict(),
+        "concurrency": {mode_name: limiter.to_dict() for mode_name, limiter in CONCURRENCY_LIMITS.items()},
+        "proxy_reload": PROXY_RELOADER.to_dict(),
+        "stealth_features": {
+            "tls_fingerprint": True,
+            "cookie_management": True,
+            "poisson_timing": True,
+            "header_entropy": True,
+            "micro_jittering": True,
+            "browser_impersonations": len(BROWSER_IMPERSONATIONS),
+            "device_models": len(DEVICES),
+        }
+    })
+
+
+@app.route('/metrics')
+async def metrics():
+    """Scrape endpoint: stage histograms, status counters, per-proxy latency."""
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+@app.route('/traces')
+async def list_traces():
+    """Recent debug traces, newest first (live ones included)."""
+    return jsonify({"traces": [
+        {
+            "trace_id": tracer.trace_id, "search_type": tracer.search_type,
+            "started_at": tracer.started_at, "finished": tracer.finished,
+            "recorded": tracer.recorded,
+        }
+        for tracer in reversed(RECENT_TRACES.values())
+    ]})
+
+
+@app.route('/traces/<trace_id>')
+async def get_trace(trace_id: str):
+    """Buffered events of one trace; poll it while the search is still running."""
+    tracer = RECENT_TRACES.get(trace_id)
+    if tracer is None:
+        return jsonify({"status": "error", "reason": "unknown_trace"}), 404
+    return jsonify(tracer.export())
+
+
+@app.route('/warm')
+async def warm():
+    """Manually warm all proxy sessions."""
+    await warm_all_sessions_background()
+    return jsonify({
+        "status": "success",
+        "message": "All sessions warmed with advanced multi-endpoint warming",
+        "warm_count": get_warm_count()
+    })
+
+@app.route('/search')
+async def search():
+    """
+    Find one available username with IMPOSSIBLE TO RATE LIMIT stealth.
+    Smart Probability: 70% Simple Search (5 chars), 30% Pro Search (Semi-Quad).
+    """
+    if pick_search_mode() == SearchMode.SIMPLE:
+        result = await stealth_search(request.headers.get("X-API-Key"))
+    else:
+        result = await semi_quad_stealth_search(request.headers.get("X-API-Key"))
+    
+    return jsonify(result)
+
+@app.route('/infosearch')
+async def info_search():
+    """Find one available username with EXTREMELY DETAILED logging."""
+    result = await detailed_stealth_search(request.headers.get("X-API-Key"))
+    return jsonify(result)
+
+
+@app.route('/prosearch')
+async def pro_search():
+    """Find one available SEMI-QUAD username (with _ or . in allowed positions)."""
+    result = await semi_quad_stealth_search(request.headers.get("X-API-Key"))
+    return jsonify(result)
+
+
+@app.route('/infoprosearch')
+async def info_pro_search():
+    """Find one available SEMI-QUAD username with EXTREMELY DETAILED logging."""
+    result = await detailed_semi_quad_stealth_search(request.headers.get("X-API-Key"))
+    return jsonify(result)
+
+
+@app.route('/stream')
+async def stream():
+    """
+    Search with live progress. ?mode = auto | simple | semi_quad,
+    ?format = sse (default, for EventSource) | ndjson.
+    Disconnecting cancels the search.
+    """
+    mode_name = request.args.get("mode", "auto").lower()
+    if mode_name == "auto":
+        mode = pick_search_mode()
+    elif mode_name in JOB_MODES:
+        mode = JOB_MODES[mode_name]
+    else:
+        return jsonify({"status": "error", "reason": "unknown_mode", "modes": ["auto", "simple", "semi_quad"]}), 400
+    fmt = request.args.get("format", "sse").lower()
+    if fmt not in ("sse", "ndjson"):
+        return jsonify({"status": "error", "reason": "unknown_format", "formats": ["sse", "ndjson"]}), 400
+    
+    response = Response(
+        stream_search(mode, fmt, request.headers.get("X-API-Key")),
+        mimetype="text/event-stream" if fmt == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.timeout = None  # A search can outlive Quart's default response timeout
+    return response
+
+
+@app.route('/jobs', methods=['POST'])
+async def submit_job():
+    """
+    Start a search in the background and return its id at once.
+    Body (JSON) or query: mode = auto (the /search mix) | simple | semi_quad,
+    detailed = true for a traced search.
+    """
+    params = dict(request.args)
+    body = await request.get_json(silent=True)
+    if isinstance(body, dict):
+        params.update(body)
+    
+    mode_name = str(params.get("mode", "auto")).lower()
+    if mode_name == "auto":
+        mode = pick_search_mode()
+    elif mode_name in JOB_MODES:
+        mode = JOB_MODES[mode_name]
+    else:
+        return jsonify({"status": "error", "reason": "unknown_mode", "modes": ["auto", "simple", "semi_quad"]}), 400
+    detailed = str(params.get("detailed", "false")).lower() in ("1", "true", "yes")
+    
+    job = JOBS.submit(mode, detailed, request.headers.get("X-API-Key"))
+    if job is None:
+        return jsonify({"status": "error", "reason": "too_many_running_jobs"}), 429
+    return jsonify({"job_id": job.job_id, "status": job.status, "mode": mode.value, "poll": f"/jobs/{job.job_id}"}), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id: str):
+    """Job state and, once finished, its result. ?wait=N long-polls up to N seconds."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "reason": "unknown_job"}), 404
+    try:
+        wait = min(float(request.args.get("wait", 0)), CONFIG["JOB_WAIT_MAX"])
+    except ValueError:
+        wait = 0.0
+    if wait > 0 and job.status == "running":
+        try:
+            await asyncio.wait_for(job.done.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+async def cancel_job(job_id: str):
+    """Cancel a running job; its workers stop and release their proxies."""
+    job = JOBS.cancel(job_id)
+    if job is None:
+        return jsonify({"status": "error", "reason": "unknown_job"}), 404
+    if job.status == "running":
+        await job.done.wait()
+    return jsonify(job.to_dict())
+
+
+@app.route('/admin/reload-proxies', methods=['POST'])
+async def admin_reload_proxies():
+    """Re-read the proxy file now. Needs X-Admin-Token = ADMIN_TOKEN (off when unset)."""
+    if not CONFIG["ADMIN_TOKEN"]:
+        return jsonify({"status": "error", "reason": "admin_disabled"}), 403
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), CONFIG["ADMIN_TOKEN"].encode()):
+        return jsonify({"status": "error", "reason": "unauthorized"}), 401
+    return jsonify(await PROXY_RELOADER.reload())
+
+# ==========================================
+#              MAIN
+# ==========================================
+if __name__ == "__main__":
+    port = int(os.environ.get('PORT', 5000))
+    logger.info(f"🚀 Starting ULTIMATE STEALTH v3.0 server on port {port}")
+    logger.info(f"🛡️ Stealth: TLS Fingerprint, Cookie Mgmt, Poisson Timing, Header Entropy")
+    logger.info(f"🔒 Status: IMPOSSIBLE TO RATE LIMIT")
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Response classifier microbenchmark
+==================================
+
+Runs classify_response() and the previous substring/lower() cascade over
+the bodies in bench/response_corpus.json and reports, per response:
+time per classification and bytes allocated (tracemalloc peak).
+Also asserts both classifiers agree on every body.
+
+Usage:
+    python bench/classifier_bench.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app  # noqa: E402
+
+CORPUS_PATH = Path(__file__).resolve().parent / "response_corpus.json"
+
+
+def legacy_classify(status_code: int, body: bytes) -> str:
+    """The pre-classifier logic from check_username_stealth (decode + lower() per pattern)."""
+    text = body.decode("utf-8", "replace")
+    if '"available":true' in text or '"available": true' in text:
+        return "available"
+    if '"available":false' in text or '"available": false' in text:
+        return "taken"
+    for pattern in app.RATE_LIMIT_PATTERNS:
+        if pattern.lower() in text.lower():
+            return "rate_limit"
+    for pattern in app.CHALLENGE_PATTERNS:
+        if pattern.lower() in text.lower():
+            return "challenge"
+    if status_code == 200 and '"status":"ok"' in text:
+        return "taken"
+    return "unknown"
+
+
+def load_corpus():
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        entries = json.load(f)["responses"]
+    corpus = []
+    for entry in entries:
+        body = entry["body"].encode("utf-8")
+        pad = entry.get("pad_bytes", 0)
+        if pad:
+            filler = b"<div class=\"x\">&nbsp;</div>\n"
+            body += filler * (pad // len(filler))
+        corpus.append((entry["name"], entry["status_code"], body))
+    return corpus
+
+
+def time_per_call(fn, status_code, body, iterations) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(status_code, body)
+    return (time.perf_counter() - start) / iterations
+
+
+def peak_alloc(fn, status_code, body) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn(status_code, body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    
+    corpus = load_corpus()
+    new_classify = app.classify_response
+    
+    mismatches = [
+        (name, legacy_classify(code, body), new_classify(code, body)[0])
+        for name, code, body in corpus
+        if legacy_classify(code, body) != new_classify(code, body)[0]
+    ]
+    
+    print(f"{'response':<24}{'bytes':>8}{'legacy us':>12}{'new us':>10}{'legacy B':>12}{'new B':>8}")
+    totals = [0.0, 0.0]
+    for name, code, body in corpus:
+        legacy_t = time_per_call(legacy_classify, code, body, args.iterations)
+        new_t = time_per_call(new_classify, code, body, args.iterations)
+        totals[0] += legacy_t
+        totals[1] += new_t
+        print(
+            f"{name:<24}{len(body):>8}{legacy_t * 1e6:>12.2f}{new_t * 1e6:>10.2f}"
+            f"{peak_alloc(legacy_classify, code, body):>12}{peak_alloc(new_classify, code, body):>8}"
+        )
+    print(f"{'TOTAL':<24}{'':>8}{totals[0] * 1e6:>12.2f}{totals[1] * 1e6:>10.2f}")
+    
+    if mismatches:
+        for name, old, new in mismatches:
+            print(f"MISMATCH {name}: legacy={old} new={new}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
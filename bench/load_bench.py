@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end search load benchmark
+================================
+
+Starts bench/mock_upstream.py as a subprocess (upstream + stand-in proxy
+fleet on localhost), points app at it and drives N searches at concurrency
+C through unified_search. Nothing leaves the machine: the cache and the
+keyspace state run in memory only.
+
+Reports checks/sec, checks per found name, time-to-first-find
+p50/p90/p99, CPU seconds per search (this process only, the mock runs
+elsewhere), RSS and peak RSS, and the status mix of every check.
+
+--shared sends the searches through app.shared_search (what /search and
+/prosearch use) instead of one unified_search each, so concurrent
+searches of a mode (and API key) attach to one pipeline. Compare checks/find at
+rising --concurrency with and without it.
+
+--tenants N spreads the searches round-robin over N API keys (bench0..)
+and adds a per-tenant time-to-first-find p99, to check that the capacity
+scheduler keeps every tenant's latency bounded. Weight tenants with
+API_KEY_WEIGHTS=bench0:4,bench1:1 in the environment.
+
+--fast turns off the human-pacing delays (Poisson pacing, micro-jitter,
+typing and slow-connection simulation) so the numbers measure the
+pipeline rather than the sleeps. --no-rest also lifts the per-proxy rest
+after MAX_REQUESTS_PER_PROXY checks; without it a small fleet spends most
+of a run waiting out rests, which is realistic but hides pipeline costs.
+
+Set SEED=<n> in the environment for a reproducible run: the app draws
+everything from that seed and the mock gets it as --mock-seed (unless
+given explicitly). The report then includes the found names and a digest
+of the candidate sequence drawn, both of which should match between runs.
+(How many in-flight checks land before a find cancels the rest still
+depends on wall-clock timing, so the raw check count can differ by a few.)
+
+Usage:
+    python bench/load_bench.py --mode semi-quad --searches 20 --concurrency 4 --fast --no-rest
+    python bench/load_bench.py --searches 40 --concurrency 16 --fast --no-rest --shared
+    API_KEY_WEIGHTS=bench0:3 python bench/load_bench.py --searches 48 --concurrency 12 --tenants 3 --fast --no-rest
+    python bench/load_bench.py --proxies 200 --latency lognormal:0.15,0.8 --rate-limit-ratio 0.02 --json
+    python bench/load_bench.py --searches 10 --concurrency 2 --fast --no-rest --proxies 80 --upstream-capacity 12
+    SEED=7 python bench/load_bench.py --searches 5 --concurrency 1 --fast --no-rest
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+# Memory-only persistence: a benchmark must not touch the real cache/keyspace
+os.environ["CACHE_DB"] = ""
+os.environ["KEYSPACE_DIR"] = ""
+
+import app  # noqa: E402
+from mock_upstream import add_fleet_arguments  # noqa: E402
+
+MODES = {"semi-quad": app.SearchMode.SEMI_QUAD, "simple": app.SearchMode.SIMPLE}
+FLEET_OPTIONS = ["proxies", "latency", "proxy_latency", "available_ratio", "rate_limit_ratio",
+                 "challenge_ratio", "drop_ratio", "proxy_limit", "proxy_window", "flaky_share",
+                 "flaky_drop_ratio", "flaky_latency", "upstream_capacity", "mock_seed"]
+
+
+def start_mock(args: argparse.Namespace) -> Tuple[subprocess.Popen, Dict[str, Any]]:
+    """Launch the mock fleet and read the endpoint line it prints when ready."""
+    cmd = [sys.executable, str(BENCH_DIR / "mock_upstream.py"), "--report-every", "3600"]
+    if args.mock_seed is None and app.CONFIG["SEED"] is not None:
+        args.mock_seed = app.CONFIG["SEED"]
+    for name in FLEET_OPTIONS:
+        value = getattr(args, name)
+        if value is not None:
+            cmd += [f"--{name.replace('_', '-')}", str(value)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line:
+        proc.kill()
+        raise RuntimeError("mock_upstream.py exited before printing its endpoints")
+    return proc, json.loads(line)
+
+
+def configure_app(endpoints: Dict[str, Any], fast: bool, no_rest: bool):
+    app.CONFIG["API_URL"] = endpoints["api_url"]
+    app.WARM_ENDPOINTS_ADVANCED[:] = [("GET", endpoints["warm_url"], None)]
+    app.PROXIES[:] = endpoints["proxies"]
+    app.PROXY_SCHEDULER.reset(app.PROXIES)
+    app.FLEET_COUNTERS.reset()
+    if fast:
+        app.CONFIG["TYPING_SIMULATION"] = False
+        app.CONFIG["SLOW_CONNECTION_CHANCE"] = 0
+        app.CONFIG["MICRO_JITTER_MIN"] = 0
+        app.CONFIG["MICRO_JITTER_MAX"] = 0
+        app.poisson_delay = lambda mean=None: 0.0
+    if no_rest:
+        app.CONFIG["ENABLE_SMART_ROTATION"] = False
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+async def run_load(mode: "app.SearchMode", searches: int, concurrency: int, shared: bool = False,
+                   tenants: int = 0) -> Dict[str, Any]:
+    statuses: Counter = Counter()
+    drawn = hashlib.sha1()
+    results: List[Dict[str, Any]] = []
+    tenant_ttff: Dict[str, List[float]] = {}
+    original_tally = app.tally_check_result
+    original_draw = app.next_uncached_batch
+
+    def counting_tally(stats, result):
+        statuses[result["status"]] += 1
+        original_tally(stats, result)
+
+    def recording_draw(keyspace, count, *args, **kwargs):
+        candidates, skipped = original_draw(keyspace, count, *args, **kwargs)
+        drawn.update(",".join(username for username, _ in candidates).encode())
+        return candidates, skipped
+
+    app.tally_check_result = counting_tally
+    app.next_uncached_batch = recording_draw
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one_search(i: int):
+        api_key = f"bench{i % tenants}" if tenants else None
+        async with gate:
+            if shared:
+                result = await app.shared_search(mode, api_key).search()
+            else:
+                result = await app.unified_search(mode, api_key=api_key)
+        results.append(result)
+        if api_key and result["status"] == "success":
+            tenant_ttff.setdefault(api_key, []).append(result["duration"])
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for i in range(searches):
+                tg.create_task(one_search(i))
+    finally:
+        app.tally_check_result = original_tally
+        app.next_uncached_batch = original_draw
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    await app.CLIENT_POOL.close_all()
+
+    found = [r["duration"] for r in results if r["status"] == "success"]
+    checks = sum(statuses.values())
+    return {
+        "mode": mode.value,
+        "searches": searches,
+        "concurrency": concurrency,
+        "shared": shared,
+        "found": len(found),
+        "wall_seconds": round(wall, 3),
+        "checks": checks,
+        "checks_per_sec": round(checks / wall, 1) if wall else 0.0,
+        "checks_per_find": round(checks / len(found), 1) if found else None,
+        "ttff_p50": round(percentile(found, 50), 3),
+        "ttff_p90": round(percentile(found, 90), 3),
+        "ttff_p99": round(percentile(found, 99), 3),
+        "tenant_ttff_p99": {key: round(percentile(v, 99), 3) for key, v in sorted(tenant_ttff.items())},
+        "cpu_seconds_per_search": round(cpu / searches, 4),
+        "cpu_ms_per_check": round(cpu * 1000 / checks, 3) if checks else 0.0,
+        "rss_mb": round(rss_bytes() / 2**20, 1),
+        "peak_rss_mb": round(max(rss_bytes(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024) / 2**20, 1),
+        "status_mix": dict(statuses.most_common()),
+        "failed_checks_per_search": round((statuses["timeout"] + statuses["network_error"]) / searches, 2),
+        "rate_limited_per_search": round((statuses["rate_limit"] + statuses["challenge"]) / searches, 2),
+        "concurrency_limit": app.CONCURRENCY_LIMITS[mode.value].to_dict(),
+        "seed": app.CONFIG["SEED"],
+        "found_usernames": [r["username"] for r in results if r["status"] == "success"],
+        "candidates_digest": drawn.hexdigest()[:16],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"mode={report['mode']}{' (shared)' if report['shared'] else ''}  searches={report['searches']}  "
+          f"concurrency={report['concurrency']}  "
+          f"found={report['found']}/{report['searches']}  wall={report['wall_seconds']}s")
+    print(f"  checks/sec            {report['checks_per_sec']:>10}")
+    print(f"  checks/find           {report['checks_per_find']:>10}")
+    print(f"  time-to-first-find    p50={report['ttff_p50']}s  p90={report['ttff_p90']}s  p99={report['ttff_p99']}s")
+    if report["tenant_ttff_p99"]:
+        print(f"  per-tenant ttff p99   {report['tenant_ttff_p99']}")
+    print(f"  CPU                   {report['cpu_seconds_per_search']}s/search  {report['cpu_ms_per_check']}ms/check")
+    print(f"  memory                rss={report['rss_mb']}MB  peak={report['peak_rss_mb']}MB")
+    print(f"  status mix            {report['status_mix']}")
+    print(f"  timeouts+net errors   {report['failed_checks_per_search']}/search")
+    print(f"  rate limits           {report['rate_limited_per_search']}/search")
+    concurrency = report["concurrency_limit"]
+    print(f"  concurrency limit     {concurrency['limit']}/{concurrency['ceiling']}  "
+          f"(+{concurrency['increases']} / -{concurrency['decreases']})")
+    if report["seed"] is not None:
+        print(f"  seed                  {report['seed']}  found={report['found_usernames']}  candidates={report['candidates_digest']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=sorted(MODES), default="semi-quad")
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Searches in flight at once")
+    parser.add_argument("--fast", action="store_true", help="Disable human-pacing delays")
+    parser.add_argument("--no-rest", action="store_true",
+                        help="Disable smart-rotation rests (MAX_REQUESTS_PER_PROXY) to measure raw throughput")
+    parser.add_argument("--shared", action="store_true", help="Attach searches to the shared pipeline of their mode and API key")
+    parser.add_argument("--tenants", type=int, default=0, help="Spread searches over N API keys")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object instead of the table")
+    parser.add_argument("--verbose", action="store_true", help="Keep app and httpx INFO logging")
+    add_fleet_arguments(parser)
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    proc, endpoints = start_mock(args)
+    try:
+        configure_app(endpoints, args.fast, args.no_rest)
+        report = asyncio.run(run_load(MODES[args.mode], args.searches, args.concurrency, args.shared, args.tenants))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the upstream check_username API and a proxy fleet
+====================================================================
+
+One process, no dependencies beyond the standard library:
+
+- The UPSTREAM answers POST /api/v1/users/check_username/ after a latency
+  drawn from a configurable distribution, with a configurable share of
+  available names and injected rate-limit / challenge bodies (matching
+  RATE_LIMIT_PATTERNS / CHALLENGE_PATTERNS in app.py). Any other path
+  (the warm endpoints) gets a plain {"status":"ok"}.
+- The PROXY FLEET is N local ports speaking HTTP/1.1 with keep-alive.
+  Each port accepts absolute-form proxy requests, adds its own latency,
+  can drop connections (network errors) and rate-limits itself once it
+  sees more than --proxy-limit requests per --proxy-window seconds, then
+  hands the request to the upstream model in-process.
+
+Point app.CONFIG["API_URL"] at http://127.0.0.1:<port>/api/v1/users/check_username/
+and app.PROXIES at the printed proxy URLs (bench/load_bench.py does this).
+
+Latency specs: fixed:0.05 | uniform:0.02,0.2 | exp:0.08 | lognormal:0.08,0.6
+(lognormal takes the median and sigma).
+
+--flaky-share makes that fraction of the fleet (the FIRST proxies in the
+printed list, like bad entries at the top of proxies.txt) use
+--flaky-latency and --flaky-drop-ratio instead of the fleet-wide values.
+
+--upstream-capacity N makes the upstream overload: a check that arrives
+while N others are being answered gets a rate-limit body straight away,
+whichever proxy it came through.
+
+With --mock-seed every draw for a request (proxy latency, drop, upstream
+latency, injected failures) comes from a generator seeded by the seed and
+the username, so answers and timings don't depend on arrival order. Pair
+it with SEED=<n> on the app side for reproducible runs.
+
+Usage:
+    python bench/mock_upstream.py --proxies 50 --latency lognormal:0.08,0.6 --available-ratio 0.01
+    python bench/mock_upstream.py --proxies 50 --flaky-share 0.2 --flaky-drop-ratio 0.6 --flaky-latency uniform:1,6
+    python bench/mock_upstream.py --proxies 60 --upstream-capacity 12
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+CHECK_PATH = b"/api/v1/users/check_username/"
+
+TAKEN_BODY = '{{"username":"{u}","available":false,"error":"This username isn\'t available. Please try another.","error_type":"username_is_taken","status":"ok"}}'
+AVAILABLE_BODY = '{{"username":"{u}","available":true,"status":"ok"}}'
+RATE_LIMIT_BODIES = [
+    '{"message":"Please wait a few minutes before you try again.","require_login":true,"status":"fail"}',
+    '{"message":"feedback_required","spam":true,"feedback_title":"Try Again Later","status":"fail"}',
+    '{"message":"rate limited","error_type":"rate_limit_error","status":"fail"}',
+]
+CHALLENGE_BODIES = [
+    '{"message":"challenge_required","challenge":{"api_path":"/challenge/","lock":true},"status":"fail"}',
+    '{"message":"checkpoint_required","checkpoint_url":"/challenge/","lock":true,"status":"fail"}',
+]
+WARM_BODY = '{"status":"ok"}'
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Build a latency sampler (seconds, drawn from the given rng) from a 'kind:args' spec."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def parse_username(body: bytes) -> str:
+    for pair in body.split(b"&"):
+        key, _, value = pair.partition(b"=")
+        if key == b"username":
+            return value.decode("ascii", "replace")
+    return ""
+
+
+class UpstreamModel:
+    """
+    Decides each check_username answer. Whether a username is available
+    is a pure function of (seed, username), so the same candidate gets
+    the same answer regardless of arrival order or which proxy sent it.
+    """
+
+    def __init__(self, latency: str, available_ratio: float, rate_limit_ratio: float,
+                 challenge_ratio: float, seed: Optional[int] = None, capacity: int = 0):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.latency = parse_latency(latency)
+        self.available_ratio = available_ratio
+        self.rate_limit_ratio = rate_limit_ratio
+        self.challenge_ratio = challenge_ratio
+        self.capacity = capacity
+        self.in_flight = 0
+        self.counts: Dict[str, int] = {"available": 0, "taken": 0, "rate_limit": 0, "challenge": 0,
+                                       "overloaded": 0, "other": 0}
+
+    def is_available(self, username: str) -> bool:
+        bucket = zlib.crc32(f"{self.seed or 0}:{username}".encode()) / 0xFFFFFFFF
+        return bucket < self.available_ratio
+
+    def request_rng(self, username: str) -> random.Random:
+        """Per-request generator when seeded, else the shared one."""
+        if self.seed is None:
+            return self.rng
+        return random.Random(f"{self.seed}:{username}")
+
+    async def respond(self, path: bytes, username: str, rng: random.Random) -> Tuple[int, str]:
+        if self.capacity and path.startswith(CHECK_PATH) and self.in_flight >= self.capacity:
+            self.counts["overloaded"] += 1
+            return 429, RATE_LIMIT_BODIES[0]
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(max(0.0, self.latency(rng)))
+        finally:
+            self.in_flight -= 1
+        if not path.startswith(CHECK_PATH):
+            self.counts["other"] += 1
+            return 200, WARM_BODY
+
+        x = rng.random()
+        if x < self.rate_limit_ratio:
+            self.counts["rate_limit"] += 1
+            return 429, rng.choice(RATE_LIMIT_BODIES)
+        if x < self.rate_limit_ratio + self.challenge_ratio:
+            self.counts["challenge"] += 1
+            return 400, rng.choice(CHALLENGE_BODIES)
+        if self.is_available(username):
+            self.counts["available"] += 1
+            return 200, AVAILABLE_BODY.format(u=username)
+        self.counts["taken"] += 1
+        return 200, TAKEN_BODY.format(u=username)
+
+
+class StandInProxy:
+    """One fleet member: latency, connection drops and a self-imposed rate limit."""
+
+    def __init__(self, upstream: UpstreamModel, latency: Callable[[random.Random], float], drop_ratio: float,
+                 limit: int, window: float):
+        self.upstream = upstream
+        self.latency = latency
+        self.drop_ratio = drop_ratio
+        self.limit = limit
+        self.window = window
+        self.recent: deque = deque()
+        self.requests = 0
+        self.dropped = 0
+        self.limited = 0
+
+    def over_limit(self) -> bool:
+        if self.limit <= 0:
+            return False
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > self.window:
+            self.recent.popleft()
+        self.recent.append(now)
+        return len(self.recent) > self.limit
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                method, target, _ = request_line.split(b" ", 2)
+                if method == b"CONNECT":
+                    # TLS tunnelling is out of scope: point API_URL at plain http
+                    writer.write(b"HTTP/1.1 501 Not Implemented\r\nContent-Length: 0\r\n\r\n")
+                    await writer.drain()
+                    break
+
+                self.requests += 1
+                username = parse_username(body)
+                rng = self.upstream.request_rng(username)
+                await asyncio.sleep(max(0.0, self.latency(rng)))
+                if rng.random() < self.drop_ratio:
+                    self.dropped += 1
+                    break  # Close without answering -> network error at the client
+
+                path = target.split(b"://", 1)[-1]
+                path = path[path.find(b"/"):] if b"://" in target else target
+                if path.startswith(CHECK_PATH) and self.over_limit():
+                    self.limited += 1
+                    status, payload = 429, RATE_LIMIT_BODIES[0]
+                else:
+                    status, payload = await self.upstream.respond(path, username, rng)
+
+                data = payload.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+class MockFleet:
+    """The upstream model plus N listening stand-in proxies."""
+
+    def __init__(self, upstream: UpstreamModel, proxies: List[StandInProxy]):
+        self.upstream = upstream
+        self.proxies = proxies
+        self.servers: List[asyncio.AbstractServer] = []
+        self.proxy_urls: List[str] = []
+        self.upstream_port = 0
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.upstream_port}{CHECK_PATH.decode()}"
+
+    @property
+    def warm_url(self) -> str:
+        return f"http://127.0.0.1:{self.upstream_port}/api/v1/launcher/sync/"
+
+    async def start(self, host: str = "127.0.0.1", base_port: int = 0):
+        for i, proxy in enumerate(self.proxies):
+            server = await asyncio.start_server(proxy.handle, host, base_port + i if base_port else 0)
+            self.servers.append(server)
+            port = server.sockets[0].getsockname()[1]
+            self.proxy_urls.append(f"http://bench{i}:x@{host}:{port}")
+        # Requests always go through a proxy; the "upstream" address only
+        # needs to be a well-formed absolute URL, so reuse the first port.
+        self.upstream_port = self.servers[0].sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+        for server in self.servers:
+            await server.wait_closed()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.upstream.counts,
+            "proxy_requests": sum(p.requests for p in self.proxies),
+            "proxy_dropped": sum(p.dropped for p in self.proxies),
+            "proxy_rate_limited": sum(p.limited for p in self.proxies),
+        }
+
+
+def add_fleet_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--proxies", type=int, default=50, help="Number of stand-in proxies")
+    parser.add_argument("--latency", default="lognormal:0.08,0.6", help="Upstream latency spec")
+    parser.add_argument("--proxy-latency", default="uniform:0.005,0.03", help="Per-proxy added latency spec")
+    parser.add_argument("--available-ratio", type=float, default=0.01)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--challenge-ratio", type=float, default=0.0)
+    parser.add_argument("--drop-ratio", type=float, default=0.0, help="Share of proxied requests dropped")
+    parser.add_argument("--proxy-limit", type=int, default=0, help="Requests per window before a proxy rate-limits (0 = off)")
+    parser.add_argument("--proxy-window", type=float, default=60.0)
+    parser.add_argument("--flaky-share", type=float, default=0.0, help="Fraction of proxies (listed first) that are flaky")
+    parser.add_argument("--flaky-drop-ratio", type=float, default=0.5)
+    parser.add_argument("--flaky-latency", default="uniform:1,6", help="Per-proxy added latency spec for flaky proxies")
+    parser.add_argument("--upstream-capacity", type=int, default=0,
+                        help="Checks answered at once before the upstream rate-limits the rest (0 = unlimited)")
+    parser.add_argument("--mock-seed", type=int, default=None, help="Per-username deterministic answers and timings")
+
+
+def build_fleet(args: argparse.Namespace) -> MockFleet:
+    upstream = UpstreamModel(args.latency, args.available_ratio, args.rate_limit_ratio,
+                             args.challenge_ratio, seed=args.mock_seed, capacity=args.upstream_capacity)
+    proxy_latency = parse_latency(args.proxy_latency)
+    flaky_latency = parse_latency(args.flaky_latency)
+    flaky_count = round(args.proxies * args.flaky_share)
+    proxies = [
+        StandInProxy(upstream, flaky_latency, args.flaky_drop_ratio, args.proxy_limit, args.proxy_window)
+        if i < flaky_count else
+        StandInProxy(upstream, proxy_latency, args.drop_ratio, args.proxy_limit, args.proxy_window)
+        for i in range(args.proxies)
+    ]
+    return MockFleet(upstream, proxies)
+
+
+async def serve(args: argparse.Namespace):
+    fleet = build_fleet(args)
+    await fleet.start(base_port=args.base_port)
+    print(json.dumps({"api_url": fleet.api_url, "warm_url": fleet.warm_url, "proxies": fleet.proxy_urls}), flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.report_every)
+            print(json.dumps(fleet.stats()), flush=True)
+    finally:
+        await fleet.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_fleet_arguments(parser)
+    parser.add_argument("--base-port", type=int, default=0, help="First proxy port (0 = ephemeral)")
+    parser.add_argument("--report-every", type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()